@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict
+
+from src.benchmark import SOLVERS
+from src.jobs import DEFAULTS, load_config, prepare, solve, to_json
+from src.utils import DistanceCache
+
+CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def _solve_instance(instance: Dict, *prepared) -> Dict:
+    """Solves an instance, reporting failures in the result record.
+
+    Args:
+        instance (Dict): Settings of the instance.
+        *prepared: Locations, distance matrix, cost matrix and profile.
+
+    Returns:
+        Dict: Result record.
+    """
+    try:
+        return solve(instance, *prepared)
+    except Exception as err:
+        return {"name": instance["name"], "status": "error", "error": str(err)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solves many VRP instances in parallel, without prompts."
+    )
+    parser.add_argument("configs", nargs="*", help="JSON or YAML config files.")
+    parser.add_argument(
+        "--locations", nargs="+", default=[], help="Locations CSV files to solve."
+    )
+    parser.add_argument("--trucks", type=int, help="Number of available trucks.")
+    parser.add_argument("--capacity", type=float, help="Truck capacity (Liters).")
+    parser.add_argument("--consumption", type=float, help="Truck consumption (km/l).")
+    parser.add_argument("--price", type=float, help="Diesel price per liter.")
+    parser.add_argument("--solver", choices=list(SOLVERS))
+    parser.add_argument("--backend", choices=["api", "haversine"])
+    parser.add_argument("--improve", action="store_true", default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="JSON lines output. Defaults to stdout.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    flags = {
+        "num_trucks": args.trucks,
+        "truck_capacity": args.capacity,
+        "truck_consumption": args.consumption,
+        "diesel_price": args.price,
+        "solver": args.solver,
+        "backend": args.backend,
+        "improve": args.improve,
+    }
+    flags = {key: value for key, value in flags.items() if value is not None}
+
+    instances = [
+        {"name": os.path.basename(path), "locations": path}
+        for path in args.locations
+    ]
+    for path in args.configs:
+        instances += load_config(path)
+    instances = [{**DEFAULTS, **instance, **flags} for instance in instances]
+    missing = [i["name"] for i in instances if "num_trucks" not in i]
+    if not instances or missing:
+        sys.exit(f"Number of trucks missing for: {', '.join(missing) or 'all'}")
+
+    cache = DistanceCache(path=os.path.join(CURRENT_PATH, "data", "distance_cache.csv"))
+    output = open(args.output, "w", encoding="UTF-8") if args.output else sys.stdout
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        tasks = []
+        for instance in instances:
+            try:
+                prepared = prepare(instance, cache)
+            except Exception as err:
+                record = {
+                    "name": instance["name"],
+                    "status": "error",
+                    "error": str(err),
+                }
+                output.write(to_json(record) + "\n")
+                continue
+            tasks += [executor.submit(_solve_instance, instance, *prepared)]
+
+        for task in as_completed(tasks):
+            output.write(to_json(task.result()) + "\n")
+            output.flush()
+    if output is not sys.stdout:
+        output.close()
+    print(
+        f"Processed {len(instances)} instances in {time.time() - start:.2f} s.",
+        file=sys.stderr,
+    )
@@ -1,3 +1,4 @@
+import argparse
 import os
 import time
 from ast import Global
@@ -8,10 +9,18 @@ import numpy as np
 import pandas as pd
 from termcolor import colored
 
+from src.annealing_search import AnnealingSolver
+from src.decomposition_search import DecompositionSolver
 from src.global_search import GlobalSolver
 from src.heuristic_search import HeuristicSolver
+from src.local_search import LocalSearch
+from src.mip_search import MIPSolver
+from src.partition_search import PartitionSolver
+from src.savings_search import SavingsSolver
 from src.utils import (
+    DistanceCache,
     DistanceMatrix,
+    Profile,
     Solution,
     distance_to_cost,
     format_solution_output,
@@ -24,38 +33,76 @@ def run(
     t_capacity: float,
     t_consumption: float,
     diesel_price: float,
-    solver: Union[GlobalSolver, HeuristicSolver],
+    solver: Union[
+        GlobalSolver,
+        HeuristicSolver,
+        PartitionSolver,
+        SavingsSolver,
+        AnnealingSolver,
+        DecompositionSolver,
+        MIPSolver,
+    ],
+    improve: bool = False,
+    profile_path: str = None,
 ) -> None:
+    profile = Profile(enabled=profile_path is not None)
     current_path = os.path.dirname(os.path.abspath(__file__))
-    locations_path = os.path.join(current_path, "data", "locations_reduced.csv")
-    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
-
-    distance_matrix = DistanceMatrix(input_data=locations)
-    distance_matrix.calculate()
-    cost_matrix = distance_to_cost(
-        diesel_price=diesel_price,
-        truck_consumption=t_consumption,
-        dist_matrix=distance_matrix.matrix,
-    )
-
-    locations.index = locations["Name"]
-    locations.drop(columns=["Name"], inplace=True)
-
-    solver = solver(
-        cost_matrix=cost_matrix,
-        locations_info=locations,
-        optimal_solution=Solution(trucks=[], total_cost=np.inf),
-        dist_matrix=distance_matrix.matrix,
-    )
+    with profile.phase("location_setup"):
+        locations_path = os.path.join(current_path, "data", "locations_reduced.csv")
+        locations = pd.read_csv(
+            locations_path, sep=";", index_col=False, encoding="UTF-8"
+        )
+
+    with profile.phase("matrix_fetch"):
+        cache_path = os.path.join(current_path, "data", "distance_cache.csv")
+        distance_matrix = DistanceMatrix(
+            input_data=locations, cache=DistanceCache(path=cache_path)
+        )
+        distance_matrix.calculate()
+    with profile.phase("cost_conversion"):
+        cost_matrix = distance_to_cost(
+            diesel_price=diesel_price,
+            truck_consumption=t_consumption,
+            dist_matrix=distance_matrix.matrix,
+        )
+
+    with profile.phase("location_setup"):
+        locations.index = locations["Name"]
+        locations.drop(columns=["Name"], inplace=True)
+
+        solver = solver(
+            cost_matrix=cost_matrix,
+            locations_info=locations,
+            optimal_solution=Solution(trucks=[], total_cost=np.inf),
+            dist_matrix=distance_matrix.matrix,
+            profile=profile,
+        )
 
     start = time.time()
     solver.run(num_trucks=t_count, truck_capacity=t_capacity)
+    if improve:
+        with profile.phase("local_search"):
+            solver.optimal_solution = LocalSearch(
+                cost_matrix=cost_matrix, locations_info=locations
+            ).improve(solver.optimal_solution, t_capacity)
     duration = time.time() - start
 
     format_solution_output(solver, t_capacity, duration)
+    if profile_path is not None:
+        profile.dump(profile_path)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile", help="Writes the phase timings and search counters as JSON."
+    )
+    parser.add_argument(
+        "--improve",
+        action="store_true",
+        help="Improves the solution with local search after the solver.",
+    )
+    args = parser.parse_args()
 
     truck_count = int(input("Insert the number of available trucks: "))
     truck_capacity = float(input("Insert the capacity of the available trucks: "))
@@ -65,13 +112,24 @@ if __name__ == "__main__":
     diesel_price = float(input("Insert the current diesel price per liter: "))
 
     configured_run = partial(
-        run, truck_count, truck_capacity, truck_consumption, diesel_price
+        run,
+        truck_count,
+        truck_capacity,
+        truck_consumption,
+        diesel_price,
+        improve=args.improve,
+        profile_path=args.profile,
     )
 
     print(colored("VRP Solver Strategies:", "blue"))
     print()
     print("1 - Global Search")
     print("2 - Heuristic Search")
+    print("3 - Partition DP Search")
+    print("4 - Savings Search")
+    print("5 - Simulated Annealing")
+    print("6 - Cluster Decomposition")
+    print("7 - MIP Model (OR-Tools or PuLP)")
     print("0 - Quit")
     print()
     strategy = input("Insert the number of the desired solver: ")
@@ -84,3 +142,18 @@ if __name__ == "__main__":
 
     elif strategy == "2":
         configured_run(HeuristicSolver)
+
+    elif strategy == "3":
+        configured_run(PartitionSolver)
+
+    elif strategy == "4":
+        configured_run(SavingsSolver)
+
+    elif strategy == "5":
+        configured_run(AnnealingSolver)
+
+    elif strategy == "6":
+        configured_run(DecompositionSolver)
+
+    elif strategy == "7":
+        configured_run(MIPSolver)
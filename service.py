@@ -0,0 +1,537 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from src.benchmark import SOLVERS
+from src.jobs import DATA_PATH, DEFAULTS, read_locations, solve, to_json
+from src.utils import DistanceCache, DistanceMatrix, Profile, distance_to_cost
+
+CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
+FINISHED = ("ok", "infeasible", "error", "timeout", "cancelled")
+MAX_BODY = 64 * 1024 * 1024
+# Seconds past the time limit before a job that ignores its alarm is timed out
+BACKSTOP = 5
+
+
+@dataclass
+class MatrixCache:
+    """In-memory LRU cache of the distance matrices of location sets.
+
+    A location set is identified by the names and rounded coordinates of its
+    locations, regardless of their order or production, so daily production
+    changes and reordered requests reuse the same matrix. The least recently used
+    matrix is dropped once more than `max_size` are kept.
+    """
+
+    max_size: int = 16
+    distance_cache: DistanceCache = None
+    precision: int = 5
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.__matrices: Dict[Tuple, pd.DataFrame] = OrderedDict()
+
+    def key(self, locations: pd.DataFrame, backend: str) -> Tuple:
+        """Identifies a location set.
+
+        Args:
+            locations (pd.DataFrame): Locations with Name, Latitude and Longitude
+                columns.
+            backend (str): Distance matrix backend.
+
+        Returns:
+            Tuple: Backend and sorted (name, latitude, longitude) of each location.
+        """
+        points = zip(
+            locations["Name"],
+            locations["Latitude"].round(self.precision),
+            locations["Longitude"].round(self.precision),
+        )
+        return (backend, tuple(sorted(points)))
+
+    def lookup(self, key: Tuple) -> pd.DataFrame:
+        """Returns a cached matrix, marking it as the most recently used.
+
+        Args:
+            key (Tuple): Key of the location set.
+
+        Returns:
+            pd.DataFrame: Distance matrix, or None when it is not cached.
+        """
+        matrix = self.__matrices.get(key)
+        if matrix is not None:
+            self.__matrices.move_to_end(key)
+            self.hits += 1
+        return matrix
+
+    def calculate(self, key: Tuple, locations: pd.DataFrame) -> pd.DataFrame:
+        """Calculates the distance matrix of a location set and caches it. Blocks
+        while the matrix is fetched, so the service runs it in a thread.
+
+        Args:
+            key (Tuple): Key of the location set.
+            locations (pd.DataFrame): Locations of the set.
+
+        Returns:
+            pd.DataFrame: Distance matrix.
+        """
+        backend = key[0]
+        distance_matrix = DistanceMatrix(
+            input_data=locations,
+            backend=backend,
+            cache=self.distance_cache if backend == "api" else None,
+        )
+        distance_matrix.calculate()
+        self.misses += 1
+        self.__matrices[key] = distance_matrix.matrix
+        while len(self.__matrices) > self.max_size:
+            self.__matrices.popitem(last=False)
+        return distance_matrix.matrix
+
+    def __len__(self) -> int:
+        return len(self.__matrices)
+
+
+@dataclass
+class Job:
+    id: str
+    instance: Dict
+    status: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    result: Dict = None
+    task: asyncio.Task = field(default=None, repr=False)
+
+    def to_dict(self, result: bool = True) -> Dict:
+        """Returns the status of the job.
+
+        Args:
+            result (bool, optional): Whether to include the result record.
+                Defaults to True.
+
+        Returns:
+            Dict: Id, settings, status, timestamps and, when finished, result.
+        """
+        record = {
+            "id": self.id,
+            "name": self.instance["name"],
+            "solver": self.instance["solver"],
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if result and self.result is not None:
+            record["result"] = self.result
+        return record
+
+
+def _expire(signum: int, frame) -> None:
+    raise TimeoutError("Job exceeded its time limit.")
+
+
+def _run_job(
+    instance: Dict, locations: pd.DataFrame, dist_matrix: pd.DataFrame
+) -> Dict:
+    """Solves a job in a worker process. On Unix, the time limit of the job is
+    enforced by an alarm, so the worker is free as soon as it expires.
+
+    Args:
+        instance (Dict): Settings of the job.
+        locations (pd.DataFrame): Locations of the job.
+        dist_matrix (pd.DataFrame): Cached distance matrix.
+
+    Returns:
+        Dict: Result record.
+    """
+    timeout = instance["timeout"]
+    alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, _expire)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        profile = Profile(enabled=True)
+        with profile.phase("cost_conversion"):
+            cost_matrix = distance_to_cost(
+                diesel_price=instance["diesel_price"],
+                truck_consumption=instance["truck_consumption"],
+                dist_matrix=dist_matrix,
+            )
+        return solve(instance, locations, dist_matrix, cost_matrix, profile)
+    except TimeoutError as err:
+        return {"name": instance["name"], "status": "timeout", "error": str(err)}
+    except Exception as err:
+        return {"name": instance["name"], "status": "error", "error": str(err)}
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+@dataclass
+class SolveService:
+    """Long-running solve service that keeps its matrices and workers warm.
+
+    Jobs are submitted as JSON with the same settings as the batch configs, plus
+    the locations themselves (a list of records, or the path of a CSV inside
+    `data_dir`) and an optional `timeout` in seconds. Distance matrices are kept in
+    a MatrixCache and fetched one at a time in a thread, so the shared distance
+    cache is never written concurrently. At most `workers` jobs run at once in a
+    process pool whose workers keep the solver modules imported between jobs. A
+    job that outlives its time limit is reported as timed out, but keeps its
+    worker slot until the worker is actually free. Finished jobs are kept until
+    more than `max_jobs` are stored.
+
+    Endpoints:
+        POST /jobs: Submits a job. With "wait": true, answers once it finishes.
+        GET /jobs: Status of every job.
+        GET /jobs/<id>: Status and result of a job.
+        DELETE /jobs/<id>: Cancels a queued job.
+        GET /health: Workers, job counts and cache statistics.
+    """
+
+    workers: int = os.cpu_count()
+    cache_size: int = 16
+    max_jobs: int = 1000
+    timeout: float = 300
+    data_dir: str = DATA_PATH
+    distance_cache: DistanceCache = None
+
+    def __post_init__(self) -> None:
+        self.cache = MatrixCache(
+            max_size=self.cache_size, distance_cache=self.distance_cache
+        )
+        self.jobs: Dict[str, Job] = OrderedDict()
+        self.__executor = None
+        self.__slots = None
+        self.__fetching = None
+
+    def start(self) -> None:
+        """Starts the worker pool. Must be called from the running event loop."""
+        self.__executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.__slots = asyncio.Semaphore(self.workers)
+        self.__fetching = asyncio.Lock()
+
+    def stop(self) -> None:
+        """Cancels the pending jobs and shuts the worker pool down."""
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __locations_path(self, path: str) -> str:
+        """Resolves the locations CSV of a job inside the data directory.
+
+        Args:
+            path (str): Path of the CSV, relative to `data_dir` or absolute.
+
+        Raises:
+            ValueError: The path is outside the data directory.
+
+        Returns:
+            str: Resolved path.
+        """
+        data_dir = os.path.realpath(self.data_dir)
+        path = os.path.realpath(os.path.join(data_dir, path))
+        if os.path.commonpath([data_dir, path]) != data_dir:
+            raise ValueError("Locations must be inside the data directory.")
+        return path
+
+    def submit(self, payload: Dict) -> Job:
+        """Validates a job and schedules it.
+
+        Args:
+            payload (Dict): Settings of the job.
+
+        Raises:
+            ValueError: Invalid settings.
+
+        Returns:
+            Job: Queued job.
+        """
+        instance = {**DEFAULTS, "timeout": self.timeout, **payload}
+        instance.pop("wait", None)
+        if "num_trucks" not in instance:
+            raise ValueError("Number of trucks missing.")
+        if instance["solver"] not in SOLVERS:
+            raise ValueError(f"Unknown solver: {instance['solver']}")
+        locations = instance.pop("locations")
+        if isinstance(locations, str):
+            locations = self.__locations_path(locations)
+        locations = read_locations(locations)
+
+        job = Job(id=uuid.uuid4().hex[:12], instance=instance)
+        job.instance.setdefault("name", job.id)
+        job.task = asyncio.create_task(self.__execute(job, locations))
+        job.task.add_done_callback(lambda _: self.__finish(job))
+        self.jobs[job.id] = job
+        self.__forget()
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """Cancels a job that has not started running.
+
+        Args:
+            job (Job): Job to be cancelled.
+
+        Returns:
+            bool: Whether the job was cancelled.
+        """
+        if job.status != "queued":
+            return False
+        job.task.cancel()
+        return True
+
+    async def __matrix(self, locations: pd.DataFrame, backend: str) -> pd.DataFrame:
+        """Returns the distance matrix of a location set, from the cache if possible.
+
+        Args:
+            locations (pd.DataFrame): Locations of the job.
+            backend (str): Distance matrix backend.
+
+        Returns:
+            pd.DataFrame: Distance matrix.
+        """
+        key = self.cache.key(locations, backend)
+        matrix = self.cache.lookup(key)
+        if matrix is not None:
+            return matrix
+        async with self.__fetching:
+            matrix = self.cache.lookup(key)
+            if matrix is None:
+                matrix = await asyncio.get_running_loop().run_in_executor(
+                    None, self.cache.calculate, key, locations
+                )
+        return matrix
+
+    async def __execute(self, job: Job, locations: pd.DataFrame) -> None:
+        """Fetches the matrix of a job and solves it in the worker pool.
+
+        Args:
+            job (Job): Job to be run.
+            locations (pd.DataFrame): Locations of the job.
+        """
+        instance = job.instance
+        try:
+            dist_matrix = await self.__matrix(locations, instance["backend"])
+            await self.__slots.acquire()
+            future = None
+            try:
+                job.status, job.started = "running", time.time()
+                future = asyncio.get_running_loop().run_in_executor(
+                    self.__executor, _run_job, instance, locations, dist_matrix
+                )
+                # Backstop for solvers stuck where the alarm cannot interrupt them
+                limit = instance["timeout"] + BACKSTOP if instance["timeout"] else None
+                done, _ = await asyncio.wait([future], timeout=limit)
+                if not done:
+                    raise asyncio.TimeoutError
+                job.result = future.result()
+            finally:
+                if future is None or future.done():
+                    self.__slots.release()
+                else:
+                    # The worker is still busy, so the slot is freed when it ends
+                    future.add_done_callback(lambda _: self.__slots.release())
+        except asyncio.TimeoutError:
+            job.result = {
+                "name": instance["name"],
+                "status": "timeout",
+                "error": "Job exceeded its time limit.",
+            }
+        except Exception as err:
+            job.result = {
+                "name": instance["name"],
+                "status": "error",
+                "error": str(err),
+            }
+
+    def __finish(self, job: Job) -> None:
+        """Records the end of a job, which was cancelled if it has no result.
+
+        Args:
+            job (Job): Finished job.
+        """
+        if job.result is None:
+            job.result = {"name": job.instance["name"], "status": "cancelled"}
+        job.status, job.finished = job.result["status"], time.time()
+
+    def __forget(self) -> None:
+        """Drops the oldest finished jobs beyond `max_jobs`."""
+        finished = [i for i, job in self.jobs.items() if job.status in FINISHED]
+        for i in finished[: max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[i]
+
+    def health(self) -> Dict:
+        """Returns the workers, job counts and cache statistics."""
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "jobs": counts,
+            "cache": {
+                "matrices": len(self.cache),
+                "max_size": self.cache.max_size,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+        }
+
+    async def __route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Answers a request.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Request path.
+            body (bytes): Request body.
+
+        Returns:
+            Tuple[int, Dict]: HTTP status and JSON body of the answer.
+        """
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["health"] and method == "GET":
+            return HTTPStatus.OK, self.health()
+        if parts == ["jobs"] and method == "GET":
+            return HTTPStatus.OK, {
+                "jobs": [job.to_dict(result=False) for job in self.jobs.values()]
+            }
+        if parts == ["jobs"] and method == "POST":
+            try:
+                payload = json.loads(body or b"{}")
+                job = self.submit(payload)
+            except (ValueError, TypeError, KeyError, OSError) as err:
+                return HTTPStatus.BAD_REQUEST, {"error": str(err)}
+            if payload.get("wait"):
+                await asyncio.wait([job.task])
+                return HTTPStatus.OK, job.to_dict()
+            return HTTPStatus.ACCEPTED, job.to_dict()
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return HTTPStatus.NOT_FOUND, {"error": f"Unknown job: {parts[1]}"}
+            if method == "GET":
+                return HTTPStatus.OK, job.to_dict()
+            if method == "DELETE":
+                if not self.cancel(job):
+                    return HTTPStatus.CONFLICT, {"error": f"Job is {job.status}."}
+                await asyncio.wait([job.task])
+                return HTTPStatus.OK, job.to_dict()
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}"}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves one HTTP/1.1 request per connection.
+
+        Args:
+            reader (asyncio.StreamReader): Connection input.
+            writer (asyncio.StreamWriter): Connection output.
+        """
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                status, answer = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+                    "error": "Request body too large."
+                }
+            else:
+                body = await reader.readexactly(length)
+                status, answer = await self.__route(method.upper(), path, body)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, answer = HTTPStatus.BAD_REQUEST, {"error": "Malformed request."}
+
+        data = to_json(answer).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + data
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 8080, socket_path: str = None
+    ) -> None:
+        """Serves requests until cancelled.
+
+        Args:
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): TCP port. Defaults to 8080.
+            socket_path (str, optional): Unix socket to listen on instead of TCP.
+                Defaults to None.
+        """
+        self.start()
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serves VRP solve jobs over HTTP, keeping matrices in memory."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--socket", help="Unix socket to listen on instead of TCP.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-size", type=int, default=16, help="Matrices kept.")
+    parser.add_argument("--max-jobs", type=int, default=1000, help="Jobs kept.")
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Default job time limit (s)."
+    )
+    parser.add_argument(
+        "--data-dir", default=DATA_PATH, help="Directory of the locations CSVs."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    service = SolveService(
+        workers=args.workers,
+        cache_size=args.cache_size,
+        max_jobs=args.max_jobs,
+        timeout=args.timeout,
+        data_dir=args.data_dir,
+        distance_cache=DistanceCache(
+            path=os.path.join(CURRENT_PATH, "data", "distance_cache.csv")
+        ),
+    )
+    address = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving solve jobs at {address}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.heuristic_search import HeuristicSolver
+from src.savings_search import SavingsSolver
+from src.utils import (
+    Problem,
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+from src.utils.fleet import first_fit_decreasing
+
+Move = Tuple
+
+
+@dataclass
+class AnnealingSolver:
+    """Anytime simulated annealing solver with a wall-clock budget.
+
+    It starts from the Clarke-Wright savings solution, or from the nearest-neighbor
+    one or a first-fit-decreasing packing when savings needs too many trucks. It
+    perturbs it with relocate, swap, 2-opt* and intra-route moves between each oil
+    field and one of its `neighbors` nearest fields, or an unused truck. Relocate
+    and swap moves are scored in constant time from the cost array, while 2-opt*
+    sums the loads of the route heads and intra-route moves are scored in the
+    length of the route. The temperature cools geometrically over the time budget, and the best
+    solution found when it runs out is kept. The budget can also be a number of
+    iterations, which with a `seed` makes runs reproducible on any machine.
+
+    Since the fixed cost of a truck is only saved once its route is empty, moves
+    are accepted on their cost change minus a bonus, scaled by `spread_weight`,
+    for spreading the loads apart (the change in the sum of squared loads). This
+    lets small routes drain into fuller ones.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    optimal_solution: Solution
+    dist_matrix: pd.DataFrame = None
+    neighbors: int = 10
+    seed: int = None
+    spread_weight: float = 1.0
+    profile: Profile = field(default_factory=Profile)
+    iterations: int = field(default=0, init=False)
+
+    def __index_route(self, r: int) -> None:
+        """Refreshes the position and load of the oil fields of a route.
+
+        Args:
+            r (int): Route index.
+        """
+        seq = self.__seq[r]
+        for k, node in enumerate(seq[1:-1], start=1):
+            self.__route_of[node] = r
+            self.__index[node] = k
+        self.__load[r] = sum(self.__production[f] for f in seq[1:-1])
+
+    def __seq_cost(self, seq: List[int]) -> float:
+        """Calculates the cost of a depot -> fields -> depot sequence.
+
+        Args:
+            seq (List[int]): Location ids, starting and ending at the depot.
+
+        Returns:
+            float: Fixed plus variable cost, or zero for an empty route.
+        """
+        if len(seq) == 2:
+            return 0.0
+        c = self.__costs
+        return self.__fixed_cost + sum(c[a, b] for a, b in zip(seq, seq[1:]))
+
+    def __propose(
+        self, u: int, rng: random.Random
+    ) -> Tuple[float, float, Move]:
+        """Draws a random move around an oil field and scores it.
+
+        Args:
+            u (int): Oil field id.
+            rng (random.Random): Random number generator.
+
+        Returns:
+            Tuple[float, float, Move]: Cost change of the move, change in the sum
+            of squared route loads and the move itself, or None when the drawn
+            move is not feasible.
+        """
+        c = self.__costs
+        p = self.__production
+        capacity = self.__capacity
+        fixed = self.__fixed_cost
+        depot = self.__depot
+        ru, i = self.__route_of[u], self.__index[u]
+        A = self.__seq[ru]
+        up, un = A[i - 1], A[i + 1]
+        removal = c[up, un] - c[up, u] - c[u, un]
+
+        kind = rng.random()
+        if kind < 0.05:
+            # Open an unused truck for u
+            if len(A) == 3:
+                return 0.0, 0.0, None
+            for rv, B in enumerate(self.__seq):
+                if len(B) == 2:
+                    delta = removal + c[depot, u] + c[u, depot] + fixed
+                    spread = 2 * p[u] * (p[u] - self.__load[ru])
+                    return delta, spread, ("relocate", u, rv)
+            return 0.0, 0.0, None
+
+        v = rng.choice(self.__neighbors[u])
+        rv, j = self.__route_of[v], self.__index[v]
+        B = self.__seq[rv]
+        vp, vn = B[j - 1], B[j + 1]
+
+        if ru == rv:
+            # Reinsert u after v, or reverse the segment between them
+            if kind < 0.55:
+                seq = A[:i] + A[i + 1 :]
+                k = seq.index(v) + 1
+                seq[k:k] = [u]
+            else:
+                lo, hi = min(i, j), max(i, j)
+                seq = A[:lo] + A[lo : hi + 1][::-1] + A[hi + 1 :]
+            delta = self.__seq_cost(seq) - self.__seq_cost(A)
+            return delta, 0.0, ("replace", ru, seq)
+
+        load_a, load_b = self.__load[ru], self.__load[rv]
+        if kind < 0.55:
+            # Relocate u after v
+            if load_b + p[u] > capacity:
+                return 0.0, 0.0, None
+            delta = removal + c[v, u] + c[u, vn] - c[v, vn]
+            if len(A) == 3:
+                delta -= fixed
+            spread = 2 * p[u] * (load_b - load_a + p[u])
+            return delta, spread, ("relocate", u, rv, j + 1)
+
+        if kind < 0.8:
+            # Swap u and v
+            if load_a - p[u] + p[v] > capacity or load_b - p[v] + p[u] > capacity:
+                return 0.0, 0.0, None
+            delta = (
+                c[up, v]
+                + c[v, un]
+                - c[up, u]
+                - c[u, un]
+                + c[vp, u]
+                + c[u, vn]
+                - c[vp, v]
+                - c[v, vn]
+            )
+            shift = p[v] - p[u]
+            spread = 2 * shift * (load_a - load_b + shift)
+            return delta, spread, ("swap", u, v)
+
+        # 2-opt*: u keeps its head and takes v's tail
+        head_a = sum(p[f] for f in A[1 : i + 1])
+        head_b = sum(p[f] for f in B[1:j])
+        new_a, new_b = head_a + load_b - head_b, head_b + load_a - head_a
+        if new_a > capacity or new_b > capacity:
+            return 0.0, 0.0, None
+        delta = c[u, v] + c[vp, un] - c[u, un] - c[vp, v]
+        if j == 1 and i + 1 == len(A) - 1:
+            delta -= fixed
+        spread = new_a**2 + new_b**2 - load_a**2 - load_b**2
+        return delta, spread, ("exchange", u, v)
+
+    def __apply(self, move: Move) -> None:
+        """Applies a move to the routes.
+
+        Args:
+            move (Move): Move drawn by __propose.
+        """
+        kind = move[0]
+        if kind == "replace":
+            _, r, seq = move
+            self.__seq[r] = seq
+            self.__index_route(r)
+            return
+
+        u = move[1]
+        ru, i = self.__route_of[u], self.__index[u]
+        A = self.__seq[ru]
+        if kind == "relocate":
+            rv = move[2]
+            B = self.__seq[rv]
+            position = move[3] if len(move) > 3 else 1
+            self.__seq[ru] = A[:i] + A[i + 1 :]
+            self.__seq[rv] = B[:position] + [u] + B[position:]
+        else:
+            v = move[2]
+            rv, j = self.__route_of[v], self.__index[v]
+            B = self.__seq[rv]
+            if kind == "swap":
+                self.__seq[ru] = A[:i] + [v] + A[i + 1 :]
+                self.__seq[rv] = B[:j] + [u] + B[j + 1 :]
+            else:
+                self.__seq[ru] = A[: i + 1] + B[j:]
+                self.__seq[rv] = B[:j] + A[i + 1 :]
+        self.__index_route(ru)
+        self.__index_route(rv)
+
+    def __anneal(
+        self,
+        problem: Problem,
+        routes: List[List[int]],
+        capacity: float,
+        deadline: float,
+        rng: random.Random,
+        max_iterations: int = None,
+    ) -> List[List[int]]:
+        """Runs simulated annealing until the deadline, or for a number of
+        iterations.
+
+        Args:
+            problem (Problem): Compiled problem.
+            routes (List[List[int]]): Initial routes of each truck.
+            capacity (float): Truck capacity (bbl).
+            deadline (float): `time.perf_counter()` value at which to stop.
+            rng (random.Random): Random number generator.
+            max_iterations (int, optional): Number of iterations that replaces the
+                deadline and sets the temperature schedule. Defaults to None.
+
+        Returns:
+            List[List[int]]: Best routes found.
+        """
+        depot = problem.depot
+        self.__costs = memoryview(problem.costs)
+        self.__production = problem.production.tolist()
+        self.__capacity = capacity + 1e-9
+        self.__fixed_cost = problem.fixed_cost
+        self.__depot = depot
+        self.__neighbors = problem.neighbor_lists(self.neighbors)
+        self.__seq = [[depot] + list(route) + [depot] for route in routes]
+        self.__load = [0.0] * len(routes)
+        self.__route_of = [-1] * len(problem.names)
+        self.__index = [-1] * len(problem.names)
+        for r in range(len(self.__seq)):
+            self.__index_route(r)
+
+        fields = problem.fields.tolist()
+        best_routes = [list(route) for route in routes]
+        if len(fields) < 2:
+            return best_routes
+
+        # Starting temperature accepts a typical uphill move half of the time
+        uphill = []
+        for _ in range(1000):
+            delta, spread, move = self.__propose(rng.choice(fields), rng)
+            if move is not None and delta > 1e-9:
+                uphill += [delta]
+        if not uphill:
+            return best_routes
+        start_temperature = float(np.median(uphill)) / math.log(2)
+        final_temperature = start_temperature * 1e-3
+        weight = self.spread_weight * problem.fixed_cost / capacity**2
+
+        start = time.perf_counter()
+        budget = max(deadline - start, 1e-9)
+        temperature = start_temperature
+        current = best = 0.0
+        self.iterations = 0
+        while max_iterations is None or self.iterations < max_iterations:
+            self.iterations += 1
+            if self.iterations & 255 == 0:
+                if max_iterations is not None:
+                    progress = self.iterations / max_iterations
+                else:
+                    now = time.perf_counter()
+                    if now >= deadline:
+                        break
+                    progress = (now - start) / budget
+                temperature = start_temperature * (
+                    final_temperature / start_temperature
+                ) ** progress
+
+            delta, spread, move = self.__propose(
+                fields[rng.randrange(len(fields))], rng
+            )
+            if move is None:
+                continue
+            score = delta - weight * spread
+            if score <= 0 or rng.random() < math.exp(-score / temperature):
+                self.__apply(move)
+                current += delta
+                if current < best - 1e-9:
+                    best = current
+                    best_routes = [seq[1:-1] for seq in self.__seq]
+
+        return best_routes
+
+    def __initial_routes(
+        self, problem: Problem, num_trucks: int, truck_capacity: float
+    ) -> List[List[int]]:
+        """Builds the solution the annealing starts from.
+
+        The savings solution is preferred, then the nearest-neighbor one. When
+        neither fits in the fleet, the oil fields are packed first-fit-decreasing
+        into the trucks and the annealing finds their visiting order.
+
+        Args:
+            problem (Problem): Compiled problem.
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+
+        Returns:
+            List[List[int]]: Oil field ids visited by each truck, or None when the
+            packing does not fit in the fleet either.
+        """
+        for start_solver in (SavingsSolver, HeuristicSolver):
+            start = start_solver(
+                cost_matrix=self.cost_matrix,
+                locations_info=self.locations_info,
+                dist_matrix=self.dist_matrix,
+                optimal_solution=Solution(trucks=[], total_cost=np.inf),
+            )
+            start.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+            if np.isfinite(start.optimal_solution.total_cost):
+                return [route.tolist() for route in start.optimal_solution.routes]
+
+        production = problem.production[problem.fields]
+        capacity = liter_to_bbl(volume=truck_capacity)
+        if (production > capacity + 1e-9).any():
+            return None
+        packing = first_fit_decreasing(production, capacity)
+        if len(packing) and packing.max() >= num_trucks:
+            return None
+        return [problem.fields[packing == t].tolist() for t in range(num_trucks)]
+
+    def run(
+        self,
+        num_trucks: int,
+        truck_capacity: float,
+        time_limit: float = 10.0,
+        max_iterations: int = None,
+    ) -> None:
+        """Runs the solver.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+            time_limit (float, optional): Wall-clock budget in seconds, including
+                the construction of the initial solution. Defaults to 10.0.
+            max_iterations (int, optional): Number of annealing iterations. When
+                set, it replaces the time limit and the temperature follows the
+                iteration count, so the same `seed` gives the same solution.
+                Defaults to None.
+        """
+        deadline = time.perf_counter() + time_limit
+        rng = random.Random(self.seed)
+
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+        with self.profile.phase("initial_solution"):
+            routes = self.__initial_routes(problem, num_trucks, truck_capacity)
+        if routes is None:
+            self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+            return
+
+        with self.profile.phase("search"):
+            routes = self.__anneal(
+                problem=problem,
+                routes=routes,
+                capacity=liter_to_bbl(volume=truck_capacity),
+                deadline=deadline,
+                rng=rng,
+                max_iterations=max_iterations,
+            )
+
+        with self.profile.phase("build_solution"):
+            solution = problem.build_solution(*giant_tour(routes), truck_capacity)
+        self.optimal_solution.assign(solution)
+        self.profile.count(iterations=self.iterations)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = AnnealingSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        seed=0,
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity, time_limit=10.0)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
@@ -0,0 +1,13 @@
+from .generator import generate_locations, save_locations
+from .harness import SOLVERS, Benchmark, load_results, save_results
+from .regression import compare_results
+
+__all__ = [
+    "generate_locations",
+    "save_locations",
+    "SOLVERS",
+    "Benchmark",
+    "load_results",
+    "save_results",
+    "compare_results",
+]
@@ -0,0 +1,78 @@
+import argparse
+import sys
+
+import pandas as pd
+
+from .harness import SOLVERS, Benchmark, load_results, save_results
+from .regression import compare_results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.benchmark",
+        description="Runs the VRP solvers over grids of synthetic instances.",
+    )
+    parser.add_argument(
+        "--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS)
+    )
+    parser.add_argument("--fields", nargs="+", type=int, default=[5, 10, 50])
+    parser.add_argument(
+        "--trucks",
+        nargs="+",
+        type=int,
+        default=[None],
+        help="Numbers of trucks. Defaults to enough trucks for every solver.",
+    )
+    parser.add_argument("--capacities", nargs="+", type=float, default=[10000.0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=5.0,
+        help="Time budget of the anytime solvers, in seconds.",
+    )
+    parser.add_argument("--output", help="Path of the results (.csv or .json).")
+    parser.add_argument(
+        "--baseline", help="Results to compare against (.csv or .json)."
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark = Benchmark(
+        solvers=args.solvers,
+        fields=args.fields,
+        trucks=args.trucks,
+        capacities=args.capacities,
+        seed=args.seed,
+        timeout=args.timeout,
+        options={
+            "annealing": {"seed": args.seed, "run": {"time_limit": args.time_limit}},
+            "mip": {"run": {"time_limit": args.time_limit}},
+        },
+    )
+    results = benchmark.run()
+
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(results.to_string(index=False))
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        comparison = compare_results(
+            results,
+            load_results(args.baseline),
+            time_tolerance=args.time_tolerance,
+            memory_tolerance=args.memory_tolerance,
+        )
+        regressions = comparison[comparison["regression"] != ""]
+        if regressions.empty:
+            print("No regressions against the baseline.")
+        else:
+            print("Regressions against the baseline:")
+            print(regressions.to_string(index=False))
+            sys.exit(1)
@@ -0,0 +1,69 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+DEPOT = (-18.78, -39.79)
+BOUNDS = ((-19.5, -18.5), (-40.0, -39.7))
+
+
+def generate_locations(
+    num_fields: int,
+    seed: int = 0,
+    bounds: Tuple[Tuple[float, float], Tuple[float, float]] = BOUNDS,
+    depot: Tuple[float, float] = DEPOT,
+    max_production: float = 50.0,
+) -> pd.DataFrame:
+    """Generates a synthetic instance in the format of `locations.csv`.
+
+    Oil fields are spread uniformly over the bounding box, and their production
+    follows a log-normal distribution around 10 bbl, like the real fields.
+
+    Args:
+        num_fields (int): Number of oil fields.
+        seed (int, optional): Random seed. Defaults to 0.
+        bounds (Tuple[Tuple[float, float], Tuple[float, float]], optional): Latitude
+            and longitude ranges of the oil fields. Defaults to BOUNDS.
+        depot (Tuple[float, float], optional): Latitude and longitude of the depot.
+            Defaults to DEPOT.
+        max_production (float, optional): Largest production of an oil field
+            (bbl). Defaults to 50.0.
+
+    Returns:
+        pd.DataFrame: Locations with Name, Latitude, Longitude, Production and Depot
+        columns, the depot being the last row.
+    """
+    rng = np.random.default_rng(seed)
+    (lat_min, lat_max), (lon_min, lon_max) = bounds
+    production = rng.lognormal(mean=np.log(10.0), sigma=0.8, size=num_fields)
+    width = len(str(num_fields))
+
+    fields = pd.DataFrame(
+        {
+            "Name": [f"Campo {i + 1:0{width}d}" for i in range(num_fields)],
+            "Latitude": rng.uniform(lat_min, lat_max, num_fields).round(5),
+            "Longitude": rng.uniform(lon_min, lon_max, num_fields).round(5),
+            "Production": production.clip(0.1, max_production).round(2),
+            "Depot": 0,
+        }
+    )
+    base = pd.DataFrame(
+        {
+            "Name": ["Base"],
+            "Latitude": [depot[0]],
+            "Longitude": [depot[1]],
+            "Production": [0.0],
+            "Depot": [1],
+        }
+    )
+    return pd.concat([fields, base], ignore_index=True)
+
+
+def save_locations(locations: pd.DataFrame, path: str) -> None:
+    """Writes the locations as a semicolon separated CSV, like `locations.csv`.
+
+    Args:
+        locations (pd.DataFrame): Locations to be written.
+        path (str): Path of the CSV file.
+    """
+    locations.to_csv(path, sep=";", index=False, encoding="UTF-8")
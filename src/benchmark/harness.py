@@ -0,0 +1,286 @@
+import math
+import multiprocessing
+import queue
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.annealing_search import AnnealingSolver
+from src.decomposition_search import DecompositionSolver
+from src.global_search import GlobalSolver
+from src.heuristic_search import HeuristicSolver
+from src.mip_search import MIPSolver
+from src.partition_search import PartitionSolver
+from src.savings_search import SavingsSolver
+from src.utils import DistanceMatrix, Solution, distance_to_cost, liter_to_bbl
+
+from .generator import generate_locations
+
+SOLVERS = {
+    "global": GlobalSolver,
+    "partition": PartitionSolver,
+    "heuristic": HeuristicSolver,
+    "savings": SavingsSolver,
+    "annealing": AnnealingSolver,
+    "decomposition": DecompositionSolver,
+    "mip": MIPSolver,
+}
+MAX_FIELDS = {"global": 10, "partition": 16}
+KEYS = ["solver", "fields", "trucks", "capacity", "seed"]
+
+
+def _peak_memory() -> float:
+    """Returns the peak resident memory of the current process.
+
+    Returns:
+        float: Peak memory in MB, or NaN where it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        return np.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(
+    solver: type,
+    cost_matrix: pd.DataFrame,
+    locations: pd.DataFrame,
+    dist_matrix: pd.DataFrame,
+    num_trucks: int,
+    truck_capacity: float,
+    options: Dict,
+    results: multiprocessing.Queue,
+) -> None:
+    """Runs a solver on one instance. Meant to be the target of a child process,
+    so that peak memory is measured per case and the case can be killed.
+
+    Args:
+        solver (type): Solver class.
+        cost_matrix (pd.DataFrame): Cost matrix of the instance.
+        locations (pd.DataFrame): Locations of the instance.
+        dist_matrix (pd.DataFrame): Distance matrix of the instance.
+        num_trucks (int): Number of available trucks.
+        truck_capacity (float): Total cargo capacity of the trucks.
+        options (Dict): Solver fields, plus the keyword arguments of `run` that the
+            solver accepts under the "run" key.
+        results (multiprocessing.Queue): Queue that receives the measurements.
+    """
+    try:
+        options = dict(options)
+        run_options = options.pop("run", {})
+        instance = solver(
+            cost_matrix=cost_matrix,
+            locations_info=locations,
+            dist_matrix=dist_matrix,
+            optimal_solution=Solution(trucks=[], total_cost=np.inf),
+            **options,
+        )
+        start = time.perf_counter()
+        instance.run(
+            num_trucks=num_trucks, truck_capacity=truck_capacity, **run_options
+        )
+        wall_time = time.perf_counter() - start
+
+        cost = instance.optimal_solution.total_cost
+        results.put(
+            {
+                "status": "ok" if np.isfinite(cost) else "infeasible",
+                "wall_time": wall_time,
+                "peak_memory_mb": _peak_memory(),
+                "cost": cost,
+                "trucks_used": sum(
+                    1 for t in instance.optimal_solution.trucks if t.route
+                ),
+            }
+        )
+    except Exception as err:
+        results.put({"status": f"error: {err}"})
+
+
+@dataclass
+class Benchmark:
+    """Runs solvers over grids of synthetic instances, offline.
+
+    Instances come from `generate_locations` with great-circle distances. Every
+    case runs in its own process, which reports the wall time of `run`, the peak
+    resident memory of the process, the cost and the number of trucks used. A case
+    that exceeds `timeout` is killed. The gap of each case is measured against the
+    best cost found by any solver on the same instance.
+    """
+
+    solvers: List[str] = field(default_factory=lambda: list(SOLVERS))
+    fields: List[int] = field(default_factory=lambda: [5, 10, 50])
+    trucks: List[int] = field(default_factory=lambda: [None])
+    capacities: List[float] = field(default_factory=lambda: [10000.0])
+    seed: int = 0
+    timeout: float = 60.0
+    diesel_price: float = 6.62
+    truck_consumption: float = 17.5
+    options: Dict[str, Dict] = field(
+        default_factory=lambda: {
+            "annealing": {"seed": 0, "run": {"time_limit": 5.0}},
+            "mip": {"run": {"time_limit": 30.0}},
+        }
+    )
+
+    def __instance(
+        self, num_fields: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Generates an instance and its distance and cost matrices.
+
+        Args:
+            num_fields (int): Number of oil fields.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: Locations, distance
+            matrix and cost matrix.
+        """
+        locations = generate_locations(num_fields=num_fields, seed=self.seed)
+        distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+        distance_matrix.calculate()
+        cost_matrix = distance_to_cost(
+            diesel_price=self.diesel_price,
+            truck_consumption=self.truck_consumption,
+            dist_matrix=distance_matrix.matrix,
+        )
+        return locations, distance_matrix.matrix, cost_matrix
+
+    def __fleet_size(self, locations: pd.DataFrame, truck_capacity: float) -> int:
+        """Estimates a number of trucks that leaves room for every solver.
+
+        Args:
+            locations (pd.DataFrame): Locations of the instance.
+            truck_capacity (float): Total cargo capacity of the trucks.
+
+        Returns:
+            int: Half again the trucks needed to carry the whole production, plus one.
+        """
+        production = locations["Production"].sum()
+        return math.ceil(1.5 * production / liter_to_bbl(volume=truck_capacity)) + 1
+
+    def __run_case(
+        self,
+        solver: str,
+        instance: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame],
+        num_trucks: int,
+        truck_capacity: float,
+    ) -> Dict:
+        """Runs a solver on an instance in a child process.
+
+        Args:
+            solver (str): Name of the solver in SOLVERS.
+            instance (Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]): Locations,
+                distance matrix and cost matrix.
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+
+        Returns:
+            Dict: Measurements of the case.
+        """
+        locations, dist_matrix, cost_matrix = instance
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_run_case,
+            args=(
+                SOLVERS[solver],
+                cost_matrix,
+                locations,
+                dist_matrix,
+                num_trucks,
+                truck_capacity,
+                self.options.get(solver, {}),
+                results,
+            ),
+        )
+        process.start()
+        deadline = time.perf_counter() + self.timeout
+        result = {"status": "timeout"}
+        while time.perf_counter() < deadline:
+            try:
+                result = results.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not process.is_alive() and results.empty():
+                    result = {"status": f"crashed: exit code {process.exitcode}"}
+                    break
+        process.terminate()
+        process.join()
+        return result
+
+    def run(self) -> pd.DataFrame:
+        """Runs every solver on every case of the grid.
+
+        Returns:
+            pd.DataFrame: One row per solver and case.
+        """
+        records = []
+        for num_fields in self.fields:
+            instance = self.__instance(num_fields)
+            for truck_capacity in self.capacities:
+                for num_trucks in self.trucks:
+                    if num_trucks is None:
+                        num_trucks = self.__fleet_size(instance[0], truck_capacity)
+                    for solver in self.solvers:
+                        record = {
+                            "solver": solver,
+                            "fields": num_fields,
+                            "trucks": num_trucks,
+                            "capacity": truck_capacity,
+                            "seed": self.seed,
+                        }
+                        if num_fields > MAX_FIELDS.get(solver, num_fields):
+                            record["status"] = "skipped"
+                        else:
+                            record.update(
+                                self.__run_case(
+                                    solver, instance, num_trucks, truck_capacity
+                                )
+                            )
+                        records += [record]
+
+        columns = KEYS + [
+            "status",
+            "wall_time",
+            "peak_memory_mb",
+            "cost",
+            "trucks_used",
+            "gap",
+        ]
+        results = pd.DataFrame(records).reindex(columns=columns)
+        best = results.groupby(KEYS[1:])["cost"].transform("min")
+        results["gap"] = results["cost"] / best - 1
+        return results
+
+
+def save_results(results: pd.DataFrame, path: str) -> None:
+    """Writes benchmark results as JSON when the path ends in .json, or as a
+    semicolon separated CSV otherwise.
+
+    Args:
+        results (pd.DataFrame): Benchmark results.
+        path (str): Output path.
+    """
+    if path.endswith(".json"):
+        results.to_json(path, orient="records", indent=2)
+    else:
+        results.to_csv(path, sep=";", index=False)
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """Reads benchmark results written by `save_results`.
+
+    Args:
+        path (str): Path of the results.
+
+    Returns:
+        pd.DataFrame: Benchmark results.
+    """
+    if path.endswith(".json"):
+        return pd.read_json(path, orient="records")
+    return pd.read_csv(path, sep=";")
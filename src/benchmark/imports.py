@@ -0,0 +1,104 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import List
+
+import pandas as pd
+
+HEAVY_MODULES = ("pandas", "requests", "dotenv")
+STATEMENTS = [
+    "import src.utils",
+    "import src.global_search",
+    "import src.partition_search",
+    "import src.annealing_search",
+    "import src.decomposition_search",
+    "from src.utils import DistanceMatrix",
+]
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def _time_import(statement: str, preload: str = "") -> pd.Series:
+    """Times a statement in a fresh interpreter.
+
+    Args:
+        statement (str): Import statement.
+        preload (str, optional): Imports run before the clock starts. Defaults to
+            "".
+
+    Returns:
+        pd.Series: Seconds spent by the statement and the heavy modules it left in
+        sys.modules.
+    """
+    code = (
+        f"{preload}\n"
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return pd.Series(
+        {"seconds": float(output[0]), "heavy": output[1] if len(output) > 1 else ""}
+    )
+
+
+def measure_imports(
+    statements: List[str] = STATEMENTS, repeat: int = 5
+) -> pd.DataFrame:
+    """Measures the startup cost of importing the solver modules.
+
+    Each statement runs `repeat` times in a fresh interpreter, and the fastest run
+    is kept. The "eager" column times the same statement after pandas, requests and
+    python-dotenv are imported, which is what every start used to pay, plus the
+    time of those imports themselves.
+
+    Args:
+        statements (List[str], optional): Import statements. Defaults to
+            STATEMENTS.
+        repeat (int, optional): Runs per statement. Defaults to 5.
+
+    Returns:
+        pd.DataFrame: Lazy and eager seconds and heavy modules of each statement.
+    """
+    preload = "import " + ", ".join(HEAVY_MODULES)
+    eager_base = min(_time_import(preload)["seconds"] for _ in range(repeat))
+    records = []
+    for statement in statements:
+        runs = [_time_import(statement) for _ in range(repeat)]
+        lazy = min(runs, key=lambda run: run["seconds"])
+        eager = min(
+            _time_import(statement, preload=preload)["seconds"] for _ in range(repeat)
+        )
+        records += [
+            {
+                "statement": statement,
+                "lazy_seconds": lazy["seconds"],
+                "eager_seconds": eager + eager_base,
+                "heavy_modules": lazy["heavy"],
+            }
+        ]
+    return pd.DataFrame(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m src.benchmark.imports",
+        description="Measures the import time of the solver modules.",
+    )
+    parser.add_argument("statements", nargs="*", default=STATEMENTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = measure_imports(args.statements, repeat=args.repeat)
+    results["speedup"] = results["eager_seconds"] / results["lazy_seconds"]
+    with pd.option_context("display.width", 200):
+        print(results.to_string(index=False, float_format="{:.4f}".format))
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from .harness import KEYS
+
+
+def compare_results(
+    results: pd.DataFrame,
+    baseline: pd.DataFrame,
+    time_tolerance: float = 0.25,
+    memory_tolerance: float = 0.25,
+    cost_tolerance: float = 1e-6,
+    min_time: float = 0.05,
+) -> pd.DataFrame:
+    """Compares benchmark results with a stored baseline, case by case.
+
+    A case regresses when it no longer finishes, when its cost grows by more than
+    `cost_tolerance`, or when its wall time or peak memory grow by more than their
+    tolerances. Time differences below `min_time` seconds are treated as noise.
+
+    Args:
+        results (pd.DataFrame): Results of the current run.
+        baseline (pd.DataFrame): Results of the baseline run.
+        time_tolerance (float, optional): Allowed relative increase of the wall
+            time. Defaults to 0.25.
+        memory_tolerance (float, optional): Allowed relative increase of the peak
+            memory. Defaults to 0.25.
+        cost_tolerance (float, optional): Allowed relative increase of the cost.
+            Defaults to 1e-6.
+        min_time (float, optional): Smallest wall time increase, in seconds,
+            reported as a regression. Defaults to 0.05.
+
+    Returns:
+        pd.DataFrame: Cases found in both runs, with the baseline measurements in
+        "baseline_" columns, the relative changes and a "regression" column that
+        names what regressed.
+    """
+    columns = KEYS + ["status", "wall_time", "peak_memory_mb", "cost"]
+    merged = results[columns].merge(
+        baseline[columns].add_prefix("baseline_"),
+        left_on=KEYS,
+        right_on=[f"baseline_{key}" for key in KEYS],
+    )
+    merged = merged.drop(columns=[f"baseline_{key}" for key in KEYS])
+
+    merged["time_change"] = merged["wall_time"] / merged["baseline_wall_time"] - 1
+    merged["memory_change"] = (
+        merged["peak_memory_mb"] / merged["baseline_peak_memory_mb"] - 1
+    )
+    merged["cost_change"] = merged["cost"] / merged["baseline_cost"] - 1
+
+    finished = merged["baseline_status"] == "ok"
+    checks = {
+        "status": finished & (merged["status"] != "ok"),
+        "time": finished
+        & (merged["time_change"] > time_tolerance)
+        & (merged["wall_time"] - merged["baseline_wall_time"] > min_time),
+        "memory": finished & (merged["memory_change"] > memory_tolerance),
+        "cost": finished & (merged["cost_change"] > cost_tolerance),
+    }
+    merged["regression"] = ""
+    for name, failed in checks.items():
+        merged.loc[failed, "regression"] += name + " "
+    merged["regression"] = merged["regression"].str.strip()
+    return merged
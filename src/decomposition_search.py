@@ -0,0 +1,473 @@
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.local_search import LocalSearch
+from src.partition_search import PartitionSolver
+from src.savings_search import SavingsSolver
+from src.utils import (
+    Problem,
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+KMEANS_ITERATIONS = 10
+LEFTOVER_LOAD = 0.9
+
+
+@dataclass
+class DecompositionSolver:
+    """Cluster-first, route-second solver for instances too large for the exact
+    solvers.
+
+    Oil fields are grouped into clusters of at most `cluster_size` fields, whose
+    production is capped at the whole number of trucks that `cluster_size` average
+    fields fill. The clusters are formed either by sweeping the fields by angle
+    around the depot or by a capacity constrained k-means on their coordinates.
+    Each cluster is solved on its own, exactly with `exact_solver` when it has up
+    to `exact_size` fields and with `heuristic_solver` otherwise, in a pool of
+    `workers` processes. `exact_options` and `heuristic_options` hold the fields of
+    each solver, plus the keyword arguments of its `run` under the "run" key, such
+    as the time or node limit of GlobalSolver and MIPSolver. Clusters the exact
+    solver gives up on, at its limit, are solved again with `heuristic_solver`.
+
+    The routes are then stitched into one solution and repaired. Every cluster
+    tends to end with a partly loaded truck, so the fields of the routes loaded
+    below LEFTOVER_LOAD of the capacity are clustered and solved again while that
+    lowers their cost, and LocalSearch then moves oil fields across the cluster
+    borders. If the clusters need more trucks than are available, the whole
+    instance is solved with `heuristic_solver` instead.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    optimal_solution: Solution
+    dist_matrix: pd.DataFrame = None
+    method: str = "sweep"
+    cluster_size: int = 12
+    exact_size: int = 12
+    exact_solver: type = PartitionSolver
+    heuristic_solver: type = SavingsSolver
+    exact_options: Dict = field(default_factory=dict)
+    heuristic_options: Dict = field(default_factory=dict)
+    workers: int = 1
+    repair: bool = True
+    profile: Profile = field(default_factory=Profile)
+    clusters: List[List[str]] = field(default_factory=list, init=False)
+
+    def __coordinates(self, problem: Problem) -> np.ndarray:
+        """Projects the locations on a plane centered on the depot.
+
+        Args:
+            problem (Problem): Compiled problem.
+
+        Returns:
+            np.ndarray: (x, y) of each location id, in degrees of latitude.
+        """
+        latitude = self.locations_info["Latitude"].to_numpy(dtype=np.float64)
+        longitude = self.locations_info["Longitude"].to_numpy(dtype=np.float64)
+        depot = problem.depot
+        x = (longitude - longitude[depot]) * math.cos(math.radians(latitude[depot]))
+        y = latitude - latitude[depot]
+        return np.column_stack((x, y))
+
+    def __sweep(
+        self,
+        problem: Problem,
+        fields: np.ndarray,
+        coordinates: np.ndarray,
+        max_load: float,
+    ) -> List[np.ndarray]:
+        """Groups the oil fields by their angle around the depot.
+
+        The sweep starts after the widest angular gap between two oil fields, and
+        a cluster is closed when the next field would exceed its size or load.
+
+        Args:
+            problem (Problem): Compiled problem.
+            fields (np.ndarray): Oil field ids to be grouped.
+            coordinates (np.ndarray): (x, y) of each location id.
+            max_load (float): Largest production of a cluster (bbl).
+
+        Returns:
+            List[np.ndarray]: Oil field ids of each cluster.
+        """
+        angles = np.arctan2(coordinates[fields, 1], coordinates[fields, 0])
+        order = np.argsort(angles, kind="stable")
+        gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * np.pi))
+        order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+        clusters, cluster, load = [], [], 0.0
+        for f in fields[order].tolist():
+            production = problem.production[f]
+            if cluster and (
+                len(cluster) == self.cluster_size or load + production > max_load
+            ):
+                clusters += [np.array(cluster)]
+                cluster, load = [], 0.0
+            cluster += [f]
+            load += production
+        if cluster:
+            clusters += [np.array(cluster)]
+        return clusters
+
+    def __kmeans(
+        self,
+        problem: Problem,
+        fields: np.ndarray,
+        coordinates: np.ndarray,
+        max_load: float,
+    ) -> List[np.ndarray]:
+        """Groups the oil fields with a capacity constrained k-means.
+
+        Centers start at the centroids of the sweep clusters. In each iteration the
+        oil fields with the most to lose from not getting their nearest center pick
+        first, and take the nearest center that still has room for them.
+
+        Args:
+            problem (Problem): Compiled problem.
+            fields (np.ndarray): Oil field ids to be grouped.
+            coordinates (np.ndarray): (x, y) of each location id.
+            max_load (float): Largest production of a cluster (bbl).
+
+        Returns:
+            List[np.ndarray]: Oil field ids of each cluster.
+        """
+        points = coordinates[fields]
+        production = problem.production[fields]
+        clusters = self.__sweep(problem, fields, coordinates, max_load)
+        centers = np.array([coordinates[c].mean(axis=0) for c in clusters])
+
+        labels = np.zeros(len(fields), dtype=int)
+        for _ in range(KMEANS_ITERATIONS):
+            distances = np.linalg.norm(points[:, None] - centers[None, :], axis=2)
+            preferences = np.argsort(distances, axis=1)
+            ranked = np.take_along_axis(distances, preferences[:, :2], axis=1)
+            regret = ranked[:, -1] - ranked[:, 0]
+
+            sizes = np.zeros(len(centers), dtype=int)
+            loads = np.zeros(len(centers))
+            previous = labels.copy()
+            for i in np.argsort(-regret, kind="stable").tolist():
+                fits = [
+                    c
+                    for c in preferences[i].tolist()
+                    if sizes[c] < self.cluster_size
+                    and loads[c] + production[i] <= max_load
+                ]
+                c = fits[0] if fits else int(np.argmin(sizes))
+                labels[i] = c
+                sizes[c] += 1
+                loads[c] += production[i]
+
+            for c in np.flatnonzero(sizes):
+                centers[c] = points[labels == c].mean(axis=0)
+            if np.array_equal(labels, previous):
+                break
+        return [fields[labels == c] for c in range(len(centers)) if np.any(labels == c)]
+
+    def __cluster(
+        self, problem: Problem, fields: np.ndarray, capacity: float
+    ) -> List[np.ndarray]:
+        """Groups oil fields with the configured method.
+
+        Args:
+            problem (Problem): Compiled problem.
+            fields (np.ndarray): Oil field ids to be grouped.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            List[np.ndarray]: Oil field ids of each cluster.
+        """
+        if self.method not in ("sweep", "kmeans"):
+            raise ValueError(f"Unknown clustering method: {self.method}")
+        if not len(fields):
+            return []
+
+        mean_production = problem.production[fields].mean()
+        trucks_per_cluster = max(
+            1, round(self.cluster_size * mean_production / capacity)
+        )
+        max_load = max(trucks_per_cluster * capacity, problem.production[fields].max())
+        coordinates = self.__coordinates(problem)
+        if self.method == "sweep":
+            return self.__sweep(problem, fields, coordinates, max_load)
+        return self.__kmeans(problem, fields, coordinates, max_load)
+
+    def __solve_clusters(
+        self,
+        problem: Problem,
+        clusters: List[np.ndarray],
+        truck_capacity: float,
+        capacity: float,
+        executor: ProcessPoolExecutor = None,
+    ) -> List[List[List[int]]]:
+        """Solves every cluster as an instance of its own.
+
+        A cluster gets one truck more than its production needs, so the sub-solver
+        still has room when the production does not pack tightly. The clusters
+        without a solution are solved again by `heuristic_solver`, with a truck for
+        each oil field.
+
+        Args:
+            problem (Problem): Compiled problem.
+            clusters (List[np.ndarray]): Oil field ids of each cluster.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+            capacity (float): Truck capacity (bbl).
+            executor (ProcessPoolExecutor, optional): Pool of worker processes, or
+                None to solve the clusters in this process. Defaults to None.
+
+        Returns:
+            List[List[List[int]]]: Routes of each cluster, with the location ids of
+            the whole problem, or None for the clusters without a solution.
+        """
+        tasks = []
+        for cluster in clusters:
+            ids = np.append(cluster, problem.depot)
+            names = [problem.names[i] for i in ids]
+            load = problem.production[cluster].sum()
+            exact = len(cluster) <= self.exact_size
+            tasks += [
+                (
+                    self.cost_matrix.loc[names, names],
+                    self.locations_info.iloc[ids],
+                    None
+                    if self.dist_matrix is None
+                    else self.dist_matrix.loc[names, names],
+                    min(len(cluster), math.ceil(load / capacity - 1e-9) + 1),
+                    truck_capacity,
+                    self.exact_solver if exact else self.heuristic_solver,
+                    self.exact_options if exact else self.heuristic_options,
+                )
+            ]
+
+        if executor is not None and len(tasks) > 1:
+            chunksize = max(1, len(tasks) // (4 * self.workers))
+            results = list(
+                executor.map(_solve_cluster, *zip(*tasks), chunksize=chunksize)
+            )
+        else:
+            results = [_solve_cluster(*task) for task in tasks]
+
+        for k, (cost_matrix, info, dist_matrix, *_, solver, _) in enumerate(tasks):
+            if results[k] is None and solver is not self.heuristic_solver:
+                results[k] = _solve_cluster(
+                    cost_matrix,
+                    info,
+                    dist_matrix,
+                    len(clusters[k]),
+                    truck_capacity,
+                    self.heuristic_solver,
+                    self.heuristic_options,
+                )
+
+        return [
+            None
+            if routes is None
+            else [cluster_ids[route].tolist() for route in routes]
+            for cluster_ids, routes in zip(
+                (np.append(c, problem.depot) for c in clusters), results
+            )
+        ]
+
+    def __merge_leftovers(
+        self,
+        problem: Problem,
+        routes: List[List[int]],
+        truck_capacity: float,
+        capacity: float,
+        executor: ProcessPoolExecutor = None,
+    ) -> List[List[int]]:
+        """Clusters and solves again the oil fields of the partly loaded routes,
+        while that lowers their cost.
+
+        Args:
+            problem (Problem): Compiled problem.
+            routes (List[List[int]]): Routes of the stitched solution.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+            capacity (float): Truck capacity (bbl).
+            executor (ProcessPoolExecutor, optional): Pool of worker processes, or
+                None to solve the clusters in this process. Defaults to None.
+
+        Returns:
+            List[List[int]]: Routes with the leftovers merged.
+        """
+        while True:
+            loads = [problem.production[route].sum() for route in routes]
+            leftovers = [load < LEFTOVER_LOAD * capacity for load in loads]
+            if sum(leftovers) < 2:
+                return routes
+
+            kept = [r for r, leftover in zip(routes, leftovers) if not leftover]
+            pooled = [r for r, leftover in zip(routes, leftovers) if leftover]
+            fields = np.array([f for route in pooled for f in route])
+            clusters = self.__cluster(problem, fields, capacity)
+            results = self.__solve_clusters(
+                problem, clusters, truck_capacity, capacity, executor
+            )
+            if any(merged is None for merged in results):
+                return routes
+
+            merged = [route for cluster in results for route in cluster]
+            before = sum(problem.fixed_cost + problem.route_cost(r) for r in pooled)
+            after = sum(problem.fixed_cost + problem.route_cost(r) for r in merged)
+            if after >= before - 1e-9:
+                return routes
+            routes = kept + merged
+
+    def run(self, num_trucks: int, truck_capacity: float) -> None:
+        """Runs the solver.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+        """
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+            capacity = liter_to_bbl(volume=truck_capacity)
+        with self.profile.phase("clustering"):
+            clusters = self.__cluster(problem, problem.fields, capacity)
+            self.clusters = [[problem.names[f] for f in c] for c in clusters]
+
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            with self.profile.phase("search"):
+                results = self.__solve_clusters(
+                    problem, clusters, truck_capacity, capacity, executor
+                )
+            if any(routes is None for routes in results):
+                self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+                return
+
+            routes = [route for cluster in results for route in cluster]
+            if self.repair:
+                with self.profile.phase("repair"):
+                    routes = self.__merge_leftovers(
+                        problem, routes, truck_capacity, capacity, executor
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if len(routes) > num_trucks:
+            with self.profile.phase("fallback"):
+                fallback = _solve_cluster(
+                    self.cost_matrix,
+                    self.locations_info,
+                    self.dist_matrix,
+                    num_trucks,
+                    truck_capacity,
+                    self.heuristic_solver,
+                    self.heuristic_options,
+                )
+            if fallback is None:
+                self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+                return
+            routes = [route.tolist() for route in fallback]
+        routes += [[] for _ in range(num_trucks - len(routes))]
+
+        with self.profile.phase("build_solution"):
+            solution = problem.build_solution(*giant_tour(routes), truck_capacity)
+        if self.repair:
+            with self.profile.phase("repair"):
+                solution = LocalSearch(
+                    cost_matrix=self.cost_matrix, locations_info=self.locations_info
+                ).improve(solution, truck_capacity)
+        self.optimal_solution.assign(solution)
+        self.profile.count(
+            clusters=len(clusters),
+            exact_clusters=sum(1 for c in clusters if len(c) <= self.exact_size),
+        )
+
+
+def _solve_cluster(
+    cost_matrix: pd.DataFrame,
+    locations_info: pd.DataFrame,
+    dist_matrix: pd.DataFrame,
+    num_trucks: int,
+    truck_capacity: float,
+    solver: type,
+    options: Dict,
+) -> List[np.ndarray]:
+    """Solves one cluster, in a worker process when the search runs in parallel.
+
+    Args:
+        cost_matrix (pd.DataFrame): Cost matrix of the cluster and the depot.
+        locations_info (pd.DataFrame): Locations of the cluster and the depot.
+        dist_matrix (pd.DataFrame): Distance matrix of the cluster and the depot,
+            or None.
+        num_trucks (int): Number of trucks available to the cluster.
+        truck_capacity (float): Total cargo capacity of the trucks.
+        solver (type): Solver class.
+        options (Dict): Solver fields, plus the keyword arguments of `run` under
+            the "run" key.
+
+    Returns:
+        List[np.ndarray]: Routes of the used trucks, with the positions of the
+        locations in `locations_info`, or None if the cluster has no solution.
+    """
+    options = dict(options)
+    run_options = options.pop("run", {})
+    instance = solver(
+        cost_matrix=cost_matrix,
+        locations_info=locations_info,
+        dist_matrix=dist_matrix,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        **options,
+    )
+    instance.run(num_trucks=num_trucks, truck_capacity=truck_capacity, **run_options)
+    if not np.isfinite(instance.optimal_solution.total_cost):
+        return None
+    return [route for route in instance.optimal_solution.routes if len(route)]
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = DecompositionSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        dist_matrix=distance_matrix.matrix,
+        workers=os.cpu_count(),
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
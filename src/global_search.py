@@ -1,188 +1,855 @@
+from __future__ import annotations
+
+import math
 import os
 import sys
 import time
-from copy import deepcopy
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import timedelta
-from typing import List, Tuple
+from multiprocessing import Value
+from multiprocessing.sharedctypes import Synchronized
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
 
 import numpy as np
-import pandas as pd
 from termcolor import colored
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 sys.path.insert(0, "../")
 
 from src.utils import (
-    DistanceMatrix,
-    Location,
-    OilField,
+    FleetBounds,
+    Profile,
     Solution,
-    Truck,
+    build_problem,
     distance_to_cost,
+    fleet_bounds,
     format_solution_output,
+    giant_tour,
     liter_to_bbl,
 )
 
+CHECK_INTERVAL = 1024
+
+Tour = Tuple[np.ndarray, np.ndarray]
+
 
 @dataclass
 class GlobalSolver:
+    """Exact depth-first branch and bound over the visiting order of each truck.
+
+    It supports time and node limits with a proven gap, warm starts, improving
+    solution callbacks and a parallel search over the top levels of the tree. The
+    bound proves optimality for about ten oil fields within seconds, but the
+    search still grows factorially with the fields and stops at its limits with a
+    gap from twelve fields on. Exact runs with 15 to 20 oil fields belong to
+    PartitionSolver, which solves each subset of fields once.
+    """
+
     cost_matrix: pd.DataFrame
     locations_info: pd.DataFrame
     optimal_solution: Solution
     dist_matrix: pd.DataFrame = None
+    branch_and_bound: bool = True
+    workers: int = 1
+    split_depth: int = 1
+    profile: Profile = field(default_factory=Profile)
+    pruned_nodes: int = field(default=0, init=False)
+    expanded_nodes: int = field(default=0, init=False)
+    leaf_nodes: int = field(default=0, init=False)
+    incumbent_updates: int = field(default=0, init=False)
+    max_depth: int = field(default=0, init=False)
+    lower_bound: float = field(default=np.inf, init=False)
+    gap: float = field(default=np.inf, init=False)
+    fleet: FleetBounds = field(default=None, init=False)
+
+    def __setup(self, truck_capacity: float) -> None:
+        """Compiles the problem and precomputes the data used by the search.
 
-    def __setup_locations(self) -> Tuple[List[OilField], Location]:
-        """Separates depot from oil fields and builds its support list.
+        Costs are kept as nested lists because the recursion reads them one at a
+        time, which is cheaper than indexing the NumPy array element by element.
+        Every unvisited oil field still has to leave towards some other location, so
+        the cheapest outgoing trip of each one is an admissible bound on the cost that
+        is yet to be committed. The trips that are left also connect the unvisited
+        fields to the depot, so a minimum spanning tree over them, with each pair
+        joined by its cheaper direction, bounds that cost too. Neither bound relies on
+        the triangle inequality, which road distances are not guaranteed to respect.
+
+        Args:
+            truck_capacity (float): Total truck capacity (Liters).
+        """
+        problem = build_problem(self.cost_matrix, self.locations_info)
+        costs = problem.costs.copy()
+        np.fill_diagonal(costs, np.inf)
+
+        self.__problem = problem
+        self.__costs = problem.costs.tolist()
+        self.__production = problem.production.tolist()
+        self.__capacity = liter_to_bbl(volume=truck_capacity)
+        self.__min_out = costs.min(axis=1).tolist()
+        self.__min_start = (
+            costs[problem.depot, problem.fields].min() if len(problem.fields) else 0.0
+        )
+        self.__neighbors = problem.neighbor_lists()
+        self.__edges = np.minimum(costs, costs.T)
+        self.__trees = {}
+
+    def __spanning_tree(self, unvisited: int) -> float:
+        """Calculates the minimum spanning tree over the depot and the unvisited
+        oil fields with Prim's algorithm. Trees are cached by the set of unvisited
+        fields, which many nodes of the search share.
+
+        Args:
+            unvisited (int): Bit mask of the unvisited oil fields, by location id.
 
         Returns:
-            Tuple[List[OilField], List[OffloadSite]]: List of OilField objects and Depot location.
-        """
-        oil_fields = []
-        field_count = 0
-        for i, name in enumerate(self.locations_info.index):
-            if self.locations_info["Depot"][i] == 0:
-                oil_fields += [
-                    OilField(
-                        idx=field_count,
-                        name=name,
-                        production=self.locations_info["Production"][i],
-                    )
-                ]
-                field_count += 1
-            else:
-                depot = Location(idx=0, name=name)
-        return (oil_fields, depot)
+            float: Cost of the spanning tree.
+        """
+        tree = self.__trees.get(unvisited)
+        if tree is not None:
+            return tree
+
+        nodes = [self.__problem.depot]
+        nodes += [f for f in self.__problem.fields.tolist() if unvisited >> f & 1]
+        edges = self.__edges[np.ix_(nodes, nodes)]
+        distances = edges[0].copy()
+        in_tree = np.zeros(len(nodes), dtype=bool)
+        in_tree[0] = True
+        tree = 0.0
+        for _ in range(len(nodes) - 1):
+            distances[in_tree] = np.inf
+            k = int(distances.argmin())
+            tree += distances[k]
+            in_tree[k] = True
+            np.minimum(distances, edges[k], out=distances)
+        self.__trees[unvisited] = tree
+        return tree
 
-    def __calculate_total_cost(self, trucks: List[Truck]) -> float:
+    def __lower_bound(
+        self,
+        last: int,
+        capacity: float,
+        trucks_left: int,
+        committed: float,
+        remaining: float,
+        pending: float,
+        unvisited: int,
+    ) -> float:
+        """Calculates an admissible lower bound for a partial solution.
+
+        Besides the trip out of `last`, the trips that are left leave every
+        unvisited oil field once and link all of them to the depot, so their cost is
+        at least the larger of `remaining` and the spanning tree over them. Each
+        extra truck adds one trip out of the depot on top of that.
+
+        Args:
+            last (int): Oil field that was just visited.
+            capacity (float): Remaining capacity of the truck that visited it.
+            trucks_left (int): Number of trucks that can still be opened.
+            committed (float): Fixed and variable costs of the trucks in use.
+            remaining (float): Sum of the cheapest outgoing trip of the unvisited fields.
+            pending (float): Production of the unvisited fields.
+            unvisited (int): Bit mask of the unvisited oil fields, by location id.
+
+        Returns:
+            float: Lower bound on the cost of any solution that extends this one.
+        """
+        bound = (
+            committed
+            + max(remaining, self.__spanning_tree(unvisited))
+            + self.__min_out[last]
+            - self.__costs[last][self.__problem.depot]
+        )
+        missing = pending - capacity
+        if missing > 0:
+            extra_trucks = math.ceil(missing / self.__capacity - 1e-9)
+            if extra_trucks > trucks_left:
+                return np.inf
+            bound += extra_trucks * (self.__problem.fixed_cost + self.__min_start)
+        return bound
+
+    def __calculate_total_cost(
+        self, routes: List[List[int]], var_costs: List[float]
+    ) -> float:
         """Calculates the total cost of a solution.
 
         Args:
-            trucks (List[Truck]): List of trucks.
+            routes (List[List[int]]): Oil fields visited by each truck.
+            var_costs (List[float]): Variable cost of each truck.
 
         Returns:
             float: Total cost of the solution.
         """
-        return sum(map(lambda x: x.fixed_cost + x.var_cost if x.route else 0.0, trucks))
+        return sum(
+            self.__problem.fixed_cost + cost
+            for route, cost in zip(routes, var_costs)
+            if route
+        )
 
-    def __setup_trucks(
-        self, num_trucks: int, truck_capacity: float, depot: Location
-    ) -> List[Truck]:
-        """Builds a list of N trucks that will pickup oil at the oil fields and deliver it
-        at offload sites.
+    def __assign(
+        self,
+        routes: List[List[int]],
+        capacities: List[float],
+        var_costs: List[float],
+        truck: int,
+        oil_field: int,
+    ) -> float:
+        """Appends an oil field to the end of a truck's route.
 
         Args:
-            num_trucks (int): Number of trucks available.
-            truck_capacity (float): Total truck capacity (Liters).
-            depot (Location): Depot location object.
+            routes (List[List[int]]): Oil fields visited by each truck.
+            capacities (List[float]): Remaining capacity of each truck.
+            var_costs (List[float]): Variable cost of each truck.
+            truck (int): Truck that receives the oil field.
+            oil_field (int): Oil field to be visited.
 
         Returns:
-            List[Truck]: List of Truck objects
-        """
-        capacity = liter_to_bbl(volume=truck_capacity)
-        trucks = []
-        for i in range(num_trucks):
-            trucks += [
-                Truck(
-                    idx=i,
-                    route=[],
-                    fixed_cost=300,
-                    var_cost=0,
-                    capacity=capacity,
-                    start=depot,
-                    end=depot,
-                )
-            ]
-        return trucks
+            float: Increase in the total cost of the solution.
+        """
+        route = routes[truck]
+        depot = self.__problem.depot
+        last = route[-1] if route else depot
+        added_cost = self.__costs[last][oil_field] + self.__costs[oil_field][depot]
+        if route:
+            added_cost -= self.__costs[last][depot]
+            var_costs[truck] += added_cost
+        else:
+            var_costs[truck] = added_cost
+            added_cost += self.__problem.fixed_cost
+        route.append(oil_field)
+        capacities[truck] -= self.__production[oil_field]
+        return added_cost
+
+    def __unassign(
+        self,
+        routes: List[List[int]],
+        capacities: List[float],
+        var_costs: List[float],
+        truck: int,
+    ) -> None:
+        """Removes the last oil field of a truck's route.
+
+        Args:
+            routes (List[List[int]]): Oil fields visited by each truck.
+            capacities (List[float]): Remaining capacity of each truck.
+            var_costs (List[float]): Variable cost of each truck.
+            truck (int): Truck whose last visit is undone.
+        """
+        route = routes[truck]
+        depot = self.__problem.depot
+        oil_field = route.pop()
+        capacities[truck] += self.__production[oil_field]
+        if route:
+            last = route[-1]
+            var_costs[truck] -= (
+                self.__costs[last][oil_field]
+                + self.__costs[oil_field][depot]
+                - self.__costs[last][depot]
+            )
+        else:
+            var_costs[truck] = 0
+
+    def __best_known_cost(self, optimal_cost: float) -> float:
+        """Returns the cost used to prune the search, which is the best one found by
+        any worker when the search runs in parallel.
+
+        Args:
+            optimal_cost (float): Cost of the best solution found by this search.
+
+        Returns:
+            float: Cost of the best solution known.
+        """
+        if self.__incumbent is None:
+            return optimal_cost
+        return min(optimal_cost, self.__incumbent.value)
+
+    def __publish(self, cost: float) -> None:
+        """Shares a new incumbent cost with the other workers.
+
+        Args:
+            cost (float): Cost of the improving solution.
+        """
+        if self.__incumbent is None:
+            return
+        with self.__incumbent.get_lock():
+            if cost < self.__incumbent.value:
+                self.__incumbent.value = cost
+
+    def __exhausted(self) -> bool:
+        """Counts a node expansion against the search budget.
+
+        The clock and the node count shared with the other workers are only read
+        every CHECK_INTERVAL expansions.
+
+        Returns:
+            bool: Whether the budget ran out, in which case the node is left
+            unexplored.
+        """
+        if self.__stopped:
+            return True
+        if self.expanded_nodes % CHECK_INTERVAL == 0:
+            if self.__deadline is not None and time.time() >= self.__deadline:
+                self.__stopped = True
+            self.__sync_nodes()
+        if (
+            self.__node_limit is not None
+            and self.expanded_nodes + self.__other_nodes >= self.__node_limit
+        ):
+            self.__stopped = True
+        if not self.__stopped:
+            self.expanded_nodes += 1
+        return self.__stopped
+
+    def __sync_nodes(self) -> None:
+        """Adds the nodes expanded since the last call to the count shared by the
+        workers of the parallel search, and reads the nodes expanded by the others.
+        """
+        if self.__nodes is None:
+            return
+        with self.__nodes.get_lock():
+            self.__nodes.value += self.expanded_nodes - self.__synced_nodes
+            self.__other_nodes = self.__nodes.value - self.expanded_nodes
+        self.__synced_nodes = self.expanded_nodes
+
+    def __report(self, solution: Tour, cost: float) -> None:
+        """Hands an improving solution to the callback.
+
+        Args:
+            solution (Tour): Giant tour and route offsets of the solution.
+            cost (float): Total cost of the solution.
+        """
+        if self.__callback is None:
+            return
+        self.__callback(
+            self.__problem.build_solution(
+                *self.__pad(solution), self.__truck_capacity, cost
+            )
+        )
+
+    def __pad(self, solution: Tour) -> Tour:
+        """Adds back the idle trucks that were left out of the search.
+
+        Args:
+            solution (Tour): Giant tour and route offsets of a solution.
+
+        Returns:
+            Tour: Same routes with one entry per available truck.
+        """
+        tour, offsets = solution
+        idle = self.__num_trucks + 1 - len(offsets)
+        if idle <= 0:
+            return solution
+        return tour, np.concatenate((offsets, np.full(idle, offsets[-1])))
+
+    def __warm_start(self, solution: Solution, num_trucks: int) -> Tuple[Tour, float]:
+        """Converts a solution found by another solver into the initial incumbent.
+        A warm start with infinite cost, such as the answer of a heuristic that
+        failed, or one that does not fit the trucks is ignored.
+
+        Args:
+            solution (Solution): Solution whose routes visit every oil field.
+            num_trucks (int): Number of available trucks.
+
+        Returns:
+            Tuple[Tour, float]: Giant tour and route offsets of the solution, and its
+            total cost, or an empty tour and infinite cost when it is ignored.
+        """
+        ignored = giant_tour([]), np.inf
+        if not np.isfinite(solution.total_cost):
+            return ignored
+        problem = self.__problem
+        ids = {name: i for i, name in enumerate(problem.names)}
+        trucks = [t for t in solution.trucks if t.route]
+        if any(f.name not in ids for t in trucks for f in t.route):
+            return ignored
+        routes = [[ids[f.name] for f in t.route] for t in trucks]
+        visited = sorted(f for route in routes for f in route)
+        if len(routes) > num_trucks or visited != sorted(problem.fields.tolist()):
+            return ignored
+        for route in routes:
+            if sum(self.__production[f] for f in route) > self.__capacity + 1e-9:
+                return ignored
+
+        routes += [[] for _ in range(num_trucks - len(routes))]
+        total_cost = sum(
+            problem.fixed_cost + problem.route_cost(route) for route in routes if route
+        )
+        return giant_tour(routes), total_cost
 
     def __solve(
         self,
-        visited: List[OilField],
-        trucks: List[Truck],
-        oil_fields: List[OilField],
-        solution: List[Truck],
-        optimal_cost: int,
-    ) -> Tuple[List[Truck], float]:
+        visited: List[bool],
+        routes: List[List[int]],
+        capacities: List[float],
+        var_costs: List[float],
+        solution: Tour,
+        optimal_cost: float,
+        depth: int = 0,
+        current: int = 0,
+        committed: float = 0.0,
+        remaining: float = 0.0,
+        pending: float = 0.0,
+        unvisited: int = 0,
+    ) -> Tuple[Tour, float]:
         """Algorithm that solves the VRP.
 
+        Trucks are filled in order: once a field is given to a truck, the trucks
+        before it are closed. This enumerates every solution exactly once instead of
+        once per interleaving of the trucks' routes. Idle trucks are identical, so
+        only the first of them can be opened. When branch and bound is on, a
+        partial solution is pruned as soon as its lower bound reaches the incumbent.
+        Once the search budget runs out, the remaining children are only bounded,
+        and the smallest of those bounds is kept to prove the gap of the incumbent.
+        An improving leaf is copied once into a giant tour, which the callers share
+        instead of copying the routes again at every level.
+
         Args:
-            visited (List[OilField]): List of visited oil fields.
-            offloaded (List[Truck]): List of trucks that already offloaded their cargo.
-            trucks (List[Truck]): List of trucks.
-            oil_fields (List[OilField]): List of oil fields.
-            solution: (List[Truck]): Object containing list of trucks of the best solution.
+            visited (List[bool]): Whether each location was already visited.
+            routes (List[List[int]]): Oil fields visited by each truck.
+            capacities (List[float]): Remaining capacity of each truck.
+            var_costs (List[float]): Variable cost of each truck.
+            solution: (Tour): Giant tour and route offsets of the best solution.
             optimal_cost: (float): Cost of best solution.
+            depth (int): Number of visited oil fields.
+            current (int): Index of the first truck that can still receive oil fields.
+            committed (float): Fixed and variable costs of the trucks in use.
+            remaining (float): Sum of the cheapest outgoing trip of the unvisited fields.
+            pending (float): Production of the unvisited fields.
+            unvisited (int): Bit mask of the unvisited oil fields, by location id.
 
         Returns:
-            Solution: Object containing best routes and total cost.
+            Tuple[Tour, float]: Giant tour and route offsets of the best solution,
+            and its cost.
         """
-        if len(visited) == len(oil_fields):
-            total_cost = self.__calculate_total_cost(trucks)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        num_fields = len(self.__problem.fields)
+        if depth == num_fields:
+            total_cost = self.__calculate_total_cost(routes, var_costs)
 
+            self.leaf_nodes += 1
             if total_cost < optimal_cost:
-                optimal_cost = total_cost
-            return trucks, optimal_cost
-
-        for t in trucks:
-            for f in oil_fields:
-                if f not in visited:
-                    if t.capacity - f.production >= 0:
-                        visited += [f]
-                        if len(t.route) == 0:
-                            t.var_cost += self.cost_matrix[t.start.name][f.idx]
-                            t.var_cost += self.cost_matrix[f.name][t.end.idx]
-                        else:
-                            t.var_cost -= self.cost_matrix[t.route[-1].name][t.end.idx]
-                            t.var_cost += self.cost_matrix[t.route[-1].name][f.idx]
-                            t.var_cost += self.cost_matrix[f.name][t.end.idx]
-                        t.route += [f]
-                        t.capacity -= f.production
-                        ret_trucks, ret_cost = self.__solve(
-                            visited=visited,
-                            trucks=trucks,
-                            oil_fields=oil_fields,
-                            solution=solution,
-                            optimal_cost=optimal_cost,
-                        )
-                        visited.pop()
-                        if ret_cost < optimal_cost:
-                            solution = deepcopy(ret_trucks)
-                            optimal_cost = ret_cost
-                        if len(t.route) == 1:
-                            t.var_cost = 0
-                            t.total_cargo = 0
-                        else:
-                            t.var_cost += self.cost_matrix[t.route[-2].name][t.end.idx]
-                            t.var_cost -= self.cost_matrix[t.route[-2].name][f.idx]
-                            t.var_cost -= self.cost_matrix[f.name][t.end.idx]
-                        t.capacity += f.production
-                        t.route.pop()
+                self.incumbent_updates += 1
+                solution, optimal_cost = giant_tour(routes), total_cost
+                self.__publish(total_cost)
+                self.__report(solution, total_cost)
+            return solution, optimal_cost
+
+        last_truck = min(current + 1 if routes[current] else current, len(routes) - 1)
+        for i in range(current, last_truck + 1):
+            last = routes[i][-1] if routes[i] else self.__problem.depot
+            for f in self.__neighbors[last]:
+                if visited[f] or capacities[i] - self.__production[f] < 0:
+                    continue
+
+                visited[f] = True
+                added_cost = self.__assign(routes, capacities, var_costs, i, f)
+                child_remaining = remaining - self.__min_out[f]
+                child_pending = pending - self.__production[f]
+                child_unvisited = unvisited & ~(1 << f)
+                if depth + 1 == num_fields:
+                    bound = committed + added_cost
+                else:
+                    bound = self.__lower_bound(
+                        last=f,
+                        capacity=capacities[i],
+                        trucks_left=len(routes) - i - 1,
+                        committed=committed + added_cost,
+                        remaining=child_remaining,
+                        pending=child_pending,
+                        unvisited=child_unvisited,
+                    )
+
+                if self.branch_and_bound and bound >= self.__best_known_cost(
+                    optimal_cost
+                ):
+                    self.pruned_nodes += 1
+                elif self.__exhausted():
+                    self.__open_bound = min(self.__open_bound, bound)
+                else:
+                    ret_solution, ret_cost = self.__solve(
+                        visited=visited,
+                        routes=routes,
+                        capacities=capacities,
+                        var_costs=var_costs,
+                        solution=solution,
+                        optimal_cost=optimal_cost,
+                        depth=depth + 1,
+                        current=i,
+                        committed=committed + added_cost,
+                        remaining=child_remaining,
+                        pending=child_pending,
+                        unvisited=child_unvisited,
+                    )
+                    if ret_cost < optimal_cost:
+                        solution, optimal_cost = ret_solution, ret_cost
+
+                visited[f] = False
+                self.__unassign(routes, capacities, var_costs, i)
         return solution, optimal_cost
 
-    def run(self, num_trucks: int, truck_capacity: float) -> None:
-        """Runs the solver.
+    def __split(
+        self,
+        num_trucks: int,
+        depth: int,
+        prefix: Tuple[Tuple[int, int], ...] = (),
+    ) -> List[Tuple[Tuple[int, int], ...]]:
+        """Splits the top levels of the search tree into independent subtrees.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            depth (int): Number of levels to split.
+            prefix (Tuple[Tuple[int, int], ...]): (truck, oil field) assignments
+                that lead to the current subtree.
+
+        Returns:
+            List[Tuple[Tuple[int, int], ...]]: Assignments that lead to each subtree.
+        """
+        if depth == 0 or len(prefix) == len(self.__problem.fields):
+            return [prefix]
+
+        visited = [f for _, f in prefix]
+        current = prefix[-1][0] if prefix else 0
+        last_truck = min(current + 1 if prefix else current, num_trucks - 1)
+        prefixes = []
+        for i in range(current, last_truck + 1):
+            # Same arithmetic as __assign, so both searches accept the same fields
+            capacity = self.__capacity
+            for t, f in prefix:
+                if t == i:
+                    capacity -= self.__production[f]
+            for f in self.__problem.fields.tolist():
+                if f in visited or capacity - self.__production[f] < 0:
+                    continue
+                prefixes += self.__split(
+                    num_trucks=num_trucks,
+                    depth=depth - 1,
+                    prefix=prefix + ((i, f),),
+                )
+        return prefixes
+
+    def __start_search(self, nodes: Synchronized = None) -> None:
+        """Resets the counters and the budget state of a search.
+
+        Args:
+            nodes (Synchronized, optional): Node count shared by the workers of the
+                parallel search. Defaults to None.
+        """
+        self.pruned_nodes = 0
+        self.expanded_nodes = 0
+        self.leaf_nodes = 0
+        self.incumbent_updates = 0
+        self.max_depth = 0
+        self.__nodes = nodes
+        self.__synced_nodes = 0
+        self.__other_nodes = 0
+        self.__stopped = False
+        self.__open_bound = np.inf
+
+    @property
+    def prune_rate(self) -> float:
+        """Returns the share of the generated nodes that were pruned."""
+        generated = self.pruned_nodes + self.expanded_nodes
+        return self.pruned_nodes / generated if generated else 0.0
+
+    def search_stats(self) -> Dict[str, float]:
+        """Returns the counters of the last search.
+
+        Returns:
+            Dict[str, float]: Expanded, leaf and pruned nodes, incumbent updates,
+            prune rate and max depth.
+        """
+        return {
+            "expanded_nodes": self.expanded_nodes,
+            "leaf_nodes": self.leaf_nodes,
+            "pruned_nodes": self.pruned_nodes,
+            "incumbent_updates": self.incumbent_updates,
+            "prune_rate": self.prune_rate,
+            "max_depth": self.max_depth,
+        }
+
+    def solve_subtree(
+        self,
+        num_trucks: int,
+        truck_capacity: float,
+        prefix: Tuple[Tuple[int, int], ...],
+    ) -> Tuple[Tour, float, Dict[str, float], float]:
+        """Solves the part of the search tree that starts with the given assignments.
+        Used by the workers of the parallel search.
 
         Args:
             num_trucks (int): Number of available trucks.
             truck_capacity (float): Total cargo capacity of the trucks.
+            prefix (Tuple[Tuple[int, int], ...]): (truck, oil field) assignments
+                that lead to the subtree.
+
+        Returns:
+            Tuple[Tour, float, Dict[str, float], float]: Giant tour and route
+            offsets of the best solution found in the subtree, its total cost, the
+            search counters and the lower bound of the part left unexplored when
+            the budget ran out.
         """
-        oil_fields, depot = self.__setup_locations()
-        trucks = self.__setup_trucks(
-            num_trucks=num_trucks,
-            truck_capacity=truck_capacity,
-            depot=depot,
-        )
+        self.__setup(truck_capacity=truck_capacity)
+        self.__incumbent = _incumbent
+        self.__start_search(nodes=_nodes)
+
+        problem = self.__problem
+        visited = [False] * len(problem.names)
+        routes = [[] for _ in range(num_trucks)]
+        capacities = [self.__capacity] * num_trucks
+        var_costs = [0.0] * num_trucks
+        committed = 0.0
+        remaining = sum(self.__min_out[f] for f in problem.fields)
+        pending = sum(self.__production[f] for f in problem.fields)
+        unvisited = sum(1 << f for f in problem.fields.tolist())
+        for i, f in prefix:
+            visited[f] = True
+            committed += self.__assign(routes, capacities, var_costs, i, f)
+            remaining -= self.__min_out[f]
+            pending -= self.__production[f]
+            unvisited &= ~(1 << f)
+
+        current = prefix[-1][0]
+        if len(prefix) == len(problem.fields):
+            bound = committed
+        else:
+            bound = self.__lower_bound(
+                last=routes[current][-1],
+                capacity=capacities[current],
+                trucks_left=num_trucks - current - 1,
+                committed=committed,
+                remaining=remaining,
+                pending=pending,
+                unvisited=unvisited,
+            )
+        if self.branch_and_bound and bound >= self.__best_known_cost(np.inf):
+            self.pruned_nodes += 1
+            return giant_tour([]), np.inf, self.search_stats(), np.inf
+        if self.__exhausted():
+            return giant_tour([]), np.inf, self.search_stats(), bound
+
         solution, optimal_cost = self.__solve(
-            visited=[],
-            trucks=trucks,
-            oil_fields=oil_fields,
-            solution=[],
+            visited=visited,
+            routes=routes,
+            capacities=capacities,
+            var_costs=var_costs,
+            solution=giant_tour([]),
             optimal_cost=np.inf,
+            depth=len(prefix),
+            current=current,
+            committed=committed,
+            remaining=remaining,
+            pending=pending,
+            unvisited=unvisited,
         )
-        self.optimal_solution.trucks = deepcopy(solution)
-        self.optimal_solution.total_cost = optimal_cost
+        self.__sync_nodes()
+        return solution, optimal_cost, self.search_stats(), self.__open_bound
+
+    def __solve_parallel(
+        self,
+        num_trucks: int,
+        truck_capacity: float,
+        prefixes: List,
+        solution: Tour,
+        optimal_cost: float,
+        callback: Callable[[Solution], None],
+    ) -> Tuple[Tour, float]:
+        """Solves the subtrees in a pool of worker processes that share the cost of
+        the best solution found so far, so every worker prunes against it. Improving
+        solutions are reported as the subtrees that contain them finish.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+            prefixes (List): Assignments that lead to each subtree.
+            solution (Tour): Giant tour and route offsets of the initial incumbent.
+            optimal_cost (float): Cost of the initial incumbent.
+            callback (Callable[[Solution], None]): Called with each improving
+                solution.
+
+        Returns:
+            Tuple[Tour, float]: Giant tour and route offsets of the best solution
+            found, and its total cost.
+        """
+        incumbent = Value("d", optimal_cost)
+        nodes = Value("q", 0)
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self, incumbent, nodes),
+        ) as executor:
+            tasks = [
+                executor.submit(_solve_subtree, num_trucks, truck_capacity, prefix)
+                for prefix in prefixes
+            ]
+            for task in as_completed(tasks):
+                ret_solution, ret_cost, stats, open_bound = task.result()
+                self.pruned_nodes += stats["pruned_nodes"]
+                self.expanded_nodes += stats["expanded_nodes"]
+                self.leaf_nodes += stats["leaf_nodes"]
+                self.incumbent_updates += stats["incumbent_updates"]
+                self.max_depth = max(self.max_depth, stats["max_depth"])
+                self.__open_bound = min(self.__open_bound, open_bound)
+                if ret_cost < optimal_cost:
+                    solution, optimal_cost = ret_solution, ret_cost
+                    if callback is not None:
+                        callback(
+                            self.__problem.build_solution(
+                                *self.__pad(solution), truck_capacity, optimal_cost
+                            )
+                        )
+        return solution, optimal_cost
+
+    def run(
+        self,
+        num_trucks: int,
+        truck_capacity: float,
+        time_limit: float = None,
+        node_limit: int = None,
+        warm_start: Solution = None,
+        callback: Callable[[Solution], None] = None,
+    ) -> None:
+        """Runs the solver.
+
+        When a limit stops the search early, the best solution found is kept and
+        `lower_bound` and `gap` tell how far from the optimum it can be. Both show a
+        proven optimum (zero gap) when the search completes.
+
+        Bin-packing bounds are checked first, in `fleet`: a fleet that cannot carry
+        the production is rejected without searching, and the search only opens
+        as many trucks as there are oil fields.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+            time_limit (float, optional): Wall-clock budget in seconds. Defaults to
+                None.
+            node_limit (int, optional): Maximum number of expanded nodes. Defaults
+                to None.
+            warm_start (Solution, optional): Solution from another solver used as
+                the initial incumbent, ignored when it is infinite or infeasible.
+                Defaults to None.
+            callback (Callable[[Solution], None], optional): Called with each
+                improving solution as it is found. Defaults to None.
+        """
+        with self.profile.phase("problem_setup"):
+            self.__setup(truck_capacity=truck_capacity)
+            self.__incumbent = None
+            self.__truck_capacity = truck_capacity
+            self.__num_trucks = num_trucks
+            self.__callback = None
+            self.__deadline = None if time_limit is None else time.time() + time_limit
+            self.__node_limit = node_limit
+            self.__start_search()
+
+            problem = self.__problem
+            self.fleet = fleet_bounds(
+                production=problem.production[problem.fields],
+                capacity=self.__capacity,
+                num_trucks=num_trucks,
+            )
+            trucks = self.fleet.max_trucks
+            solution, optimal_cost = giant_tour([]), np.inf
+            if warm_start is not None:
+                solution, optimal_cost = self.__warm_start(warm_start, num_trucks)
+
+        with self.profile.phase("search"):
+            prefixes = []
+            if self.workers > 1 and not self.fleet.infeasible:
+                prefixes = self.__split(num_trucks=trucks, depth=self.split_depth)
+            if prefixes and prefixes != [()]:
+                solution, optimal_cost = self.__solve_parallel(
+                    num_trucks=trucks,
+                    truck_capacity=truck_capacity,
+                    prefixes=prefixes,
+                    solution=solution,
+                    optimal_cost=optimal_cost,
+                    callback=callback,
+                )
+            elif not self.fleet.infeasible:
+                self.__callback = callback
+                solution, optimal_cost = self.__solve(
+                    visited=[False] * len(problem.names),
+                    routes=[[] for _ in range(trucks)],
+                    capacities=[self.__capacity] * trucks,
+                    var_costs=[0.0] * trucks,
+                    solution=solution,
+                    optimal_cost=optimal_cost,
+                    remaining=sum(self.__min_out[f] for f in problem.fields),
+                    pending=sum(self.__production[f] for f in problem.fields),
+                    unvisited=sum(1 << f for f in problem.fields.tolist()),
+                )
+                self.__callback = None
+
+        self.lower_bound = min(optimal_cost, self.__open_bound)
+        if self.lower_bound >= optimal_cost:
+            self.gap = 0.0
+        elif np.isfinite(optimal_cost):
+            self.gap = (optimal_cost - self.lower_bound) / optimal_cost
+        else:
+            self.gap = np.inf
+        with self.profile.phase("build_solution"):
+            if np.isfinite(optimal_cost):
+                solution = self.__pad(solution)
+            solution = problem.build_solution(*solution, truck_capacity, optimal_cost)
+        self.optimal_solution.assign(solution)
+        self.profile.count(
+            **self.search_stats(),
+            lower_bound=self.lower_bound,
+            gap=self.gap,
+            min_trucks=self.fleet.min_trucks,
+            ffd_trucks=self.fleet.ffd_trucks,
+        )
+
+
+_solver = None
+_incumbent = None
+_nodes = None
+
+
+def _init_worker(
+    solver: GlobalSolver, incumbent: Synchronized, nodes: Synchronized
+) -> None:
+    """Stores the solver, the shared incumbent cost and the shared node count in a
+    worker process.
+
+    Args:
+        solver (GlobalSolver): Solver configured by the parent process.
+        incumbent (Synchronized): Shared cost of the best solution found.
+        nodes (Synchronized): Shared number of expanded nodes.
+    """
+    global _solver, _incumbent, _nodes
+    _solver = solver
+    _incumbent = incumbent
+    _nodes = nodes
+
+
+def _solve_subtree(
+    num_trucks: int, truck_capacity: float, prefix: Tuple[Tuple[int, int], ...]
+) -> Tuple[Tour, float, Dict[str, float], float]:
+    """Solves one subtree of the search in a worker process.
+
+    Args:
+        num_trucks (int): Number of available trucks.
+        truck_capacity (float): Total cargo capacity of the trucks.
+        prefix (Tuple[Tuple[int, int], ...]): (truck, oil field) assignments that
+            lead to the subtree.
+
+    Returns:
+        Tuple[Tour, float, Dict[str, float], float]: Giant tour and route offsets of
+        the best solution found in the subtree, its total cost, the search counters
+        and the lower bound of the part left unexplored.
+    """
+    return _solver.solve_subtree(num_trucks, truck_capacity, prefix)
 
 
 if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
     current_path = os.path.dirname(os.path.abspath(__file__))
     distance_matrix_path = os.path.join(
         current_path, "..", "data", "distance_matrix.csv"
@@ -1,25 +1,28 @@
+from __future__ import annotations
+
 import os
 import sys
 import time
-from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 import numpy as np
-import pandas as pd
 from termcolor import colored
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 sys.path.insert(0, "../")
 
 from src.utils import (
-    DistanceMatrix,
-    Location,
-    OilField,
+    Problem,
+    Profile,
     Solution,
-    Truck,
+    build_problem,
     distance_to_cost,
     format_solution_output,
+    giant_tour,
     liter_to_bbl,
 )
 
@@ -30,147 +33,120 @@ class HeuristicSolver:
     locations_info: pd.DataFrame
     dist_matrix: pd.DataFrame
     optimal_solution: Solution
+    neighbors: int = None
+    profile: Profile = field(default_factory=Profile)
 
-    def __setup_locations(self) -> Tuple[List[OilField], Location]:
-        """Separates depot from oil fields and builds its support list.
-
-        Returns:
-            Tuple[List[OilField], List[OffloadSite]]: List of OilField objects and Depot location.
-        """
-        oil_fields = []
-        field_count = 0
-        print(self.locations_info.index)
-        for i, name in enumerate(self.locations_info.index):
-            if self.locations_info["Depot"][i] == 0:
-                oil_fields += [
-                    OilField(
-                        idx=field_count,
-                        name=self.locations_info["Name"][i],
-                        production=self.locations_info["Production"][i],
-                    )
-                ]    
-            else:
-                depot = Location(idx=field_count, name=self.locations_info["Name"][i])
-            field_count += 1
-        return (oil_fields, depot)
-
-    def __setup_trucks(
-        self, num_trucks: int, truck_capacity: float, depot: Location
-    ) -> List[Truck]:
-        """Builds a list of N trucks that will pickup oil at the oil fields and deliver it
-        at offload sites.
-
-        Args:
-            num_trucks (int): Number of trucks available.
-            truck_capacity (float): Total truck capacity (Liters).
-            depot (Location): Depot location object.
-
-        Returns:
-            List[Truck]: List of Truck objects
-        """
-        capacity = liter_to_bbl(volume=truck_capacity)
-        trucks = []
-        for i in range(num_trucks):
-            trucks += [
-                Truck(
-                    idx=i,
-                    route=[],
-                    fixed_cost=300,
-                    var_cost=0,
-                    capacity=capacity,
-                    start=depot,
-                    end=depot,
-                )
-            ]
-        return trucks
-
-    def __calculate_total_cost(self, trucks: List[Truck]) -> float:
+    def __calculate_total_cost(
+        self, problem: Problem, routes: List[List[int]]
+    ) -> float:
         """Calculates the total cost of a solution.
 
         Args:
-            trucks (List[Truck]): List of trucks.
+            problem (Problem): Compiled problem.
+            routes (List[List[int]]): Oil fields visited by each truck.
 
         Returns:
             float: Total cost of the solution.
         """
-        return sum(map(lambda x: x.fixed_cost + x.var_cost if x.route else 0.0, trucks))
+        return sum(
+            problem.fixed_cost + problem.route_cost(route) for route in routes if route
+        )
 
     def __solve(
-        self,
-        visited: List[OilField],
-        trucks: List[Truck],
-        oil_fields: List[OilField],
-    ) -> List[Truck]:
+        self, problem: Problem, num_trucks: int, capacity: float
+    ) -> Tuple[List[List[int]], float]:
         """Algorithm that solves the VRP.
 
+        Each truck leaves the depot and keeps moving to the nearest unvisited oil
+        field that still fits in it, until no oil field fits or all were visited.
+        When the trucks run out before every oil field is visited, the partial plan
+        is discarded.
+        Visited fields never become unvisited, so each location keeps a pointer past
+        the visited prefix of its neighbor list and every step resumes from there.
+
         Args:
-            visited (List[OilField]): List of visited oil fields.
-            offloaded (List[Truck]): List of trucks that already offloaded their cargo.
-            trucks (List[Truck]): List of trucks.
-            oil_fields (List[OilField]): List of oil fields.
-            solution: (List[Truck]): Object containing list of trucks of the best solution.
-            optimal_cost: (float): Cost of best solution.
+            problem (Problem): Compiled problem.
+            num_trucks (int): Number of available trucks.
+            capacity (float): Truck capacity (bbl).
 
         Returns:
-            Solution: Object containing best routes and total cost.
+            Tuple[List[List[int]], float]: Routes of each truck and total cost, or
+            no routes and infinite cost when some oil field is left unvisited.
         """
-        print(self.dist_matrix)
-        print(oil_fields)
-        for t in trucks:
-            test_capacity = False
-            if len(t.route) == 0:
-                position = t.start.name
-            idx_pos = 1
-            while not (test_capacity or len(visited) == len(oil_fields)):
-                change = False
-                next_position_list = np.array(self.dist_matrix[position].T)
-                next_position_list_copy = np.sort(next_position_list)
-                next_position = np.where(
-                    next_position_list == next_position_list_copy[idx_pos]
-                )
-                for oil in oil_fields:
-                    if oil.idx == next_position[0][0]:
-                        if oil not in visited:
-                            if t.capacity - oil.production >= 0:
-                                t.route += [oil]
-                                t.capacity -= oil.production
-                                t.var_cost += self.cost_matrix[position][oil.name]
-
-                                visited += [oil]
-                                position = oil.name
-                                idx_pos = 1
-                                change = True
-
-                if not (change):
-                    idx_pos += 1
-
-                if idx_pos == len(oil_fields) + 1:
-                    test_capacity = True
-
-            print(t.route)
-            if len(t.route) > 0:
-                t.var_cost += self.cost_matrix[t.route[-1].name][t.end.name]
-
-        return trucks, self.__calculate_total_cost(trucks)
+        neighbors = problem.neighbor_lists(self.neighbors)
+        skip = np.zeros(len(problem.names), dtype=int)
+        visited = np.zeros(len(problem.names), dtype=bool)
+        visited[problem.depot] = True
+        pending = len(problem.fields)
+
+        routes = []
+        for _ in range(num_trucks):
+            route = []
+            load = capacity
+            position = problem.depot
+            while pending:
+                row = neighbors[position]
+                while skip[position] < len(row) and visited[row[skip[position]]]:
+                    skip[position] += 1
+
+                next_position = None
+                for f in row[skip[position] :]:
+                    if not visited[f] and load - problem.production[f] >= 0:
+                        next_position = f
+                        break
+                if next_position is None and len(row) < len(problem.fields):
+                    fits = ~visited[problem.fields] & (
+                        load - problem.production[problem.fields] >= 0
+                    )
+                    candidates = problem.fields[fits]
+                    if len(candidates):
+                        nearest = problem.costs[position, candidates].argmin()
+                        next_position = candidates[nearest]
+                if next_position is None:
+                    break
+
+                route += [int(next_position)]
+                load -= problem.production[next_position]
+                visited[next_position] = True
+                position = next_position
+                pending -= 1
+            routes += [route]
+
+        if pending:
+            return [], np.inf
+        return routes, self.__calculate_total_cost(problem, routes)
 
     def run(self, num_trucks: int, truck_capacity: float) -> None:
-        oil_fields, depot = self.__setup_locations()
-        trucks = self.__setup_trucks(
-            num_trucks=num_trucks,
-            truck_capacity=truck_capacity,
-            depot=depot,
-        )
-        solution, optimal_cost = self.__solve(
-            visited=[],
-            trucks=trucks,
-            oil_fields=oil_fields,
-        )
+        """Runs the solver.
 
-        self.optimal_solution.trucks = deepcopy(solution)
-        self.optimal_solution.total_cost = optimal_cost
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+        """
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+        with self.profile.phase("search"):
+            routes, optimal_cost = self.__solve(
+                problem=problem,
+                num_trucks=num_trucks,
+                capacity=liter_to_bbl(volume=truck_capacity),
+            )
+        if optimal_cost == np.inf:
+            self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+            return
+
+        with self.profile.phase("build_solution"):
+            solution = problem.build_solution(
+                *giant_tour(routes), truck_capacity, optimal_cost
+            )
+        self.optimal_solution.assign(solution)
 
 
 if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
     current_path = os.path.dirname(os.path.abspath(__file__))
     locations_path = os.path.join(current_path, "..", "data", "locations.csv")
     locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
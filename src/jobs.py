@@ -0,0 +1,199 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.benchmark import SOLVERS
+from src.local_search import LocalSearch
+from src.utils import (
+    DistanceCache,
+    DistanceMatrix,
+    Profile,
+    Solution,
+    distance_to_cost,
+)
+
+DATA_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+)
+COLUMNS = ["Name", "Latitude", "Longitude", "Production", "Depot"]
+DEFAULTS = {
+    "solver": "savings",
+    "locations": os.path.join(DATA_PATH, "locations_reduced.csv"),
+    "truck_capacity": 10000.0,
+    "truck_consumption": 17.5,
+    "diesel_price": 6.62,
+    "backend": "api",
+    "improve": False,
+    "options": {},
+    "run": {},
+}
+
+
+def to_json(record: Dict) -> str:
+    """Serializes a record as strict JSON.
+
+    Args:
+        record (Dict): Record without infinite or NaN values.
+
+    Raises:
+        ValueError: The record holds an infinite or NaN value.
+
+    Returns:
+        str: JSON document.
+    """
+    return json.dumps(record, ensure_ascii=False, allow_nan=False)
+
+
+def read_locations(locations) -> pd.DataFrame:
+    """Reads the locations of an instance.
+
+    Args:
+        locations: Path of a locations CSV, or a list of records with the Name,
+            Latitude, Longitude, Production and Depot of each location.
+
+    Raises:
+        ValueError: Missing columns or no depot.
+
+    Returns:
+        pd.DataFrame: Locations, with a Name column.
+    """
+    if isinstance(locations, str):
+        locations = pd.read_csv(locations, sep=";", index_col=False, encoding="UTF-8")
+    else:
+        locations = pd.DataFrame.from_records(locations)
+    missing = [column for column in COLUMNS if column not in locations.columns]
+    if missing:
+        raise ValueError(f"Locations miss the columns: {', '.join(missing)}")
+    if not (locations["Depot"] == 1).any():
+        raise ValueError("Locations have no depot.")
+    return locations
+
+
+def load_config(path: str) -> List[Dict]:
+    """Reads the instances of a JSON or YAML config file.
+
+    The file holds either a list of instances or a mapping with an "instances"
+    list and optional "defaults" shared by them. Relative locations paths are
+    resolved from the directory of the config file.
+
+    Args:
+        path (str): Path of the config file.
+
+    Returns:
+        List[Dict]: Settings of each instance.
+    """
+    with open(path, encoding="UTF-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+
+    if isinstance(config, list):
+        config = {"instances": config}
+    defaults = config.get("defaults", {})
+    instances = []
+    for i, instance in enumerate(config["instances"]):
+        instance = {**defaults, **instance}
+        instance.setdefault("name", f"{os.path.basename(path)}:{i}")
+        if "locations" in instance:
+            instance["locations"] = os.path.join(
+                os.path.dirname(os.path.abspath(path)), instance["locations"]
+            )
+        instances += [instance]
+    return instances
+
+
+def prepare(
+    instance: Dict, cache: DistanceCache
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Profile]:
+    """Reads the locations of an instance and computes its cost matrix.
+
+    Args:
+        instance (Dict): Settings of the instance.
+        cache (DistanceCache): Distance cache shared by the instances.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Profile]: Locations,
+        distance matrix, cost matrix and the timings of the preparation.
+    """
+    profile = Profile(enabled=True)
+    with profile.phase("location_setup"):
+        locations = read_locations(instance["locations"])
+    with profile.phase("matrix_fetch"):
+        distance_matrix = DistanceMatrix(
+            input_data=locations,
+            backend=instance["backend"],
+            cache=cache if instance["backend"] == "api" else None,
+        )
+        distance_matrix.calculate()
+    with profile.phase("cost_conversion"):
+        cost_matrix = distance_to_cost(
+            diesel_price=instance["diesel_price"],
+            truck_consumption=instance["truck_consumption"],
+            dist_matrix=distance_matrix.matrix,
+        )
+    return locations, distance_matrix.matrix, cost_matrix, profile
+
+
+def solve(
+    instance: Dict,
+    locations: pd.DataFrame,
+    dist_matrix: pd.DataFrame,
+    cost_matrix: pd.DataFrame,
+    profile: Profile,
+) -> Dict:
+    """Solves an instance. Runs in the worker processes.
+
+    Args:
+        instance (Dict): Settings of the instance.
+        locations (pd.DataFrame): Locations of the instance.
+        dist_matrix (pd.DataFrame): Distance matrix.
+        cost_matrix (pd.DataFrame): Cost matrix.
+        profile (Profile): Timings of the preparation, extended by the solver.
+
+    Returns:
+        Dict: Result record with the routes, loads, costs and timings.
+    """
+    solver = SOLVERS[instance["solver"]](
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        dist_matrix=dist_matrix,
+        profile=profile,
+        **instance["options"],
+    )
+    solver.run(
+        num_trucks=instance["num_trucks"],
+        truck_capacity=instance["truck_capacity"],
+        **instance["run"],
+    )
+    solution = solver.optimal_solution
+    if instance["improve"]:
+        with profile.phase("local_search"):
+            solution = LocalSearch(
+                cost_matrix=cost_matrix, locations_info=locations
+            ).improve(solution, instance["truck_capacity"])
+
+    feasible = bool(np.isfinite(solution.total_cost))
+    return {
+        "name": instance["name"],
+        "status": "ok" if feasible else "infeasible",
+        "solver": instance["solver"],
+        "total_cost": solution.total_cost if feasible else None,
+        "trucks": [
+            {
+                "truck": t.idx + 1,
+                "route": [t.start.name] + [f.name for f in t.route] + [t.end.name],
+                "load": sum(f.production for f in t.route),
+                "cost": t.fixed_cost + t.var_cost,
+            }
+            for t in solution.trucks
+            if t.route
+        ],
+        **profile.to_dict(),
+    }
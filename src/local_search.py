@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.utils import (
+    Problem,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+Move = Tuple[str, int, int, int]
+
+
+@dataclass
+class LocalSearch:
+    """Post-optimization stage that improves the Solution of any solver.
+
+    It applies intra-route 2-opt and Or-opt moves and inter-route relocate, swap
+    and 2-opt* moves. Each route caches its prefix costs in both directions and
+    its prefix loads, so every move is scored in constant time. Moves are limited
+    to the ones that link an oil field to one of its `neighbors` nearest fields,
+    and oil fields whose neighborhood has no improving move are skipped until
+    their routes change (don't-look bits).
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    neighbors: int = 10
+    applied_moves: int = field(default=0, init=False)
+
+    def __cache_route(self, r: int) -> None:
+        """Rebuilds the prefix costs and loads of a route.
+
+        Args:
+            r (int): Route index.
+        """
+        seq = self.__seq[r]
+        c = self.__costs
+        fwd, bwd, load = [0.0], [0.0], [0.0]
+        for a, b in zip(seq, seq[1:]):
+            fwd += [fwd[-1] + c[a, b]]
+            bwd += [bwd[-1] + c[b, a]]
+        for a in seq:
+            load += [load[-1] + self.__production[a]]
+        self.__fwd[r], self.__bwd[r], self.__load[r] = fwd, bwd, load
+
+        for k, node in enumerate(seq[1:-1], start=1):
+            self.__route_of[node] = r
+            self.__index[node] = k
+
+    def __evaluate(self, u: int) -> Tuple[float, Move]:
+        """Finds the best move that links an oil field to one of its neighbors.
+
+        Args:
+            u (int): Oil field id.
+
+        Returns:
+            Tuple[float, Move]: Cost change of the best move and the move itself.
+        """
+        c = self.__costs
+        p = self.__production
+        capacity = self.__capacity
+        fixed = self.__fixed_cost
+        ru, i = self.__route_of[u], self.__index[u]
+        A = self.__seq[ru]
+        up, un = A[i - 1], A[i + 1]
+        load_a = self.__load[ru][-1]
+        removal = c[up, un] - c[up, u] - c[u, un] - (fixed if len(A) == 3 else 0.0)
+
+        best, move = -1e-9, None
+        for v in self.__neighbors[u]:
+            rv, j = self.__route_of[v], self.__index[v]
+            if rv < 0:
+                # Fields left out of the solution are not moved around
+                continue
+            B = self.__seq[rv]
+            vp, vn = B[j - 1], B[j + 1]
+
+            if ru != rv:
+                load_b = self.__load[rv][-1]
+                if load_b + p[u] <= capacity:
+                    # Relocate u after v
+                    delta = removal + c[v, u] + c[u, vn] - c[v, vn]
+                    if delta < best:
+                        best, move = delta, ("relocate", u, v, 1)
+                    # Relocate u before v
+                    delta = removal + c[vp, u] + c[u, v] - c[vp, v]
+                    if delta < best:
+                        best, move = delta, ("relocate", u, v, 0)
+
+                if (
+                    load_a - p[u] + p[v] <= capacity
+                    and load_b - p[v] + p[u] <= capacity
+                ):
+                    # Swap u and v
+                    delta = (
+                        c[up, v]
+                        + c[v, un]
+                        - c[up, u]
+                        - c[u, un]
+                        + c[vp, u]
+                        + c[u, vn]
+                        - c[vp, v]
+                        - c[v, vn]
+                    )
+                    if delta < best:
+                        best, move = delta, ("swap", u, v, 0)
+
+                # 2-opt*: u keeps its head and takes v's tail
+                head_a = self.__load[ru][i + 1]
+                head_b = self.__load[rv][j]
+                if (
+                    head_a + load_b - head_b <= capacity
+                    and head_b + load_a - head_a <= capacity
+                ):
+                    delta = c[u, v] + c[vp, un] - c[u, un] - c[vp, v]
+                    if j == 1 and i + 1 == len(A) - 1:
+                        delta -= fixed
+                    if delta < best:
+                        best, move = delta, ("exchange", u, v, 0)
+
+            elif j > i + 1:
+                # 2-opt: reverse the segment from un to v
+                fwd, bwd = self.__fwd[ru], self.__bwd[ru]
+                delta = (
+                    c[u, v]
+                    + c[un, A[j + 1]]
+                    - c[u, un]
+                    - c[v, A[j + 1]]
+                    + (bwd[j] - bwd[i + 1])
+                    - (fwd[j] - fwd[i + 1])
+                )
+                if delta < best:
+                    best, move = delta, ("reverse", u, v, 0)
+
+            if ru == rv:
+                # Or-opt: move the segment that starts at u to right after v
+                for length in range(1, 4):
+                    end = i + length - 1
+                    if end > len(A) - 2:
+                        break
+                    if i - 1 <= j <= end:
+                        continue
+                    first, last, after = A[i], A[end], A[end + 1]
+                    delta = (
+                        c[up, after]
+                        - c[up, first]
+                        - c[last, after]
+                        + c[v, first]
+                        + c[last, vn]
+                        - c[v, vn]
+                    )
+                    if delta < best:
+                        best, move = delta, ("move", u, v, length)
+
+        return best, move
+
+    def __apply(self, move: Move) -> List[int]:
+        """Applies a move to the routes and refreshes their caches.
+
+        Args:
+            move (Move): Move found by __evaluate.
+
+        Returns:
+            List[int]: Indexes of the changed routes.
+        """
+        kind, u, v, arg = move
+        ru, i = self.__route_of[u], self.__index[u]
+        rv, j = self.__route_of[v], self.__index[v]
+        A, B = self.__seq[ru], self.__seq[rv]
+
+        if kind == "relocate":
+            self.__seq[ru] = A[:i] + A[i + 1 :]
+            self.__seq[rv] = B[: j + arg] + [u] + B[j + arg :]
+        elif kind == "swap":
+            self.__seq[ru] = A[:i] + [v] + A[i + 1 :]
+            self.__seq[rv] = B[:j] + [u] + B[j + 1 :]
+        elif kind == "exchange":
+            self.__seq[ru] = A[: i + 1] + B[j:]
+            self.__seq[rv] = B[:j] + A[i + 1 :]
+        elif kind == "reverse":
+            self.__seq[ru] = A[: i + 1] + A[i + 1 : j + 1][::-1] + A[j + 1 :]
+        elif kind == "move":
+            segment = A[i : i + arg]
+            rest = A[:i] + A[i + arg :]
+            k = rest.index(v) + 1
+            self.__seq[ru] = rest[:k] + segment + rest[k:]
+
+        changed = [ru] if ru == rv else [ru, rv]
+        for r in changed:
+            self.__cache_route(r)
+        return changed
+
+    def improve(
+        self, solution: Solution, truck_capacity: float, trucks: List[int] = None
+    ) -> Solution:
+        """Improves a solution until no move in the neighborhoods reduces its cost.
+
+        Args:
+            solution (Solution): Solution built by any solver.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+            trucks (List[int], optional): Trucks whose oil fields start the search.
+                Other routes are only visited once a move changes them. Defaults to
+                all trucks.
+
+        Returns:
+            Solution: Improved solution. The input solution is not changed.
+        """
+        if not solution.trucks or not np.isfinite(solution.total_cost):
+            return Solution(
+                trucks=list(solution.trucks), total_cost=solution.total_cost
+            )
+
+        problem = build_problem(self.cost_matrix, self.locations_info)
+        ids = {name: i for i, name in enumerate(problem.names)}
+        depot = problem.depot
+
+        self.__costs = memoryview(problem.costs)
+        self.__production = problem.production.tolist()
+        self.__capacity = liter_to_bbl(volume=truck_capacity) + 1e-9
+        self.__fixed_cost = problem.fixed_cost
+        self.__neighbors = problem.neighbor_lists(self.neighbors)
+        self.__seq = [
+            [depot] + [ids[f.name] for f in t.route] + [depot] for t in solution.trucks
+        ]
+        self.__fwd = [None] * len(self.__seq)
+        self.__bwd = [None] * len(self.__seq)
+        self.__load = [None] * len(self.__seq)
+        self.__route_of = [-1] * len(problem.names)
+        self.__index = [-1] * len(problem.names)
+        for r in range(len(self.__seq)):
+            self.__cache_route(r)
+
+        self.applied_moves = 0
+        if trucks is None:
+            trucks = range(len(self.__seq))
+        queue = deque(f for r in trucks for f in self.__seq[r][1:-1])
+        active = [False] * len(problem.names)
+        for f in queue:
+            active[f] = True
+        while queue:
+            u = queue.popleft()
+            active[u] = False
+            delta, move = self.__evaluate(u)
+            if move is None:
+                continue
+
+            self.applied_moves += 1
+            for r in self.__apply(move):
+                for f in self.__seq[r][1:-1]:
+                    if not active[f]:
+                        active[f] = True
+                        queue.append(f)
+
+        routes = [seq[1:-1] for seq in self.__seq]
+        total_cost = sum(
+            problem.fixed_cost + problem.route_cost(route) for route in routes if route
+        )
+        return problem.build_solution(*giant_tour(routes), truck_capacity, total_cost)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.heuristic_search import HeuristicSolver
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = HeuristicSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        dist_matrix=distance_matrix.matrix,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+    solver.optimal_solution = LocalSearch(
+        cost_matrix=cost_matrix, locations_info=locations
+    ).improve(solver.optimal_solution, truck_capacity)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
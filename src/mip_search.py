@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.local_search import LocalSearch
+from src.savings_search import SavingsSolver
+from src.utils import (
+    Problem,
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+BACKENDS = ("ortools", "pulp")
+# OR-Tools routing only takes integer costs and demands
+COST_SCALE = 100
+DEMAND_SCALE = 1000
+
+
+@dataclass
+class MIPSolver:
+    """Solver that hands a capacitated VRP model to an open-source engine.
+
+    The "ortools" backend gives the fleet, capacities and fixed costs to the
+    OR-Tools routing solver, which runs guided local search until the time limit
+    and gives no optimality proof. The "pulp" backend builds a two-index flow
+    model with lifted Miller-Tucker-Zemlin load constraints, where every used truck
+    pays `fixed_cost`, and solves it with CBC up to the relative `mip_gap`. When
+    CBC proves optimality with `mip_gap` zero, `lower_bound` is the optimal cost and
+    `gap` is zero. The CBC command line exposes no best bound otherwise, so both are
+    NaN for runs stopped by the time limit or the requested gap. The bound of this
+    model is weak, and the routing solver usually finds better routes in the same
+    time.
+
+    Both engines start from the solution of `warm_start`, improved by LocalSearch,
+    and that solution is kept when the engine finds nothing better in time. The
+    engines are optional dependencies, only imported by `run`.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    optimal_solution: Solution
+    dist_matrix: pd.DataFrame = None
+    backend: str = "ortools"
+    mip_gap: float = 0.0
+    warm_start: type = SavingsSolver
+    profile: Profile = field(default_factory=Profile)
+    status: str = field(default="", init=False)
+    lower_bound: float = field(default=np.nan, init=False)
+
+    @property
+    def gap(self) -> float:
+        """Returns the proven relative gap between the solution and the lower
+        bound, NaN when the backend proves no bound."""
+        cost = self.optimal_solution.total_cost
+        if not np.isfinite(cost) or np.isnan(self.lower_bound):
+            return np.nan
+        return max(0.0, (cost - self.lower_bound) / cost)
+
+    def __warm_routes(self, num_trucks: int, truck_capacity: float) -> List[List[int]]:
+        """Builds the initial solution handed to the engine.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+
+        Returns:
+            List[List[int]]: Oil field ids visited by each truck, or None when
+            `warm_start` is None or finds no solution.
+        """
+        if self.warm_start is None:
+            return None
+        solver = self.warm_start(
+            cost_matrix=self.cost_matrix,
+            locations_info=self.locations_info,
+            optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        )
+        solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+        if not np.isfinite(solver.optimal_solution.total_cost):
+            return None
+        solution = LocalSearch(
+            cost_matrix=self.cost_matrix, locations_info=self.locations_info
+        ).improve(solver.optimal_solution, truck_capacity)
+        return [route.tolist() for route in solution.routes if len(route)]
+
+    def __solve_pulp(
+        self,
+        problem: Problem,
+        num_trucks: int,
+        capacity: float,
+        warm_routes: List[List[int]],
+        time_limit: float,
+    ) -> Tuple[List[List[int]], str]:
+        """Solves the flow model with CBC through PuLP.
+
+        Args:
+            problem (Problem): Compiled problem.
+            num_trucks (int): Number of available trucks.
+            capacity (float): Truck capacity (bbl).
+            warm_routes (List[List[int]]): Initial routes, or None.
+            time_limit (float): Time limit of CBC in seconds.
+
+        Returns:
+            Tuple[List[List[int]], str]: Routes found, or None, and whether they
+            are "optimal", "within_gap" of the optimum or only "feasible".
+        """
+        try:
+            import pulp
+        except ImportError as err:
+            raise ImportError(
+                "The pulp backend needs PuLP, install it with `pip install pulp`."
+            ) from err
+
+        # Plain floats, since numpy scalars do not combine with PuLP expressions
+        depot, fields = problem.depot, problem.fields.tolist()
+        nodes = [depot] + fields
+        costs = problem.costs.tolist()
+        production = problem.production.tolist()
+        capacity = float(capacity)
+        arcs = [
+            (i, j)
+            for i in nodes
+            for j in nodes
+            if i != j
+            and (i == depot or j == depot or production[i] + production[j] <= capacity)
+        ]
+
+        model = pulp.LpProblem("cvrp", pulp.LpMinimize)
+        x = {(i, j): pulp.LpVariable(f"x_{i}_{j}", cat=pulp.LpBinary) for i, j in arcs}
+        load = {
+            i: pulp.LpVariable(f"u_{i}", lowBound=production[i], upBound=capacity)
+            for i in fields
+        }
+        outgoing = {i: [] for i in nodes}
+        incoming = {i: [] for i in nodes}
+        for i, j in arcs:
+            outgoing[i] += [x[i, j]]
+            incoming[j] += [x[i, j]]
+
+        trucks = pulp.lpSum(outgoing[depot])
+        model += (
+            pulp.lpSum(costs[i][j] * x[i, j] for i, j in arcs)
+            + problem.fixed_cost * trucks
+        )
+        for i in fields:
+            model += pulp.lpSum(outgoing[i]) == 1
+            model += pulp.lpSum(incoming[i]) == 1
+        model += pulp.lpSum(incoming[depot]) == trucks
+        model += trucks <= num_trucks
+        total = sum(production[f] for f in fields)
+        model += trucks >= math.ceil(total / capacity - 1e-9)
+        for i, j in arcs:
+            if i != depot and j != depot:
+                # Lifted by the reverse arc (Desrochers and Laporte)
+                model += (
+                    load[j]
+                    >= load[i]
+                    + production[j]
+                    - capacity * (1 - x[i, j])
+                    + (capacity - production[i] - production[j]) * x[j, i]
+                )
+
+        if warm_routes:
+            for variable in x.values():
+                variable.setInitialValue(0)
+            for route in warm_routes:
+                sequence = [depot] + route + [depot]
+                for i, j in zip(sequence[:-1], sequence[1:]):
+                    x[i, j].setInitialValue(1)
+                value = 0.0
+                for f in route:
+                    value += production[f]
+                    load[f].setInitialValue(value)
+
+        model.solve(
+            pulp.PULP_CBC_CMD(
+                msg=False,
+                timeLimit=time_limit,
+                gapRel=self.mip_gap,
+                warmStart=bool(warm_routes),
+            )
+        )
+        proven = model.sol_status == pulp.LpSolutionOptimal and self.mip_gap == 0
+        self.lower_bound = pulp.value(model.objective) if proven else np.nan
+        if model.sol_status not in (
+            pulp.LpSolutionOptimal,
+            pulp.LpSolutionIntegerFeasible,
+        ):
+            return None, "infeasible"
+
+        following = {i: j for (i, j), v in x.items() if (v.value() or 0) > 0.5}
+        routes = []
+        for first in [j for j in fields if (x[depot, j].value() or 0) > 0.5]:
+            route = []
+            f = first
+            while f != depot:
+                route += [f]
+                f = following[f]
+            routes += [route]
+        if model.sol_status != pulp.LpSolutionOptimal:
+            return routes, "feasible"
+        return routes, "optimal" if self.mip_gap == 0 else "within_gap"
+
+    def __solve_ortools(
+        self,
+        problem: Problem,
+        num_trucks: int,
+        capacity: float,
+        warm_routes: List[List[int]],
+        time_limit: float,
+    ) -> Tuple[List[List[int]], str]:
+        """Solves the model with the OR-Tools routing solver.
+
+        Costs and productions are scaled to integers. Productions are rounded up
+        and the capacity down, so the routes found always fit.
+
+        Args:
+            problem (Problem): Compiled problem.
+            num_trucks (int): Number of available trucks.
+            capacity (float): Truck capacity (bbl).
+            warm_routes (List[List[int]]): Initial routes, or None.
+            time_limit (float): Time limit of the search in seconds.
+
+        Returns:
+            Tuple[List[List[int]], str]: Routes found, or None, and "feasible".
+        """
+        try:
+            from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+        except ImportError as err:
+            raise ImportError(
+                "The ortools backend needs OR-Tools, install it with "
+                "`pip install ortools`."
+            ) from err
+        self.lower_bound = np.nan
+
+        nodes = np.concatenate(([problem.depot], problem.fields))
+        arc_costs = np.rint(problem.costs[np.ix_(nodes, nodes)] * COST_SCALE)
+        arc_costs = arc_costs.astype(np.int64).tolist()
+        demands = np.ceil(problem.production[nodes] * DEMAND_SCALE - 1e-6)
+        demands[0] = 0
+        demands = demands.astype(np.int64).tolist()
+        position = {int(f): k for k, f in enumerate(nodes)}
+
+        manager = pywrapcp.RoutingIndexManager(len(nodes), num_trucks, 0)
+        routing = pywrapcp.RoutingModel(manager)
+        transit = routing.RegisterTransitCallback(
+            lambda i, j: arc_costs[manager.IndexToNode(i)][manager.IndexToNode(j)]
+        )
+        routing.SetArcCostEvaluatorOfAllVehicles(transit)
+        routing.SetFixedCostOfAllVehicles(int(round(problem.fixed_cost * COST_SCALE)))
+        demand = routing.RegisterUnaryTransitCallback(
+            lambda i: demands[manager.IndexToNode(i)]
+        )
+        routing.AddDimensionWithVehicleCapacity(
+            demand,
+            0,
+            [int(math.floor(capacity * DEMAND_SCALE + 1e-6))] * num_trucks,
+            True,
+            "Capacity",
+        )
+
+        parameters = pywrapcp.DefaultRoutingSearchParameters()
+        parameters.first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        )
+        parameters.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        )
+        parameters.time_limit.FromMilliseconds(int(time_limit * 1000))
+
+        assignment = None
+        if warm_routes:
+            routing.CloseModelWithParameters(parameters)
+            initial = [[position[f] for f in route] for route in warm_routes]
+            initial += [[] for _ in range(num_trucks - len(initial))]
+            start = routing.ReadAssignmentFromRoutes(initial, True)
+            if start is not None:
+                assignment = routing.SolveFromAssignmentWithParameters(
+                    start, parameters
+                )
+        if assignment is None:
+            assignment = routing.SolveWithParameters(parameters)
+        if assignment is None:
+            return None, "infeasible"
+
+        routes = []
+        for truck in range(num_trucks):
+            route = []
+            index = assignment.Value(routing.NextVar(routing.Start(truck)))
+            while not routing.IsEnd(index):
+                route += [int(nodes[manager.IndexToNode(index)])]
+                index = assignment.Value(routing.NextVar(index))
+            if route:
+                routes += [route]
+        return routes, "feasible"
+
+    def run(
+        self, num_trucks: int, truck_capacity: float, time_limit: float = 60.0
+    ) -> None:
+        """Runs the solver.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+            time_limit (float, optional): Time limit of the engine in seconds, not
+                counting the warm start. Defaults to 60.0.
+
+        Raises:
+            ValueError: Unknown backend.
+            ImportError: The engine of the backend is not installed.
+        """
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown MIP backend: {self.backend}")
+
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+            capacity = liter_to_bbl(volume=truck_capacity)
+        with self.profile.phase("initial_solution"):
+            warm_routes = self.__warm_routes(num_trucks, truck_capacity)
+
+        with self.profile.phase("search"):
+            solve = (
+                self.__solve_pulp if self.backend == "pulp" else self.__solve_ortools
+            )
+            routes, self.status = solve(
+                problem, num_trucks, capacity, warm_routes, time_limit
+            )
+
+        with self.profile.phase("build_solution"):
+            candidates = [r for r in (routes, warm_routes) if r is not None]
+            if not candidates:
+                self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+                return
+            solutions = [
+                problem.build_solution(
+                    *giant_tour(r + [[] for _ in range(num_trucks - len(r))]),
+                    truck_capacity,
+                )
+                for r in candidates
+            ]
+            best = min(range(len(solutions)), key=lambda k: solutions[k].total_cost)
+            if candidates[best] is not routes:
+                self.status = "warm_start"
+        self.profile.count(
+            optimal=int(self.status == "optimal"), lower_bound=self.lower_bound
+        )
+        self.optimal_solution.assign(solutions[best])
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = MIPSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity, time_limit=60.0)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
+    gap = "n/a" if np.isnan(solver.gap) else f"{solver.gap:.2%}"
+    print(f"Status: {solver.status} (gap {gap})")
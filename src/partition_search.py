@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.utils import (
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    fleet_bounds,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+MAX_FIELDS = 20
+
+
+@dataclass
+class PartitionSolver:
+    """Exact solver that works on bitmasks of oil fields.
+
+    The optimal tour of every subset that fits in a truck is computed once with
+    Held-Karp, and the fleet problem is then solved as a dynamic program over set
+    partitions with at most one subset per available truck. Time and memory grow
+    with 2^N * N: 20 oil fields take about a minute and half a gigabyte, so larger
+    instances than MAX_FIELDS are rejected. Fleets that the bin-packing bounds
+    prove too small are rejected before the tours are built.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    optimal_solution: Solution
+    dist_matrix: pd.DataFrame = None
+    profile: Profile = field(default_factory=Profile)
+
+    def __subset_loads(self, production: np.ndarray) -> np.ndarray:
+        """Calculates the total production of every subset of oil fields.
+
+        Args:
+            production (np.ndarray): Production of each oil field.
+
+        Returns:
+            np.ndarray: Total production indexed by subset bitmask.
+        """
+        loads = np.zeros(1, dtype=float)
+        for p in production:
+            loads = np.concatenate((loads, loads + p))
+        return loads
+
+    def __route_costs(
+        self, costs: np.ndarray, loads: np.ndarray, capacity: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Runs Held-Karp to find the optimal depot -> fields -> depot tour of every
+        subset of oil fields that fits in a truck.
+
+        Args:
+            costs (np.ndarray): Cost matrix with the depot at position 0.
+            loads (np.ndarray): Total production indexed by subset bitmask.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Tour cost of each subset (inf
+            when it does not fit in a truck), last field of each tour and the
+            predecessor table used to rebuild the tours.
+        """
+        n = len(costs) - 1
+        field_costs = costs[1:, 1:]
+        paths = np.full((1 << n, n), np.inf)
+        parents = np.full((1 << n, n), -1, dtype=np.int8)
+        for k in range(n):
+            if loads[1 << k] <= capacity:
+                paths[1 << k, k] = costs[0, k + 1]
+
+        bits = 1 << np.arange(n)
+        for mask in range(1, 1 << n):
+            if loads[mask] > capacity:
+                continue
+            candidates = paths[mask][:, None] + field_costs
+            best = candidates.argmin(axis=0)
+            extended = candidates[best, np.arange(n)]
+            targets = mask | bits
+            open_fields = np.flatnonzero(
+                ((mask & bits) == 0) & (loads[targets] <= capacity)
+            )
+            targets = targets[open_fields]
+            better = extended[open_fields] < paths[targets, open_fields]
+            paths[targets[better], open_fields[better]] = extended[open_fields][better]
+            parents[targets[better], open_fields[better]] = best[open_fields][better]
+
+        tours = paths + costs[1:, 0]
+        last = tours.argmin(axis=1)
+        route_costs = tours[np.arange(1 << n), last]
+        route_costs[0] = np.inf
+        return route_costs, last, parents
+
+    def __partition(
+        self, route_costs: np.ndarray, fixed_cost: float, num_trucks: int
+    ) -> Tuple[float, List[int]]:
+        """Splits the oil fields into at most one route per truck at minimum cost.
+
+        Layer k of the program holds, for every subset of oil fields, the cheapest
+        way to serve it with at most k trucks. Each layer extends the previous one by
+        one route, and only routes whose lowest field is below every field of the
+        rest of the subset are combined, so each partition is built once.
+
+        Args:
+            route_costs (np.ndarray): Tour cost of each subset of oil fields.
+            fixed_cost (float): Fixed cost of each truck in use.
+            num_trucks (int): Number of available trucks.
+
+        Returns:
+            Tuple[float, List[int]]: Optimal cost and the bitmasks of its routes.
+        """
+        size = len(route_costs)
+        full = size - 1
+        routes = np.flatnonzero(np.isfinite(route_costs))
+        route_costs = route_costs + fixed_cost
+
+        layers = [np.full(size, np.inf)]
+        layers[0][0] = 0.0
+        choices = []
+        for _ in range(min(num_trucks, full.bit_length())):
+            previous = layers[-1]
+            current = previous.copy()
+            choice = np.zeros(size, dtype=np.int64)
+            for route in routes:
+                low = int(route) & -int(route)
+                free = [b for b in range(full.bit_length()) if (1 << b) > low]
+                rests = np.zeros(1, dtype=np.int64)
+                for b in free:
+                    if not route & (1 << b):
+                        rests = np.concatenate((rests, rests | (1 << b)))
+                candidates = previous[rests] + route_costs[route]
+                targets = rests | route
+                better = candidates < current[targets]
+                current[targets[better]] = candidates[better]
+                choice[targets[better]] = route
+            layers.append(current)
+            choices.append(choice)
+            if np.array_equal(current, previous):
+                break
+
+        if not np.isfinite(layers[-1][full]):
+            return np.inf, []
+
+        partition = []
+        mask = full
+        for layer in range(len(choices) - 1, -1, -1):
+            if layers[layer][mask] == layers[layer + 1][mask]:
+                continue
+            route = int(choices[layer][mask])
+            partition.append(route)
+            mask ^= route
+        return layers[-1][full], partition
+
+    def __build_route(
+        self, mask: int, last: np.ndarray, parents: np.ndarray
+    ) -> List[int]:
+        """Rebuilds the visiting order of the optimal tour of a subset.
+
+        Args:
+            mask (int): Subset bitmask.
+            last (np.ndarray): Last field of each subset's optimal tour.
+            parents (np.ndarray): Predecessor table from Held-Karp.
+
+        Returns:
+            List[int]: Oil field indexes in visiting order.
+        """
+        route = []
+        k = int(last[mask])
+        while mask:
+            route.append(k)
+            previous = int(parents[mask, k])
+            mask ^= 1 << k
+            k = previous
+        return route[::-1]
+
+    def run(self, num_trucks: int, truck_capacity: float) -> None:
+        """Runs the solver.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+
+        Raises:
+            ValueError: More oil fields than MAX_FIELDS.
+        """
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+            if len(problem.fields) > MAX_FIELDS:
+                raise ValueError(
+                    f"PartitionSolver solves up to {MAX_FIELDS} oil fields, "
+                    f"got {len(problem.fields)}. Use DecompositionSolver instead."
+                )
+            nodes = np.concatenate(([problem.depot], problem.fields))
+            costs = problem.costs[np.ix_(nodes, nodes)]
+            capacity = liter_to_bbl(volume=truck_capacity)
+            fleet = fleet_bounds(
+                production=problem.production[problem.fields],
+                capacity=capacity,
+                num_trucks=num_trucks,
+            )
+        if fleet.infeasible:
+            self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+            return
+        if not len(problem.fields):
+            self.optimal_solution.assign(
+                problem.build_solution(
+                    *giant_tour([[] for _ in range(num_trucks)]), truck_capacity, 0.0
+                )
+            )
+            return
+
+        with self.profile.phase("search"):
+            loads = self.__subset_loads(problem.production[problem.fields])
+            route_costs, last, parents = self.__route_costs(costs, loads, capacity)
+            optimal_cost, partition = self.__partition(
+                route_costs=route_costs,
+                fixed_cost=problem.fixed_cost,
+                num_trucks=num_trucks,
+            )
+
+        with self.profile.phase("build_solution"):
+            routes = [[] for _ in range(num_trucks)] if partition else []
+            for i, mask in enumerate(partition):
+                routes[i] = [
+                    int(problem.fields[k])
+                    for k in self.__build_route(mask, last, parents)
+                ]
+            solution = problem.build_solution(
+                *giant_tour(routes), truck_capacity, optimal_cost
+            )
+        self.optimal_solution.assign(solution)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations_reduced.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    locations.index = locations["Name"]
+    locations.drop(columns=["Name"], inplace=True)
+
+    solver = PartitionSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
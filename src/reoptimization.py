@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.local_search import LocalSearch
+from src.utils import (
+    Problem,
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+
+@dataclass
+class Changes:
+    """Difference between the oil fields of two days.
+
+    Attributes:
+        production (Dict[str, float]): New production (bbl) of existing fields.
+        added (List[str]): Names of the new oil fields.
+        removed (List[str]): Names of the oil fields that are no longer served.
+    """
+
+    production: Dict[str, float] = field(default_factory=dict)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @classmethod
+    def between(cls, previous: pd.DataFrame, current: pd.DataFrame) -> Changes:
+        """Finds the changes from one locations table to another.
+
+        Args:
+            previous (pd.DataFrame): Locations the previous plan was made for.
+            current (pd.DataFrame): Current locations.
+
+        Returns:
+            Changes: Changed productions, added and removed oil fields.
+        """
+        tables = []
+        for locations in (previous, current):
+            if "Name" in locations.columns:
+                locations = locations.set_index("Name")
+            tables += [locations[locations["Depot"] == 0]["Production"]]
+        before, after = tables
+
+        common = before.index.intersection(after.index)
+        changed = common[before[common].to_numpy() != after[common].to_numpy()]
+        return cls(
+            production={name: float(after[name]) for name in changed},
+            added=[name for name in after.index if name not in before.index],
+            removed=[name for name in before.index if name not in after.index],
+        )
+
+
+@dataclass
+class Reoptimizer:
+    """Repairs a previous plan after its oil fields change, instead of solving the
+    instance again.
+
+    Removed fields are dropped from their routes. Trucks that no longer fit their
+    load give up the fields whose removal saves the most, until they fit. New and
+    evicted fields are then inserted at their cheapest feasible position, the
+    largest productions first, and LocalSearch starts from the trucks that were
+    touched. `cost_matrix` and `locations_info` describe the current day, so only
+    the distances of the new fields have to be fetched.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    neighbors: int = 10
+    profile: Profile = field(default_factory=Profile)
+    touched_trucks: int = field(default=0, init=False)
+    reinserted: int = field(default=0, init=False)
+
+    def __locations(self, changes: Changes) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Drops the removed oil fields and applies the production changes to
+        copies of the locations info and the cost matrix.
+
+        Args:
+            changes (Changes): Changes since the previous plan.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Current locations info and cost
+            matrix.
+        """
+        locations = self.locations_info
+        if "Name" in locations.columns:
+            names = locations["Name"]
+        else:
+            names = locations.index.to_series(index=locations.index)
+        kept = ~names.isin(changes.removed).to_numpy()
+        locations, names = locations[kept].copy(), names[kept]
+        cost_matrix = self.cost_matrix.drop(
+            index=changes.removed, columns=changes.removed, errors="ignore"
+        )
+        if changes.production:
+            rows = names.isin(list(changes.production)).to_numpy()
+            locations.loc[rows, "Production"] = [
+                changes.production[n] for n in names[rows]
+            ]
+        return locations, cost_matrix
+
+    def __evict(self, problem: Problem, route: List[int], capacity: float) -> List[int]:
+        """Removes oil fields from an overloaded route until it fits, taking first
+        the field whose removal saves the most.
+
+        Args:
+            problem (Problem): Compiled problem.
+            route (List[int]): Oil fields of the route, changed in place.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            List[int]: Evicted oil fields.
+        """
+        costs, depot = problem.costs, problem.depot
+        evicted = []
+        while problem.production[route].sum() > capacity + 1e-9:
+            seq = [depot] + route + [depot]
+            savings = [
+                costs[seq[i - 1], seq[i]]
+                + costs[seq[i], seq[i + 1]]
+                - costs[seq[i - 1], seq[i + 1]]
+                for i in range(1, len(seq) - 1)
+            ]
+            evicted += [route.pop(int(np.argmax(savings)))]
+        return evicted
+
+    def __insert(
+        self,
+        problem: Problem,
+        routes: List[List[int]],
+        loads: List[float],
+        oil_field: int,
+        capacity: float,
+    ) -> int:
+        """Inserts an oil field at its cheapest feasible position.
+
+        Args:
+            problem (Problem): Compiled problem.
+            routes (List[List[int]]): Oil fields visited by each truck, changed in
+                place.
+            loads (List[float]): Load of each truck (bbl), changed in place.
+            oil_field (int): Oil field to be inserted.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            int: Truck that received the oil field, or -1 if none has room.
+        """
+        costs, depot = problem.costs, problem.depot
+        production = problem.production[oil_field]
+        best, position = np.inf, None
+        for r, route in enumerate(routes):
+            if loads[r] + production > capacity + 1e-9:
+                continue
+            if not route:
+                delta = (
+                    problem.fixed_cost
+                    + costs[depot, oil_field]
+                    + costs[oil_field, depot]
+                )
+                if delta < best:
+                    best, position = delta, (r, 0)
+                continue
+            seq = np.array([depot] + route + [depot])
+            deltas = (
+                costs[seq[:-1], oil_field]
+                + costs[oil_field, seq[1:]]
+                - costs[seq[:-1], seq[1:]]
+            )
+            i = int(np.argmin(deltas))
+            if deltas[i] < best:
+                best, position = deltas[i], (r, i)
+
+        if position is None:
+            return -1
+        r, i = position
+        routes[r].insert(i, oil_field)
+        loads[r] += production
+        return r
+
+    def __repair(
+        self,
+        problem: Problem,
+        previous_solution: Solution,
+        changes: Changes,
+        capacity: float,
+    ) -> Tuple[List[List[int]], Set[int]]:
+        """Applies the changes to the routes of the previous plan. Oil fields of the
+        current day that no route visits, the added ones among them, are inserted.
+
+        Args:
+            problem (Problem): Compiled problem of the current day.
+            previous_solution (Solution): Previous plan.
+            changes (Changes): Changes since the previous plan.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            Tuple[List[List[int]], Set[int]]: Repaired routes and the trucks that
+            were touched, or None routes when a field fits in no truck.
+        """
+        ids = {name: i for i, name in enumerate(problem.names)}
+        changed = set(changes.production)
+
+        routes, touched = [], set()
+        for r, truck in enumerate(previous_solution.trucks):
+            route = [ids[f.name] for f in truck.route if f.name in ids]
+            if len(route) != len(truck.route) or any(
+                f.name in changed for f in truck.route
+            ):
+                touched.add(r)
+            routes += [route]
+
+        visited = {f for route in routes for f in route}
+        pending = [f for f in problem.fields.tolist() if f not in visited]
+        for r in sorted(touched):
+            pending += self.__evict(problem, routes[r], capacity)
+
+        loads = [float(problem.production[route].sum()) for route in routes]
+        for f in sorted(pending, key=lambda f: -problem.production[f]):
+            r = self.__insert(problem, routes, loads, f, capacity)
+            if r < 0:
+                return None, touched
+            touched.add(r)
+        self.reinserted = len(pending)
+        return routes, touched
+
+    def reoptimize(
+        self, previous_solution: Solution, changes: Changes, truck_capacity: float
+    ) -> Solution:
+        """Re-plans the routes of a previous solution after its oil fields change.
+
+        Args:
+            previous_solution (Solution): Solution of the previous day. Its number
+                of trucks is the fleet size.
+            changes (Changes): Changes since the previous plan.
+            truck_capacity (float): Total cargo capacity of the trucks (Liters).
+
+        Returns:
+            Solution: Repaired solution, or one with infinite cost when some oil
+            field fits in no truck. The previous solution is not changed.
+        """
+        with self.profile.phase("problem_setup"):
+            locations, cost_matrix = self.__locations(changes)
+            problem = build_problem(cost_matrix, locations)
+            capacity = liter_to_bbl(volume=truck_capacity)
+
+        with self.profile.phase("repair"):
+            routes, touched = self.__repair(
+                problem, previous_solution, changes, capacity
+            )
+        self.touched_trucks = len(touched)
+        if routes is None:
+            return Solution(trucks=[], total_cost=np.inf)
+
+        with self.profile.phase("build_solution"):
+            solution = problem.build_solution(*giant_tour(routes), truck_capacity)
+        with self.profile.phase("local_search"):
+            solution = LocalSearch(
+                cost_matrix=cost_matrix,
+                locations_info=locations,
+                neighbors=self.neighbors,
+            ).improve(solution, truck_capacity, trucks=sorted(touched))
+        self.profile.count(
+            touched_trucks=self.touched_trucks, reinserted=self.reinserted
+        )
+        return solution
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.savings_search import SavingsSolver
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = SavingsSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        dist_matrix=distance_matrix.matrix,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+    truck_capacity = 10000
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+
+    fields = locations[locations["Depot"] == 0]
+    changes = Changes(
+        production={fields["Name"].iloc[0]: fields["Production"].iloc[0] * 0.5},
+        removed=[fields["Name"].iloc[1]],
+    )
+    start = time.time()
+    solver.optimal_solution = Reoptimizer(
+        cost_matrix=cost_matrix, locations_info=locations
+    ).reoptimize(solver.optimal_solution, changes, truck_capacity)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.utils import (
+    Problem,
+    Profile,
+    Solution,
+    build_problem,
+    distance_to_cost,
+    format_solution_output,
+    giant_tour,
+    liter_to_bbl,
+)
+
+CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class SavingsSolver:
+    """Clarke-Wright savings construction heuristic.
+
+    Every oil field starts in its own route. Routes are then merged, best savings
+    first, by linking the end of one route to the start of another while the load
+    fits in a truck. The saving of a merge includes the fixed cost of the truck it
+    frees.
+    """
+
+    cost_matrix: pd.DataFrame
+    locations_info: pd.DataFrame
+    optimal_solution: Solution
+    dist_matrix: pd.DataFrame = None
+    profile: Profile = field(default_factory=Profile)
+
+    def __savings(
+        self, problem: Problem, capacity: float
+    ) -> Iterator[Tuple[int, int, float]]:
+        """Calculates the savings of linking each pair of oil fields whose combined
+        production fits in a truck, sorted from the largest saving.
+
+        Args:
+            problem (Problem): Compiled problem.
+            capacity (float): Truck capacity (bbl).
+
+        Yields:
+            Iterator[Tuple[int, int, float]]: Positions in `problem.fields` of the
+            route end and route start of each link, and its saving.
+        """
+        fields = problem.fields
+        depot = problem.depot
+        savings = (
+            problem.costs[fields, depot][:, None]
+            + problem.costs[depot, fields][None, :]
+            - problem.costs[np.ix_(fields, fields)]
+            + problem.fixed_cost
+        )
+
+        production = problem.production[fields]
+        feasible = production[:, None] + production[None, :] <= capacity
+        np.fill_diagonal(feasible, False)
+
+        tails, heads = np.nonzero(feasible)
+        savings = savings[tails, heads]
+        order = np.argsort(-savings, kind="stable")
+        for start in range(0, len(order), CHUNK_SIZE):
+            chunk = order[start : start + CHUNK_SIZE]
+            yield from zip(
+                tails[chunk].tolist(), heads[chunk].tolist(), savings[chunk].tolist()
+            )
+
+    def __solve(
+        self, problem: Problem, num_trucks: int, capacity: float
+    ) -> Tuple[List[List[int]], float]:
+        """Algorithm that solves the VRP.
+
+        Routes are kept as linked lists of oil fields, with a union-find over them
+        to tell which route each oil field belongs to. Merges with no saving are
+        only made while there are more routes than trucks.
+
+        Args:
+            problem (Problem): Compiled problem.
+            num_trucks (int): Number of available trucks.
+            capacity (float): Truck capacity (bbl).
+
+        Returns:
+            Tuple[List[List[int]], float]: Routes of each truck and total cost.
+        """
+        n = len(problem.fields)
+        if (problem.production[problem.fields] > capacity).any():
+            return [], np.inf
+
+        parent = list(range(n))
+        load = problem.production[problem.fields].tolist()
+        following = [-1] * n
+        is_head = [True] * n
+        is_tail = [True] * n
+        num_routes = n
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j, saving in self.__savings(problem, capacity):
+            if saving <= 0 and num_routes <= num_trucks:
+                break
+            if not (is_tail[i] and is_head[j]):
+                continue
+            ri, rj = find(i), find(j)
+            if ri == rj or load[ri] + load[rj] > capacity:
+                continue
+
+            following[i] = j
+            is_tail[i] = False
+            is_head[j] = False
+            parent[rj] = ri
+            load[ri] += load[rj]
+            num_routes -= 1
+
+        if num_routes > num_trucks:
+            return [], np.inf
+
+        routes = []
+        for i in range(n):
+            if not is_head[i]:
+                continue
+            route = []
+            while i != -1:
+                route += [int(problem.fields[i])]
+                i = following[i]
+            routes += [route]
+        routes += [[] for _ in range(num_trucks - len(routes))]
+
+        total_cost = sum(
+            problem.fixed_cost + problem.route_cost(route) for route in routes if route
+        )
+        return routes, total_cost
+
+    def run(self, num_trucks: int, truck_capacity: float) -> None:
+        """Runs the solver.
+
+        Args:
+            num_trucks (int): Number of available trucks.
+            truck_capacity (float): Total cargo capacity of the trucks.
+        """
+        with self.profile.phase("problem_setup"):
+            problem = build_problem(self.cost_matrix, self.locations_info)
+        with self.profile.phase("search"):
+            routes, optimal_cost = self.__solve(
+                problem=problem,
+                num_trucks=num_trucks,
+                capacity=liter_to_bbl(volume=truck_capacity),
+            )
+
+        with self.profile.phase("build_solution"):
+            solution = problem.build_solution(
+                *giant_tour(routes), truck_capacity, optimal_cost
+            )
+        self.optimal_solution.assign(solution)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from src.utils import DistanceMatrix
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    locations_path = os.path.join(current_path, "..", "data", "locations.csv")
+    locations = pd.read_csv(locations_path, sep=";", index_col=False, encoding="UTF-8")
+
+    distance_matrix = DistanceMatrix(input_data=locations)
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62,
+        truck_consumption=17.5,
+        dist_matrix=distance_matrix.matrix,
+    )
+
+    solver = SavingsSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+
+    truck_capacity = 10000
+    start = time.time()
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+    duration = time.time() - start
+
+    format_solution_output(solver, truck_capacity, duration)
@@ -0,0 +1,284 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import product
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, "../")
+
+from src.global_search import GlobalSolver
+from src.utils import DistanceCache, DistanceMatrix, Solution, distance_to_cost
+
+SolveTask = Tuple[int, float, float]
+EXACT_SOLVERS = ("global", "partition")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    diesel_price: float
+    truck_consumption: float
+    num_trucks: int
+    truck_capacity: float
+
+    @property
+    def ratio(self) -> float:
+        """Returns the fuel cost per km, which scales the whole cost matrix."""
+        return self.diesel_price / self.truck_consumption
+
+
+@dataclass
+class ScenarioSweep:
+    """Solves a grid of scenarios over the same locations and distance matrix.
+
+    The cost matrix is the distance matrix scaled by the fuel cost per km, so for a
+    given fleet the cost of a solution is `fixed_cost * trucks + ratio * distance`,
+    a line in the ratio. The optimal cost over all solutions is therefore concave
+    in the ratio, and a solution that is optimal at two ratios stays optimal at
+    every ratio between them. For each fleet size and capacity the sweep solves the
+    lowest and highest ratios, re-prices the scenarios in between when both give
+    the same routes, and bisects the range otherwise. Solves of the same round run
+    in a pool of `workers` processes.
+
+    The argument only holds for optimal solutions. With a heuristic `solver`,
+    `exact` must be False, and every scenario is solved.
+    """
+
+    locations_info: pd.DataFrame
+    dist_matrix: pd.DataFrame
+    solver: type = GlobalSolver
+    exact: bool = True
+    workers: int = 1
+    solves: int = field(default=0, init=False)
+
+    def __routes_key(self, solution: Solution) -> Tuple:
+        """Identifies the routes of a solution, regardless of the truck order.
+
+        Args:
+            solution (Solution): Solution to identify.
+
+        Returns:
+            Tuple: Sorted tuple with the oil field names of each used truck.
+        """
+        return tuple(
+            sorted(tuple(f.name for f in t.route) for t in solution.trucks if t.route)
+        )
+
+    def __reprice(self, solution: Solution, factor: float) -> Solution:
+        """Scales the variable costs of a solution to another fuel cost per km.
+
+        Args:
+            solution (Solution): Solution priced at the original ratio.
+            factor (float): New ratio divided by the original one.
+
+        Returns:
+            Solution: Same routes at the new ratio.
+        """
+        if not np.isfinite(solution.total_cost):
+            return Solution(trucks=[], total_cost=np.inf)
+        trucks = [replace(t, var_cost=t.var_cost * factor) for t in solution.trucks]
+        total_cost = sum(t.fixed_cost + t.var_cost for t in trucks if t.route)
+        return Solution(trucks=trucks, total_cost=total_cost)
+
+    def __solve_all(
+        self, tasks: List[SolveTask], executor: ProcessPoolExecutor
+    ) -> List[Solution]:
+        """Solves a batch of (num_trucks, truck_capacity, ratio) tasks.
+
+        Args:
+            tasks (List[SolveTask]): Fleet size, capacity and fuel cost per km of
+                each task.
+            executor (ProcessPoolExecutor): Worker pool, or None to solve in this
+                process.
+
+        Returns:
+            List[Solution]: Solution of each task.
+        """
+        self.solves += len(tasks)
+        if executor is None or len(tasks) == 1:
+            _init_worker(self.locations_info, self.dist_matrix, self.solver)
+            return [_solve(*task) for task in tasks]
+        return list(executor.map(_solve, *zip(*tasks)))
+
+    def run(self, scenarios: List[Scenario]) -> List[Tuple[Solution, bool]]:
+        """Solves every scenario.
+
+        Args:
+            scenarios (List[Scenario]): Scenarios to be solved.
+
+        Returns:
+            List[Tuple[Solution, bool]]: Solution of each scenario and whether it
+            came from a solver run (True) or from re-pricing another one (False).
+        """
+        self.solves = 0
+        groups: Dict[Tuple[int, float], List[float]] = {}
+        for s in scenarios:
+            groups.setdefault((s.num_trucks, s.truck_capacity), []).append(s.ratio)
+        ratios = {group: sorted(set(values)) for group, values in groups.items()}
+
+        solved: Dict[Tuple[int, float, float], Solution] = {}
+        repriced: Dict[Tuple[int, float, float], Solution] = {}
+        pending = []
+        intervals = []
+        for (num_trucks, capacity), values in ratios.items():
+            if not self.exact:
+                pending += [(num_trucks, capacity, ratio) for ratio in values]
+                continue
+            pending += [(num_trucks, capacity, values[0])]
+            if len(values) > 1:
+                pending += [(num_trucks, capacity, values[-1])]
+                intervals += [(num_trucks, capacity, 0, len(values) - 1)]
+
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.locations_info, self.dist_matrix, self.solver),
+            )
+        try:
+            while pending:
+                solutions = self.__solve_all(pending, executor)
+                for task, solution in zip(pending, solutions):
+                    solved[task] = solution
+
+                pending, split = [], []
+                for num_trucks, capacity, lo, hi in intervals:
+                    values = ratios[(num_trucks, capacity)]
+                    low = solved[(num_trucks, capacity, values[lo])]
+                    high = solved[(num_trucks, capacity, values[hi])]
+                    if self.__routes_key(low) == self.__routes_key(high):
+                        for ratio in values[lo + 1 : hi]:
+                            repriced[(num_trucks, capacity, ratio)] = self.__reprice(
+                                low, ratio / values[lo]
+                            )
+                    elif hi - lo > 1:
+                        mid = (lo + hi) // 2
+                        pending += [(num_trucks, capacity, values[mid])]
+                        split += [
+                            (num_trucks, capacity, lo, mid),
+                            (num_trucks, capacity, mid, hi),
+                        ]
+                intervals = split
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        results = []
+        for s in scenarios:
+            key = (s.num_trucks, s.truck_capacity, s.ratio)
+            if key in solved:
+                results += [(solved[key], True)]
+            else:
+                results += [(repriced[key], False)]
+        return results
+
+
+_locations = None
+_dist_matrix = None
+_solver = None
+
+
+def _init_worker(
+    locations_info: pd.DataFrame, dist_matrix: pd.DataFrame, solver: type
+) -> None:
+    """Stores the locations, the distance matrix and the solver class in a worker.
+
+    Args:
+        locations_info (pd.DataFrame): Locations info.
+        dist_matrix (pd.DataFrame): Distance matrix.
+        solver (type): Solver class.
+    """
+    global _locations, _dist_matrix, _solver
+    _locations = locations_info
+    _dist_matrix = dist_matrix
+    _solver = solver
+
+
+def _solve(num_trucks: int, truck_capacity: float, ratio: float) -> Solution:
+    """Solves one fleet configuration at a fuel cost per km.
+
+    Args:
+        num_trucks (int): Number of available trucks.
+        truck_capacity (float): Total cargo capacity of the trucks.
+        ratio (float): Diesel price divided by the truck consumption.
+
+    Returns:
+        Solution: Solution found by the solver.
+    """
+    solver = _solver(
+        cost_matrix=distance_to_cost(
+            diesel_price=ratio, truck_consumption=1.0, dist_matrix=_dist_matrix
+        ),
+        locations_info=_locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+        dist_matrix=_dist_matrix,
+    )
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    return solver.optimal_solution
+
+
+if __name__ == "__main__":
+    from src.benchmark import SOLVERS
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description="Solves every combination of the given scenario values."
+    )
+    parser.add_argument(
+        "--locations",
+        default=os.path.join(current_path, "..", "data", "locations_reduced.csv"),
+    )
+    parser.add_argument("--prices", nargs="+", type=float, required=True)
+    parser.add_argument("--consumptions", nargs="+", type=float, required=True)
+    parser.add_argument("--trucks", nargs="+", type=int, required=True)
+    parser.add_argument("--capacities", nargs="+", type=float, required=True)
+    parser.add_argument("--solver", choices=list(SOLVERS), default="global")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="Writes the results as a CSV file.")
+    args = parser.parse_args()
+
+    locations = pd.read_csv(args.locations, sep=";", index_col=False, encoding="UTF-8")
+    cache_path = os.path.join(current_path, "..", "data", "distance_cache.csv")
+    distance_matrix = DistanceMatrix(
+        input_data=locations, cache=DistanceCache(path=cache_path)
+    )
+    distance_matrix.calculate()
+
+    scenarios = [
+        Scenario(*values)
+        for values in product(
+            args.prices, args.consumptions, args.trucks, args.capacities
+        )
+    ]
+    sweep = ScenarioSweep(
+        locations_info=locations,
+        dist_matrix=distance_matrix.matrix,
+        solver=SOLVERS[args.solver],
+        exact=args.solver in EXACT_SOLVERS,
+        workers=args.workers,
+    )
+    results = sweep.run(scenarios)
+
+    table = pd.DataFrame(
+        [
+            {
+                "DieselPrice": s.diesel_price,
+                "TruckConsumption": s.truck_consumption,
+                "Trucks": s.num_trucks,
+                "TruckCapacity": s.truck_capacity,
+                "TotalCost": solution.total_cost,
+                "TrucksUsed": sum(1 for t in solution.trucks if t.route),
+                "Solved": solved,
+            }
+            for s, (solution, solved) in zip(scenarios, results)
+        ]
+    )
+    print(table.to_string(index=False))
+    print(f"{sweep.solves} solver runs for {len(scenarios)} scenarios.")
+    if args.output:
+        table.to_csv(args.output, sep=";", index=False)
@@ -1,15 +1,45 @@
+from importlib import import_module
+
 from .converter import distance_to_cost, liter_to_bbl
-from .distance_matrix import DistanceMatrix
-from .models import Location, OilField, Solution, Truck
+from .fleet import FleetBounds, fleet_bounds
+from .models import Location, OilField, Solution, Truck, giant_tour
+from .problem import Problem, build_problem
+from .profiling import Profile
 from .utils import format_solution_output
 
 __all__ = [
+    "DistanceCache",
     "DistanceMatrix",
+    "haversine_matrix",
+    "MatrixStore",
     "distance_to_cost",
     "liter_to_bbl",
+    "FleetBounds",
+    "fleet_bounds",
     "Solution",
     "Location",
     "OilField",
     "Truck",
+    "giant_tour",
+    "Problem",
+    "build_problem",
+    "Profile",
     "format_solution_output",
 ]
+
+# Helpers that need pandas, requests or python-dotenv are only imported when first
+# used, so the solver core can be imported without them.
+_LAZY = {
+    "DistanceCache": ".distance_cache",
+    "DistanceMatrix": ".distance_matrix",
+    "haversine_matrix": ".distance_matrix",
+    "MatrixStore": ".matrix_store",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
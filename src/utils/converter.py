@@ -1,6 +1,12 @@
+from __future__ import annotations
+
 import os
+from typing import TYPE_CHECKING
+
+import numpy as np
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def liter_to_bbl(volume: float) -> float:
@@ -20,34 +26,46 @@ def distance_to_cost(
     diesel_price: float,
     truck_consumption: float,
     dist_matrix: pd.DataFrame,
+    inplace: bool = False,
 ) -> pd.DataFrame:
     """Converts the distance matrix into a cost matrix.
 
+    The whole matrix is scaled at once. With `inplace`, the distance matrix itself
+    is scaled and returned, so no copy is made; a matrix loaded from a MatrixStore
+    must then be mapped copy-on-write ("c") or writable ("r+").
+
     Args:
         diesel_price (float): Diesel cost per liter.
         truck_consumption (float): Truck's distance traveled per liter of diesel.
         dist_matrix (pd.DataFrame): Distance matrix.
+        inplace (bool, optional): Whether to scale the distance matrix in place.
+            Defaults to False.
 
     Returns:
         pd.DataFrame: Cost matrix.
     """
     ratio = diesel_price / truck_consumption
-    #print(dist_matrix)
-    cost_matrix = dist_matrix.copy()
-    for col in dist_matrix.columns:
-        cost_matrix[col] = dist_matrix[col] * ratio
-    return cost_matrix
+    if not inplace:
+        return dist_matrix * ratio
+
+    values = dist_matrix.to_numpy()
+    np.multiply(values, ratio, out=values)
+    if not np.shares_memory(values, dist_matrix.to_numpy()):
+        dist_matrix.loc[:, :] = values
+    return dist_matrix
 
 
 if __name__ == "__main__":
+    import sys
 
     current_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(current_path, "..", ".."))
+
+    from src.utils.matrix_store import MatrixStore
+
     distance_matrix_path = os.path.join(
-        current_path, "..", "..", "data", "distance_matrix.csv"
+        current_path, "..", "..", "data", "distance_matrix.npy"
     )
 
-    distance_matrix = pd.read_csv(distance_matrix_path, sep=";", index_col=0)
-    distance_matrix.index = distance_matrix["Name"]
-    distance_matrix.drop(columns=["Name"], inplace=True)
-    cost_matrix = distance_to_cost(6.62, 17.5, distance_matrix)
-    #print(cost_matrix)
+    distance_matrix = MatrixStore(path=distance_matrix_path).load(mmap_mode="c")
+    cost_matrix = distance_to_cost(6.62, 17.5, distance_matrix, inplace=True)
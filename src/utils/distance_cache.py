@@ -0,0 +1,106 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+Coordinates = Tuple[float, float]
+
+
+@dataclass
+class DistanceCache:
+    """On-disk cache of pairwise road distances keyed by rounded coordinates.
+
+    The cache is stored as a semicolon separated CSV with one origin/destination
+    pair per line, and is read back when the object is created.
+    """
+
+    path: str
+    precision: int = 5
+    distances: Dict[Tuple[Coordinates, Coordinates], float] = field(
+        default_factory=dict
+    )
+
+    def __post_init__(self) -> None:
+        if os.path.exists(self.path):
+            self.load()
+
+    def key(self, latitude: float, longitude: float) -> Coordinates:
+        """Rounds a pair of coordinates to the cache precision.
+
+        Args:
+            latitude (float): Latitude in degrees.
+            longitude (float): Longitude in degrees.
+
+        Returns:
+            Coordinates: Rounded coordinates.
+        """
+        return (
+            round(float(latitude), self.precision),
+            round(float(longitude), self.precision),
+        )
+
+    def lookup(
+        self, origins: List[Coordinates], destinations: List[Coordinates]
+    ) -> np.ndarray:
+        """Builds the distance matrix between locations from the cached pairs.
+
+        Args:
+            origins (List[Coordinates]): Coordinates of the origins.
+            destinations (List[Coordinates]): Coordinates of the destinations.
+
+        Returns:
+            np.ndarray: Distance matrix, with NaN where the pair is not cached.
+        """
+        origins = [self.key(*o) for o in origins]
+        destinations = [self.key(*d) for d in destinations]
+        distances = [
+            [self.distances.get((o, d), np.nan) for d in destinations] for o in origins
+        ]
+        return np.array(distances, dtype=np.float64).reshape(
+            len(origins), len(destinations)
+        )
+
+    def update(
+        self,
+        origins: List[Coordinates],
+        destinations: List[Coordinates],
+        distances: np.ndarray,
+    ) -> None:
+        """Stores the distances between locations in the cache.
+
+        Args:
+            origins (List[Coordinates]): Coordinates of the origins.
+            destinations (List[Coordinates]): Coordinates of the destinations.
+            distances (np.ndarray): Distance matrix between origins and destinations.
+        """
+        destinations = [self.key(*d) for d in destinations]
+        for o, row in zip(origins, distances):
+            o = self.key(*o)
+            for d, distance in zip(destinations, row):
+                if not np.isnan(distance):
+                    self.distances[(o, d)] = float(distance)
+
+    def load(self) -> None:
+        """Reads the cached distances from disk."""
+        df = pd.read_csv(self.path, sep=";")
+        origins = zip(df["OriginLatitude"], df["OriginLongitude"])
+        destinations = zip(df["DestinationLatitude"], df["DestinationLongitude"])
+        for o, d, distance in zip(origins, destinations, df["Distance"]):
+            self.distances[(self.key(*o), self.key(*d))] = float(distance)
+
+    def save(self) -> None:
+        """Writes the cached distances to disk."""
+        rows = [(*o, *d, distance) for (o, d), distance in self.distances.items()]
+        df = pd.DataFrame(
+            rows,
+            columns=[
+                "OriginLatitude",
+                "OriginLongitude",
+                "DestinationLatitude",
+                "DestinationLongitude",
+                "Distance",
+            ],
+        )
+        df.to_csv(self.path, sep=";", index=False)
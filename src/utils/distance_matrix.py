@@ -1,22 +1,100 @@
+from __future__ import annotations
+
 import os
+import random
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
-import requests
-from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    import requests
+
+from .distance_cache import DistanceCache
+from .matrix_store import MatrixStore
+
+EARTH_RADIUS_KM = 6371.0088
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def haversine_matrix(
+    latitudes: np.ndarray, longitudes: np.ndarray, circuity: float = 1.0
+) -> np.ndarray:
+    """Calculates the great-circle distance between every pair of coordinates.
+
+    The haversine of each central angle is taken from the dot product of the
+    locations' unit vectors, so the whole matrix comes from a single matrix product
+    and a few in-place operations.
+
+    Args:
+        latitudes (np.ndarray): Latitudes in degrees.
+        longitudes (np.ndarray): Longitudes in degrees.
+        circuity (float): Ratio between road and great-circle distances.
+
+    Returns:
+        np.ndarray: Distance matrix in km.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    points = np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+    distances = points @ points.T
+    np.subtract(1.0, distances, out=distances)
+    distances *= 0.5
+    np.clip(distances, 0.0, 1.0, out=distances)
+    np.sqrt(distances, out=distances)
+    np.arcsin(distances, out=distances)
+    distances *= 2 * EARTH_RADIUS_KM * circuity
+    np.fill_diagonal(distances, 0.0)
+    return distances
 
 
 @dataclass
 class DistanceMatrix:
+    """Distance matrix between the input locations.
+
+    The "api" backend requests road distances from the Bing Maps API and, when
+    `fallback` is set, falls back to the "haversine" backend if the request fails;
+    otherwise the request error is raised. The "haversine" backend works offline,
+    scaling great-circle distances by a road-circuity factor. When a `cache` is
+    given, the API is only asked for the pairs of locations that are not cached
+    yet. Fallback distances are never cached.
+
+    API requests are split into tiles of at most `max_elements` pairs, fetched by
+    `max_workers` threads and retried with exponential backoff. `url` overrides the
+    service endpoint, e.g. to point at the local stub server.
+    """
 
     input_data: pd.DataFrame
     matrix: pd.DataFrame = None
+    backend: str = "api"
+    fallback: bool = True
+    circuity: float = 1.3
+    cache: DistanceCache = None
+    url: str = None
+    max_elements: int = 2500
+    max_workers: int = 4
+    max_retries: int = 3
+    backoff: float = 0.5
+    timeout: float = 60
 
-    def __format_payload(self) -> Dict:
+    def __format_payload(
+        self, origins: pd.DataFrame, destinations: pd.DataFrame
+    ) -> Dict:
         """Builds dictionary with origins and destinations info to be
         sent as payload in the API request.
 
+        Args:
+            origins (pd.DataFrame): Locations where the trips start.
+            destinations (pd.DataFrame): Locations where the trips end.
+
         Returns:
             Dict: Dictionary with the payload info for the API.
         """
@@ -26,42 +104,59 @@ class DistanceMatrix:
             "travelMode": "driving",
         }
 
-        for lat, long in zip(self.input_data["Latitude"], self.input_data["Longitude"]):
-            entry = {}
-            entry["latitude"] = lat
-            entry["longitude"] = long
-            payload["origins"] += [entry]
-            payload["destinations"] += [entry]
+        for lat, long in zip(origins["Latitude"], origins["Longitude"]):
+            payload["origins"] += [{"latitude": lat, "longitude": long}]
+        for lat, long in zip(destinations["Latitude"], destinations["Longitude"]):
+            payload["destinations"] += [{"latitude": lat, "longitude": long}]
 
         return payload
 
-    def __format_output(self, data: Dict) -> pd.DataFrame:
-        """Formats output from API request as a DataFrame.
+    def __format_output(
+        self, data: Dict, num_origins: int, num_destinations: int
+    ) -> np.ndarray:
+        """Formats output from API request as a distance array.
+
+        The results are gathered into index and value arrays and scattered into the
+        matrix at once. Pairs missing from the response are left as NaN.
 
         Args:
             data (Dict): JSON data from API response.
+            num_origins (int): Number of origins in the request.
+            num_destinations (int): Number of destinations in the request.
 
         Returns:
-            pd.DataFrame: DataFrame containing distance matrix.
+            np.ndarray: Distance matrix.
         """
-        cols = list(self.input_data["Name"])
-        cols.insert(0, "Name")
-        df = pd.DataFrame(columns=cols)
-        df["Name"] = self.input_data["Name"]
+        results = data["resourceSets"][0]["resources"][0]["results"]
+        origin_idx = np.fromiter(
+            map(itemgetter("originIndex"), results), dtype=np.intp, count=len(results)
+        )
+        destination_idx = np.fromiter(
+            map(itemgetter("destinationIndex"), results),
+            dtype=np.intp,
+            count=len(results),
+        )
+        values = np.fromiter(
+            map(itemgetter("travelDistance"), results),
+            dtype=np.float64,
+            count=len(results),
+        )
 
-        for r in data["resourceSets"][0]["resources"][0]["results"]:
-            df.iloc[r["originIndex"], r["destinationIndex"] + 1] = r["travelDistance"]
-        df.index = df["Name"]
-        df.drop(columns=["Name"], inplace=True)
-        return df
+        distances = np.full((num_origins, num_destinations), np.nan)
+        distances[origin_idx, destination_idx] = values
+        return distances
 
-    def calculate(self) -> None:
-        """Calculates the distance matrix of the input locations.
+    def __api_url(self) -> str:
+        """Builds the URL of the distance matrix service.
 
-        Raises:
-            err: API request error.
+        Returns:
+            str: Request URL.
         """
-        
+        if self.url is not None:
+            return self.url
+
+        from dotenv import load_dotenv
+
         # Loading .env info
         current_path = os.path.dirname(os.path.abspath(__file__))
         dotenv_path = os.path.join(current_path, "..", "..", ".env")
@@ -69,39 +164,276 @@ class DistanceMatrix:
 
         # Setting up request URL
         api_key = os.getenv("BING_MAPS_KEY")
-        url = (
+        return (
             f"https://dev.virtualearth.net/REST/v1/Routes/DistanceMatrix?key={api_key}"
         )
 
-        payload = self.__format_payload()
+    def __tiles(
+        self, num_origins: int, num_destinations: int
+    ) -> List[Tuple[slice, slice]]:
+        """Splits the distance matrix into tiles that respect the API limit of
+        origin/destination pairs per request.
+
+        Args:
+            num_origins (int): Number of origins.
+            num_destinations (int): Number of destinations.
+
+        Returns:
+            List[Tuple[slice, slice]]: Origin and destination ranges of each tile.
+        """
+        cols = min(num_destinations, self.max_elements)
+        rows = max(1, min(num_origins, self.max_elements // cols))
+        return [
+            (slice(i, i + rows), slice(j, j + cols))
+            for i in range(0, num_origins, rows)
+            for j in range(0, num_destinations, cols)
+        ]
+
+    def __error_details(self, res: requests.Response) -> str:
+        """Reads the error details of a failed API response.
 
+        Args:
+            res (requests.Response): Failed response.
+
+        Returns:
+            str: Error details reported by the API, or the response body.
+        """
         try:
+            details = res.json().get("errorDetails")
+        except (ValueError, AttributeError):
+            details = None
+        return " ".join(details) if details else res.text
+
+    def __request_tile(
+        self,
+        session: requests.Session,
+        url: str,
+        origins: pd.DataFrame,
+        destinations: pd.DataFrame,
+    ) -> np.ndarray:
+        """Requests one tile of the distance matrix, retrying with exponential
+        backoff on connection errors, on throttled or failed responses and on
+        responses that miss some pairs.
 
-            res = requests.post(
-                url=url,
-                json=payload,
-            )
+        Args:
+            session (requests.Session): Pooled HTTP session.
+            url (str): Request URL.
+            origins (pd.DataFrame): Locations where the trips start.
+            destinations (pd.DataFrame): Locations where the trips end.
 
-            if res.status_code == 200:
-                output = self.__format_output(res.json())
-                self.matrix = output
-                return
+        Raises:
+            err: API request error, after the last retry.
+            requests.HTTPError: The API answers with an error that is not worth
+                retrying, or keeps failing or missing pairs after the last retry.
+
+        Returns:
+            np.ndarray: Distance matrix of the tile.
+        """
+        import requests
+
+        payload = self.__format_payload(origins, destinations)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = session.post(url=url, json=payload, timeout=self.timeout)
+            except requests.RequestException as err:
+                if attempt == self.max_retries:
+                    raise err
             else:
-                return
+                if res.status_code == 200:
+                    distances = self.__format_output(
+                        res.json(), len(origins), len(destinations)
+                    )
+                    if not np.isnan(distances).any():
+                        return distances
+                    if attempt == self.max_retries:
+                        raise requests.HTTPError(
+                            "Distance matrix response misses some pairs.",
+                            response=res,
+                        )
+                elif res.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    raise requests.HTTPError(
+                        f"Distance matrix request failed with status "
+                        f"{res.status_code}: {self.__error_details(res)}",
+                        response=res,
+                    )
+            time.sleep(self.backoff * 2**attempt * random.uniform(1.0, 1.5))
+
+    def __request_api(
+        self, origins: pd.DataFrame, destinations: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Requests the distance matrix from the Bing Maps API. The matrix is split
+        into tiles that are requested concurrently over a pooled session.
+
+        Args:
+            origins (pd.DataFrame): Locations where the trips start.
+            destinations (pd.DataFrame): Locations where the trips end.
+
+        Raises:
+            err: API request error.
 
+        Returns:
+            pd.DataFrame: DataFrame containing distance matrix.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        url = self.__api_url()
+        tiles = self.__tiles(len(origins), len(destinations))
+
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(
+                    executor.map(
+                        lambda tile: self.__request_tile(
+                            session,
+                            url,
+                            origins.iloc[tile[0]],
+                            destinations.iloc[tile[1]],
+                        ),
+                        tiles,
+                    )
+                )
+
+        distances = np.empty((len(origins), len(destinations)), dtype=np.float64)
+        for (rows, cols), result in zip(tiles, results):
+            distances[rows, cols] = result
+        return pd.DataFrame(
+            distances,
+            index=pd.Index(list(origins["Name"]), name="Name"),
+            columns=list(destinations["Name"]),
+        )
+
+    def __missing_blocks(self, missing: np.ndarray) -> List[Tuple[np.ndarray, ...]]:
+        """Groups the missing pairs of the distance matrix into a few rectangular
+        blocks of origins and destinations to be requested.
+
+        Locations without any cached pair are requested against every location, and
+        the few pairs still missing between known locations go in a last block.
+
+        Args:
+            missing (np.ndarray): Whether each pair is missing from the cache.
+
+        Returns:
+            List[Tuple[np.ndarray, ...]]: Origin and destination positions of each
+            block.
+        """
+        new = missing.all(axis=1) & missing.all(axis=0)
+        everything = np.arange(len(missing))
+        blocks = []
+        if new.any():
+            blocks += [(np.flatnonzero(new), everything)]
+            if not new.all():
+                blocks += [(np.flatnonzero(~new), np.flatnonzero(new))]
+
+        rest = missing & ~new[:, None] & ~new[None, :]
+        if rest.any():
+            origins = np.flatnonzero(rest.any(axis=1))
+            destinations = np.flatnonzero(rest.any(axis=0))
+            blocks += [(origins, destinations)]
+        return blocks
+
+    def __request_cached(self) -> pd.DataFrame:
+        """Builds the distance matrix from the cache, requesting only the pairs of
+        locations that are not cached yet and storing them.
+
+        Raises:
+            err: API request error.
+
+        Returns:
+            pd.DataFrame: DataFrame containing distance matrix.
+        """
+        coordinates = list(
+            zip(self.input_data["Latitude"], self.input_data["Longitude"])
+        )
+        distances = self.cache.lookup(coordinates, coordinates)
+
+        missing = np.isnan(distances)
+        if missing.any():
+            for origins, destinations in self.__missing_blocks(missing):
+                block = self.__request_api(
+                    self.input_data.iloc[origins], self.input_data.iloc[destinations]
+                )
+                block = block.to_numpy(dtype=np.float64)
+                distances[np.ix_(origins, destinations)] = block
+                self.cache.update(
+                    [coordinates[i] for i in origins],
+                    [coordinates[j] for j in destinations],
+                    block,
+                )
+            self.cache.save()
+
+        names = list(self.input_data["Name"])
+        return pd.DataFrame(
+            distances, index=pd.Index(names, name="Name"), columns=names
+        )
+
+    def __calculate_haversine(self) -> pd.DataFrame:
+        """Estimates the road distance matrix from the locations' coordinates.
+
+        Returns:
+            pd.DataFrame: DataFrame containing distance matrix.
+        """
+        names = list(self.input_data["Name"])
+        distances = haversine_matrix(
+            latitudes=self.input_data["Latitude"].to_numpy(),
+            longitudes=self.input_data["Longitude"].to_numpy(),
+            circuity=self.circuity,
+        )
+        return pd.DataFrame(
+            distances, index=pd.Index(names, name="Name"), columns=names
+        )
+
+    def calculate(self) -> None:
+        """Calculates the distance matrix of the input locations.
+
+        Raises:
+            err: API request error, with the status and error details of a failed
+                response, when the fallback is disabled.
+            ValueError: Unknown backend.
+        """
+        if self.backend == "haversine":
+            self.matrix = self.__calculate_haversine()
+            return
+        if self.backend != "api":
+            raise ValueError(f"Unknown distance matrix backend: {self.backend}")
+
+        # The HTTP client is only needed, and imported, by the API backend
+        import requests
+
+        try:
+            if self.cache is None:
+                self.matrix = self.__request_api(self.input_data, self.input_data)
+            else:
+                self.matrix = self.__request_cached()
         except requests.RequestException as err:
-            raise err
+            if not self.fallback:
+                raise err
+            warnings.warn(f"Distance matrix request failed: {err}")
+            warnings.warn("Using great-circle distances as the distance matrix.")
+            self.matrix = self.__calculate_haversine()
+
+    def store_backup(self, path: str = None) -> None:
+        """Saves a backup Distance Matrix as a MatrixStore, or as a CSV file when the
+        path ends in .csv.
 
-    def store_backup(self) -> None:
-        """Saves a backup Distance Matrix as a CSV file in the data directory."""
+        Args:
+            path (str, optional): Backup path. Defaults to distance_matrix.npy in
+                the data directory.
+        """
         self.calculate()
 
-        current_path = os.path.dirname(os.path.abspath(__file__))
-        backup_path = os.path.join(
-            current_path, "..", "..", "data", "distance_matrix.csv"
-        )
+        if path is None:
+            current_path = os.path.dirname(os.path.abspath(__file__))
+            path = os.path.join(current_path, "..", "..", "data", "distance_matrix.npy")
 
-        self.matrix.to_csv(backup_path, sep=";")
+        if path.endswith(".csv"):
+            self.matrix.to_csv(path, sep=";")
+        else:
+            MatrixStore(path=path).save(self.matrix, self.input_data)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# Tolerance of the load comparisons, as in the solvers
+EPSILON = 1e-9
+
+
+@dataclass
+class FleetBounds:
+    """Bin-packing bounds on the number of trucks an instance needs.
+
+    Routing never makes a packing infeasible, so an instance can be solved exactly
+    when its oil fields can be packed into the trucks. `min_trucks` is a lower
+    bound on the trucks any solution uses, and `ffd_trucks` the trucks of a
+    first-fit-decreasing packing, which proves that the fleet is large enough.
+    Every used truck visits at least one oil field, so no solution uses more than
+    `max_trucks` of the available ones.
+    """
+
+    num_trucks: int
+    min_trucks: int
+    ffd_trucks: int
+    max_trucks: int
+    fits: bool = True
+
+    @property
+    def infeasible(self) -> bool:
+        """Returns whether no solution exists: some oil field does not fit in a
+        truck, or the fleet is below the lower bound."""
+        return not self.fits or self.min_trucks > self.num_trucks
+
+    @property
+    def feasible(self) -> bool:
+        """Returns whether the first-fit-decreasing packing proves that a solution
+        exists."""
+        return self.fits and self.ffd_trucks <= self.num_trucks
+
+
+def l1_bound(production: np.ndarray, capacity: float) -> int:
+    """Calculates the continuous lower bound on the number of trucks.
+
+    Args:
+        production (np.ndarray): Production of each oil field (bbl).
+        capacity (float): Truck capacity (bbl).
+
+    Returns:
+        int: Total production over the capacity, rounded up.
+    """
+    if not len(production):
+        return 0
+    return math.ceil(float(production.sum()) / capacity - EPSILON)
+
+
+def l2_bound(production: np.ndarray, capacity: float) -> int:
+    """Calculates the Martello-Toth L2 lower bound on the number of trucks.
+
+    For each threshold a <= capacity / 2, fields above capacity - a fit with no
+    other field, fields above capacity / 2 need a truck each, and the fields
+    between a and capacity / 2 fill the room the latter leave before opening more
+    trucks. Fields below a are ignored. Every production up to capacity / 2 is
+    tried as a threshold at once, with prefix sums over the sorted productions.
+
+    Args:
+        production (np.ndarray): Production of each oil field (bbl), each one at
+            most the capacity.
+        capacity (float): Truck capacity (bbl).
+
+    Returns:
+        int: L2 bound, which is never below L1.
+    """
+    if not len(production):
+        return 0
+    loads = np.sort(production)
+    sums = np.concatenate(([0.0], np.cumsum(loads)))
+    half = capacity / 2
+
+    thresholds = np.unique(np.concatenate(([0.0], loads[loads <= half + EPSILON])))
+    small = np.searchsorted(loads, thresholds - EPSILON, side="left")
+    medium = np.searchsorted(loads, half + EPSILON, side="right")
+    large = np.searchsorted(loads, capacity - thresholds + EPSILON, side="right")
+
+    big = len(loads) - medium
+    room = (large - medium) * capacity - (sums[large] - sums[medium])
+    fill = sums[medium] - sums[small]
+    extra = np.ceil(np.maximum(0.0, fill - room) / capacity - EPSILON)
+    return max(big + int(extra.max()), l1_bound(loads, capacity))
+
+
+def first_fit_decreasing(production: np.ndarray, capacity: float) -> np.ndarray:
+    """Packs the oil fields into trucks, the largest productions first, each into
+    the first truck with room.
+
+    Args:
+        production (np.ndarray): Production of each oil field (bbl), each one at
+            most the capacity.
+        capacity (float): Truck capacity (bbl).
+
+    Returns:
+        np.ndarray: Truck of each oil field.
+    """
+    trucks = np.zeros(len(production), dtype=np.int64)
+    loads = np.zeros(len(production))
+    used = 0
+    for i in np.argsort(-production, kind="stable"):
+        fits = np.flatnonzero(loads[:used] + production[i] <= capacity + EPSILON)
+        truck = int(fits[0]) if len(fits) else used
+        used = max(used, truck + 1)
+        loads[truck] += production[i]
+        trucks[i] = truck
+    return trucks
+
+
+def fleet_bounds(
+    production: np.ndarray, capacity: float, num_trucks: int
+) -> FleetBounds:
+    """Bounds the number of trucks needed to carry the oil fields.
+
+    Args:
+        production (np.ndarray): Production of each oil field (bbl).
+        capacity (float): Truck capacity (bbl).
+        num_trucks (int): Number of available trucks.
+
+    Returns:
+        FleetBounds: Lower, first-fit-decreasing and maximum useful numbers of
+        trucks.
+    """
+    production = np.asarray(production, dtype=np.float64)
+    max_trucks = min(num_trucks, len(production))
+    if (production > capacity + EPSILON).any():
+        return FleetBounds(
+            num_trucks=num_trucks,
+            min_trucks=len(production),
+            ffd_trucks=len(production),
+            max_trucks=max_trucks,
+            fits=False,
+        )
+    packing = first_fit_decreasing(production, capacity)
+    return FleetBounds(
+        num_trucks=num_trucks,
+        min_trucks=l2_bound(production, capacity),
+        ffd_trucks=int(packing.max()) + 1 if len(packing) else 0,
+        max_trucks=max_trucks,
+    )
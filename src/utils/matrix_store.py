@@ -0,0 +1,114 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class MatrixStore:
+    """Binary store of a square matrix between named locations.
+
+    The matrix is kept in a `.npy` file that is loaded as a memory map, so it is
+    read without parsing nor copying, and every process that loads it shares the
+    same pages of the OS cache. A sidecar CSV next to it, `<name>.index.csv`, lists
+    the name and coordinates of the location of each row and column.
+    """
+
+    path: str
+    dtype: type = np.float64
+
+    @property
+    def index_path(self) -> str:
+        """Returns the path of the sidecar index."""
+        return os.path.splitext(self.path)[0] + ".index.csv"
+
+    def exists(self) -> bool:
+        """Checks whether both the matrix and its index were written.
+
+        Returns:
+            bool: Whether the store can be loaded.
+        """
+        return os.path.exists(self.path) and os.path.exists(self.index_path)
+
+    def save(self, matrix: pd.DataFrame, locations: pd.DataFrame) -> None:
+        """Writes the matrix and its index. Both files are replaced atomically, so
+        processes that already mapped the old matrix keep reading it.
+
+        Args:
+            matrix (pd.DataFrame): Square matrix indexed by location names.
+            locations (pd.DataFrame): Locations info, indexed by name or with a
+                "Name" column, with their Latitude and Longitude.
+        """
+        if "Name" in locations.columns:
+            locations = locations.set_index("Name")
+        names = list(matrix.index)
+        index = pd.DataFrame(
+            {
+                "Name": names,
+                "Latitude": locations.loc[names, "Latitude"].to_numpy(),
+                "Longitude": locations.loc[names, "Longitude"].to_numpy(),
+            }
+        )
+
+        tmp_path = f"{self.path}.tmp"
+        values = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=self.dtype, shape=matrix.shape
+        )
+        values[...] = matrix.to_numpy()
+        values.flush()
+        del values
+        index.to_csv(f"{self.index_path}.tmp", sep=";", index=False, encoding="UTF-8")
+        os.replace(tmp_path, self.path)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+
+    def load_index(self) -> pd.DataFrame:
+        """Reads the sidecar index.
+
+        Returns:
+            pd.DataFrame: Name, Latitude and Longitude of each row of the matrix.
+        """
+        return pd.read_csv(self.index_path, sep=";", encoding="UTF-8")
+
+    def load(self, mmap_mode: str = "r") -> pd.DataFrame:
+        """Maps the matrix into memory, without copying it.
+
+        Args:
+            mmap_mode (str, optional): "r" maps it read-only, "c" copy-on-write,
+                which allows scaling it in place without touching the file, and
+                "r+" writable. Defaults to "r".
+
+        Returns:
+            pd.DataFrame: Matrix indexed by location names, backed by the map.
+        """
+        values = np.load(self.path, mmap_mode=mmap_mode)
+        names = list(self.load_index()["Name"])
+        return pd.DataFrame(
+            values, index=pd.Index(names, name="Name"), columns=names, copy=False
+        )
+
+    def matches(self, locations: pd.DataFrame, precision: int = 5) -> bool:
+        """Checks whether the store holds the given locations, in any order.
+
+        Args:
+            locations (pd.DataFrame): Locations info, indexed by name or with a
+                "Name" column, with their Latitude and Longitude.
+            precision (int, optional): Decimal places of the compared coordinates.
+                Defaults to 5.
+
+        Returns:
+            bool: Whether every location is in the store at the same coordinates.
+        """
+        if not self.exists():
+            return False
+        if "Name" in locations.columns:
+            locations = locations.set_index("Name")
+        index = self.load_index().set_index("Name")
+        if not locations.index.isin(index.index).all():
+            return False
+        stored = index.loc[locations.index, ["Latitude", "Longitude"]]
+        current = locations[["Latitude", "Longitude"]]
+        return np.array_equal(
+            stored.to_numpy(dtype=np.float64).round(precision),
+            current.to_numpy(dtype=np.float64).round(precision),
+        )
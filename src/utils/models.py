@@ -1,20 +1,33 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence, Tuple
+
+import numpy as np
 
 
 @dataclass
 class Location:
+    __slots__ = ("idx", "name")
     idx: int
     name: str
 
 
 @dataclass
 class OilField(Location):
+    __slots__ = ("production",)
     production: float
 
 
 @dataclass
 class Truck:
+    __slots__ = (
+        "idx",
+        "start",
+        "end",
+        "route",
+        "fixed_cost",
+        "var_cost",
+        "capacity",
+    )
     idx: int
     start: Location
     end: Location
@@ -24,7 +37,159 @@ class Truck:
     capacity: float
 
 
-@dataclass
+def giant_tour(routes: Sequence[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenates the routes of every truck into a single array.
+
+    Args:
+        routes (Sequence[Sequence[int]]): Oil field ids visited by each truck.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Oil field ids of all the routes, and the
+        offsets where the route of each truck starts and ends.
+    """
+    offsets = np.zeros(len(routes) + 1, dtype=np.int64)
+    np.cumsum([len(route) for route in routes], out=offsets[1:])
+    tour = np.fromiter(
+        (f for route in routes for f in route), dtype=np.int64, count=offsets[-1]
+    )
+    return tour, offsets
+
+
 class Solution:
-    trucks: List[Truck]
-    total_cost: float
+    """Routes of every truck and their total cost.
+
+    Routes are stored as a giant tour: the oil field ids of all trucks in a single
+    int array, where `tour[offsets[i]:offsets[i + 1]]` is the route of truck i.
+    Loads and variable costs are float arrays with one entry per truck. The Truck
+    objects of `trucks` are only built when it is read, so solvers can hand over
+    solutions without allocating them.
+    """
+
+    __slots__ = (
+        "tour",
+        "offsets",
+        "loads",
+        "var_costs",
+        "total_cost",
+        "fixed_cost",
+        "capacity",
+        "_names",
+        "_production",
+        "_depot",
+        "_trucks",
+    )
+
+    def __init__(self, trucks: List[Truck] = None, total_cost: float = np.inf):
+        self.total_cost = total_cost
+        self.trucks = trucks or []
+
+    @classmethod
+    def from_tour(
+        cls,
+        tour: np.ndarray,
+        offsets: np.ndarray,
+        var_costs: np.ndarray,
+        total_cost: float,
+        fixed_cost: float,
+        capacity: float,
+        names: List[str],
+        production: np.ndarray,
+        depot: int,
+    ) -> "Solution":
+        """Creates a solution from its arrays, without building the trucks.
+
+        Args:
+            tour (np.ndarray): Oil field ids of all the routes.
+            offsets (np.ndarray): Offsets of the route of each truck in the tour.
+            var_costs (np.ndarray): Variable cost of each truck.
+            total_cost (float): Total cost of the solution.
+            fixed_cost (float): Fixed cost of a truck in use.
+            capacity (float): Cargo capacity of a truck (bbl).
+            names (List[str]): Name of each location id.
+            production (np.ndarray): Production of each location id.
+            depot (int): Id of the depot.
+
+        Returns:
+            Solution: Solution whose trucks are built on demand.
+        """
+        solution = cls.__new__(cls)
+        solution.tour = tour
+        solution.offsets = offsets
+        solution.var_costs = var_costs
+        solution.total_cost = total_cost
+        solution.fixed_cost = fixed_cost
+        solution.capacity = capacity
+        solution._names = names
+        solution._production = production
+        solution._depot = depot
+        solution._trucks = None
+
+        loads = np.zeros(len(tour) + 1)
+        np.cumsum(production[tour], out=loads[1:])
+        solution.loads = loads[offsets[1:]] - loads[offsets[:-1]]
+        return solution
+
+    @property
+    def num_trucks(self) -> int:
+        """Returns the number of trucks, including the unused ones."""
+        return len(self.offsets) - 1
+
+    @property
+    def routes(self) -> List[np.ndarray]:
+        """Returns the oil field ids visited by each truck, as views of the tour."""
+        offsets = self.offsets.tolist()
+        return [self.tour[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def trucks(self) -> List[Truck]:
+        """Returns the trucks of the solution, building them on the first read."""
+        if self._trucks is None:
+            depot = Location(idx=self._depot, name=self._names[self._depot])
+            self._trucks = [
+                Truck(
+                    idx=i,
+                    start=depot,
+                    end=depot,
+                    route=[
+                        OilField(
+                            idx=int(f),
+                            name=self._names[f],
+                            production=float(self._production[f]),
+                        )
+                        for f in route
+                    ],
+                    fixed_cost=self.fixed_cost,
+                    var_cost=float(self.var_costs[i]),
+                    capacity=self.capacity - float(self.loads[i]),
+                )
+                for i, route in enumerate(self.routes)
+            ]
+        return self._trucks
+
+    @trucks.setter
+    def trucks(self, trucks: List[Truck]) -> None:
+        self.tour, self.offsets = giant_tour([[f.idx for f in t.route] for t in trucks])
+        self.loads = np.array(
+            [sum(f.production for f in t.route) for t in trucks], dtype=np.float64
+        )
+        self.var_costs = np.array([t.var_cost for t in trucks], dtype=np.float64)
+        self.fixed_cost = trucks[0].fixed_cost if trucks else 0.0
+        self.capacity = trucks[0].capacity + self.loads[0] if trucks else 0.0
+        self._names = None
+        self._production = None
+        self._depot = None
+        self._trucks = list(trucks)
+
+    def assign(self, other: "Solution") -> None:
+        """Makes this solution share the arrays of another one. Used by the solvers
+        to fill the solution they were given.
+
+        Args:
+            other (Solution): Solution to be copied.
+        """
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def __repr__(self) -> str:
+        routes = [route.tolist() for route in self.routes]
+        return f"Solution(total_cost={self.total_cost}, routes={routes})"
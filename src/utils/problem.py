@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from .converter import liter_to_bbl
+from .models import Solution, Truck, giant_tour
+
+
+@dataclass
+class Problem:
+    """Integer-indexed representation of a VRP instance used by the solvers' hot
+    loops. Every location is identified by its position in `names`.
+    """
+
+    names: List[str]
+    costs: np.ndarray
+    production: np.ndarray
+    depot: int
+    fields: np.ndarray
+    fixed_cost: float = 300
+
+    def route_cost(self, route: List[int]) -> float:
+        """Calculates the variable cost of a depot -> fields -> depot route.
+
+        Args:
+            route (List[int]): Oil field ids in visiting order.
+
+        Returns:
+            float: Variable cost of the route.
+        """
+        if not route:
+            return 0.0
+        nodes = [self.depot] + list(route) + [self.depot]
+        return float(self.costs[nodes[:-1], nodes[1:]].sum())
+
+    def neighbor_lists(self, k: int = None) -> List[List[int]]:
+        """Ranks the oil fields by cost from every location, nearest first.
+
+        Args:
+            k (int, optional): Number of nearest oil fields kept for each location,
+                all of them when None. Defaults to None.
+
+        Returns:
+            List[List[int]]: Oil field ids of each location id, without the
+            location itself and the fields it cannot reach.
+        """
+        costs = self.costs[:, self.fields].copy()
+        costs[self.fields, np.arange(len(self.fields))] = np.inf
+        n = len(self.fields)
+        k = n if k is None else min(k, n)
+        if k <= 0:
+            return [[] for _ in self.names]
+
+        if k < n:
+            order = np.argpartition(costs, k - 1, axis=1)[:, :k]
+            ranking = np.lexsort((order, np.take_along_axis(costs, order, axis=1)))
+            order = np.take_along_axis(order, ranking, axis=1)
+        else:
+            order = np.argsort(costs, axis=1, kind="stable")
+        reachable = np.isfinite(np.take_along_axis(costs, order, axis=1))
+        return [
+            row[mask].tolist() for row, mask in zip(self.fields[order], reachable)
+        ]
+
+    def build_solution(
+        self,
+        tour: np.ndarray,
+        offsets: np.ndarray,
+        truck_capacity: float,
+        total_cost: float = None,
+    ) -> Solution:
+        """Builds a solution from a giant tour, without creating Truck objects.
+
+        Args:
+            tour (np.ndarray): Oil field ids of all the routes.
+            offsets (np.ndarray): Offsets of the route of each truck in the tour.
+            truck_capacity (float): Total truck capacity (Liters).
+            total_cost (float, optional): Total cost of the solution. Calculated
+                from the routes when None. Defaults to None.
+
+        Returns:
+            Solution: Solution with the variable cost of each truck.
+        """
+        tour = np.asarray(tour, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts, ends = offsets[:-1], offsets[1:]
+        used = ends > starts
+
+        legs = np.zeros(len(tour))
+        if len(tour) > 1:
+            np.cumsum(self.costs[tour[:-1], tour[1:]], out=legs[1:])
+        var_costs = np.zeros(len(starts))
+        first, last = tour[starts[used]], tour[ends[used] - 1]
+        var_costs[used] = (
+            self.costs[self.depot, first]
+            + legs[ends[used] - 1]
+            - legs[starts[used]]
+            + self.costs[last, self.depot]
+        )
+        if total_cost is None:
+            total_cost = float(self.fixed_cost * used.sum() + var_costs.sum())
+
+        return Solution.from_tour(
+            tour=tour,
+            offsets=offsets,
+            var_costs=var_costs,
+            total_cost=total_cost,
+            fixed_cost=self.fixed_cost,
+            capacity=liter_to_bbl(volume=truck_capacity),
+            names=self.names,
+            production=self.production,
+            depot=self.depot,
+        )
+
+    def build_trucks(
+        self, routes: List[List[int]], truck_capacity: float
+    ) -> List[Truck]:
+        """Maps routes of location ids back to Truck objects with named locations.
+
+        Args:
+            routes (List[List[int]]): Oil field ids visited by each truck.
+            truck_capacity (float): Total truck capacity (Liters).
+
+        Returns:
+            List[Truck]: List of Truck objects
+        """
+        return self.build_solution(*giant_tour(routes), truck_capacity).trucks
+
+
+def build_problem(cost_matrix: pd.DataFrame, locations_info: pd.DataFrame) -> Problem:
+    """Compiles the cost matrix and the locations info into a Problem.
+
+    Args:
+        cost_matrix (pd.DataFrame): Cost matrix indexed by origin and destination names.
+        locations_info (pd.DataFrame): Locations info, indexed by name or with a
+            "Name" column.
+
+    Returns:
+        Problem: Integer-indexed problem.
+    """
+    if "Name" in locations_info.columns:
+        names = list(locations_info["Name"])
+    else:
+        names = list(locations_info.index)
+
+    if list(cost_matrix.index) == names and list(cost_matrix.columns) == names:
+        costs = np.array(cost_matrix.to_numpy(), dtype=np.float64)
+    else:
+        costs = cost_matrix.loc[names, names].to_numpy(dtype=np.float64)
+    depots = locations_info["Depot"].to_numpy() != 0
+    return Problem(
+        names=names,
+        costs=np.ascontiguousarray(costs),
+        production=locations_info["Production"].to_numpy(dtype=np.float64),
+        depot=int(np.flatnonzero(depots)[0]),
+        fields=np.flatnonzero(~depots),
+    )
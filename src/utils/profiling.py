@@ -0,0 +1,75 @@
+import json
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from numbers import Integral
+from typing import ContextManager, Dict, Iterator
+
+
+@dataclass
+class Profile:
+    """Wall-clock timings of the phases of a run and counters of the search.
+
+    A disabled profile records nothing, and its phases are no-op context managers,
+    so solvers can always time their phases through it.
+    """
+
+    enabled: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def __timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def phase(self, name: str) -> ContextManager:
+        """Times a phase of the run. Phases with the same name add up.
+
+        Args:
+            name (str): Name of the phase.
+
+        Returns:
+            ContextManager: Context manager that times its block.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self.__timer(name)
+
+    def count(self, **counters: float) -> None:
+        """Records counters, replacing previous values with the same name.
+
+        Args:
+            **counters (float): Values of the counters.
+        """
+        if self.enabled:
+            self.counters.update(counters)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Returns the timings and counters as plain Python numbers. Infinite and NaN
+        counters, such as the bound of an infeasible search, are None so the result
+        is valid JSON.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Timings in seconds and counters.
+        """
+        counters = {}
+        for name, value in self.counters.items():
+            value = int(value) if isinstance(value, Integral) else float(value)
+            counters[name] = value if math.isfinite(value) else None
+        return {"timings": dict(self.timings), "counters": counters}
+
+    def dump(self, path: str) -> None:
+        """Writes the timings and counters as JSON.
+
+        Args:
+            path (str): Path of the JSON file.
+        """
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(self.to_dict(), f, indent=2, allow_nan=False)
@@ -0,0 +1,147 @@
+import json
+import random
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+import numpy as np
+
+from .distance_matrix import EARTH_RADIUS_KM
+
+
+def _distances(payload: Dict, circuity: float) -> np.ndarray:
+    """Calculates road distance estimates between the payload's origins and
+    destinations.
+
+    Args:
+        payload (Dict): Distance matrix request payload.
+        circuity (float): Ratio between road and great-circle distances.
+
+    Returns:
+        np.ndarray: Distance matrix in km.
+    """
+    origins = np.radians(
+        [[o["latitude"], o["longitude"]] for o in payload["origins"]]
+    ).reshape(-1, 2)
+    destinations = np.radians(
+        [[d["latitude"], d["longitude"]] for d in payload["destinations"]]
+    ).reshape(-1, 2)
+    dlat = origins[:, None, 0] - destinations[None, :, 0]
+    dlon = origins[:, None, 1] - destinations[None, :, 1]
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(origins[:, None, 0])
+        * np.cos(destinations[None, :, 0])
+        * np.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)) * circuity
+
+
+@dataclass
+class StubServer:
+    """Local stand-in for the Bing Maps distance matrix API.
+
+    It answers POST requests with the same response shape as the API, using
+    great-circle distances. Requests with more than `max_elements` pairs are
+    rejected, a `failure_rate` fraction of them answers `failure_status` (503, or
+    429 to throttle) and a `missing_rate` fraction of the pairs is left out of the
+    answers, so the tiled and retried fetching of DistanceMatrix can be tested and
+    benchmarked offline.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 0
+    max_elements: int = 2500
+    failure_rate: float = 0.0
+    failure_status: int = 503
+    missing_rate: float = 0.0
+    circuity: float = 1.3
+    requests_served: int = field(default=0, init=False)
+
+    @property
+    def url(self) -> str:
+        """Returns the URL to be used as the DistanceMatrix endpoint."""
+        return f"http://{self.host}:{self.port}/REST/v1/Routes/DistanceMatrix"
+
+    def __handler(self) -> type:
+        """Builds the request handler class bound to this server.
+
+        Returns:
+            type: Request handler class.
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                stub.requests_served += 1
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                elements = len(payload["origins"]) * len(payload["destinations"])
+
+                if random.random() < stub.failure_rate:
+                    self.__answer(
+                        stub.failure_status, {"errorDetails": ["Service unavailable."]}
+                    )
+                elif elements > stub.max_elements:
+                    self.__answer(400, {"errorDetails": ["Too many elements."]})
+                else:
+                    distances = _distances(payload, stub.circuity)
+                    results = [
+                        {
+                            "originIndex": i,
+                            "destinationIndex": j,
+                            "travelDistance": float(distances[i, j]),
+                        }
+                        for i in range(distances.shape[0])
+                        for j in range(distances.shape[1])
+                        if random.random() >= stub.missing_rate
+                    ]
+                    body = {"resourceSets": [{"resources": [{"results": results}]}]}
+                    self.__answer(200, body)
+
+            def __answer(self, status: int, body: Dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        """Starts serving in a background thread.
+
+        Returns:
+            StubServer: The running server.
+        """
+        self.__server = ThreadingHTTPServer((self.host, self.port), self.__handler())
+        self.port = self.__server.server_address[1]
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+
+    with StubServer(port=8008) as server:
+        print(f"Serving distance matrices at {server.url}")
+        threading.Event().wait()
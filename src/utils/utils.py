@@ -46,3 +46,7 @@ def format_solution_output(solver, truck_capacity, duration):
             )
         )
         print(colored(f"Solver Time: {timedelta(seconds=duration)}", "blue"))
+        if getattr(solver, "pruned_nodes", None) is not None:
+            print(colored(f"Nós Podados: {solver.pruned_nodes}", "blue"))
+        if getattr(solver, "gap", 0.0) > 0:
+            print(colored(f"Gap Comprovado: {solver.gap:.2%}", "blue"))
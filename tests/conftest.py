@@ -0,0 +1,28 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from helpers import haversine_costs, random_locations
+from src.utils import Solution
+
+
+@pytest.fixture
+def make_solver():
+    """Builds a solver over random oil fields with haversine distances."""
+
+    def make(solver_class, num_fields: int, seed: int = 0, **kwargs):
+        locations = random_locations(num_fields, seed)
+        dist_matrix, cost_matrix = haversine_costs(locations)
+        return solver_class(
+            cost_matrix=cost_matrix,
+            locations_info=locations,
+            dist_matrix=dist_matrix,
+            optimal_solution=Solution(trucks=[], total_cost=np.inf),
+            **kwargs,
+        )
+
+    return make
@@ -0,0 +1,76 @@
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+from src.utils import DistanceMatrix, build_problem, distance_to_cost, liter_to_bbl
+
+
+def random_locations(num_fields: int, seed: int) -> pd.DataFrame:
+    """Draws oil fields around a depot in Espírito Santo."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Name": [f"F{i}" for i in range(num_fields)] + ["Depot"],
+            "Latitude": np.r_[rng.uniform(-20, -18, num_fields), -19],
+            "Longitude": np.r_[rng.uniform(-40, -39, num_fields), -39.5],
+            "Production": np.r_[rng.uniform(1, 25, num_fields), 0],
+            "Depot": [0] * num_fields + [1],
+        }
+    )
+
+
+def haversine_costs(locations: pd.DataFrame):
+    """Computes the haversine distance and cost matrices of some locations."""
+    distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+    distance_matrix.calculate()
+    cost_matrix = distance_to_cost(
+        diesel_price=6.62, truck_consumption=17.5, dist_matrix=distance_matrix.matrix
+    )
+    return distance_matrix.matrix, cost_matrix
+
+
+def set_partitions(items: list):
+    """Yields every partition of a list into non-empty groups."""
+    if not items:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for partition in set_partitions(rest):
+        yield [[first]] + partition
+        for k in range(len(partition)):
+            yield partition[:k] + [[first] + partition[k]] + partition[k + 1 :]
+
+
+def brute_force(solver, num_trucks: int, truck_capacity: float) -> float:
+    """Finds the optimal cost by trying every partition and visiting order."""
+    problem = build_problem(solver.cost_matrix, solver.locations_info)
+    capacity = liter_to_bbl(volume=truck_capacity)
+    best = np.inf
+    for partition in set_partitions(problem.fields.tolist()):
+        if len(partition) > num_trucks or any(
+            problem.production[group].sum() > capacity + 1e-9 for group in partition
+        ):
+            continue
+        best = min(
+            best,
+            sum(
+                problem.fixed_cost
+                + min(problem.route_cost(list(order)) for order in permutations(group))
+                for group in partition
+            ),
+        )
+    return best
+
+
+# Fields, trucks, capacity (Liters) and seed of small instances solved by brute force
+BRUTE_FORCE_CASES = [
+    (4, 2, 6000, 0),
+    (5, 2, 6000, 1),
+    (5, 3, 10000, 2),
+    (6, 2, 10000, 3),
+    (6, 3, 6000, 4),
+    (6, 2, 6000, 5),
+    (7, 3, 10000, 6),
+    (7, 4, 6000, 7),
+]
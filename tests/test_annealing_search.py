@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.annealing_search import AnnealingSolver
+from src.savings_search import SavingsSolver
+
+
+def test_iterations_make_runs_reproducible(make_solver):
+    costs = []
+    for time_limit in (0.5, 2.0):
+        solver = make_solver(AnnealingSolver, num_fields=20)
+        solver.seed = 3
+        solver.run(
+            num_trucks=8,
+            truck_capacity=10000,
+            time_limit=time_limit,
+            max_iterations=20000,
+        )
+        assert solver.iterations == 20000
+        costs += [solver.optimal_solution.total_cost]
+    assert np.isfinite(costs[0])
+    assert costs[0] == costs[1]
+
+
+
+@pytest.mark.parametrize("num_fields, num_trucks, seed", [(15, 6, 0), (10, 4, 3)])
+def test_tight_fleet_starts_without_savings(
+    make_solver, num_fields, num_trucks, seed
+):
+    savings = make_solver(SavingsSolver, num_fields=num_fields, seed=seed)
+    savings.run(num_trucks=num_trucks, truck_capacity=6000)
+    assert savings.optimal_solution.total_cost == np.inf
+
+    solver = make_solver(AnnealingSolver, num_fields=num_fields, seed=seed)
+    solver.run(num_trucks=num_trucks, truck_capacity=6000, max_iterations=2000)
+    trucks = solver.optimal_solution.trucks
+    visited = [f.name for t in trucks for f in t.route]
+    assert np.isfinite(solver.optimal_solution.total_cost)
+    assert sorted(visited) == sorted(f"F{i}" for i in range(num_fields))
+    assert len(trucks) == num_trucks
+    assert all(t.capacity >= -1e-9 for t in trucks)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from src import decomposition_search
+from src.decomposition_search import DecompositionSolver
+from src.global_search import GlobalSolver
+from src.heuristic_search import HeuristicSolver
+from src.partition_search import PartitionSolver
+from src.savings_search import SavingsSolver
+from src.utils import Solution
+
+
+class GivingUpSolver(PartitionSolver):
+    """Exact solver that hits its limit on every cluster."""
+
+    def run(self, num_trucks: int, truck_capacity: float) -> None:
+        self.optimal_solution.assign(Solution(trucks=[], total_cost=np.inf))
+
+
+def test_failed_clusters_fall_back_to_the_heuristic(make_solver):
+    solver = make_solver(
+        DecompositionSolver, num_fields=30, cluster_size=8, exact_size=8
+    )
+    solver.exact_solver = GivingUpSolver
+    solver.run(num_trucks=20, truck_capacity=10000)
+
+    visited = [f.name for t in solver.optimal_solution.trucks for f in t.route]
+    assert np.isfinite(solver.optimal_solution.total_cost)
+    assert sorted(visited) == sorted(f"F{i}" for i in range(30))
+
+
+def test_clusters_at_the_node_limit_fall_back_to_the_heuristic(
+    make_solver, monkeypatch
+):
+    solved = []
+    solve_cluster = decomposition_search._solve_cluster
+
+    def spy(*args):
+        routes = solve_cluster(*args)
+        solved.append((args[5], routes is None))
+        return routes
+
+    monkeypatch.setattr(decomposition_search, "_solve_cluster", spy)
+    solver = make_solver(
+        DecompositionSolver,
+        num_fields=30,
+        cluster_size=8,
+        exact_size=8,
+        exact_solver=GlobalSolver,
+        exact_options={"run": {"node_limit": 1}},
+        repair=False,
+    )
+    solver.run(num_trucks=20, truck_capacity=10000)
+
+    visited = [f.name for t in solver.optimal_solution.trucks for f in t.route]
+    assert sorted(visited) == sorted(f"F{i}" for i in range(30))
+    assert (GlobalSolver, True) in solved
+    assert solved.count((SavingsSolver, False)) == len(solver.clusters)
+
+
+def test_heuristic_solver_gets_the_distance_matrix(make_solver):
+    solver = make_solver(
+        DecompositionSolver,
+        num_fields=30,
+        cluster_size=8,
+        exact_size=0,
+        heuristic_solver=HeuristicSolver,
+        heuristic_options={"neighbors": 5},
+    )
+    solver.run(num_trucks=20, truck_capacity=10000)
+
+    visited = [f.name for t in solver.optimal_solution.trucks for f in t.route]
+    assert sorted(visited) == sorted(f"F{i}" for i in range(30))
+
+
+def test_parallel_clusters_match_serial(make_solver):
+    costs = []
+    for workers in (1, 2):
+        solver = make_solver(DecompositionSolver, num_fields=30, workers=workers)
+        solver.run(num_trucks=20, truck_capacity=10000)
+        costs += [solver.optimal_solution.total_cost]
+    assert np.isfinite(costs[0])
+    assert np.isclose(costs[0], costs[1])
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import requests
+
+from helpers import random_locations
+from src.utils import DistanceCache, DistanceMatrix
+from src.utils.stub_server import StubServer
+
+
+def test_missing_pairs_fall_back_to_haversine():
+    locations = random_locations(num_fields=10, seed=0)
+    with StubServer(missing_rate=0.2) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations, url=server.url, backoff=0.0
+        )
+        with pytest.warns(UserWarning):
+            distance_matrix.calculate()
+    assert not np.isnan(distance_matrix.matrix.to_numpy()).any()
+
+
+def test_missing_pairs_without_fallback_raise():
+    locations = random_locations(num_fields=10, seed=0)
+    with StubServer(missing_rate=0.2) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations, url=server.url, backoff=0.0, fallback=False
+        )
+        with pytest.raises(requests.HTTPError, match="misses some pairs"):
+            distance_matrix.calculate()
+    assert distance_matrix.matrix is None
+
+
+def test_failures_fall_back_to_haversine():
+    locations = random_locations(num_fields=10, seed=1)
+    with StubServer(failure_rate=1.0) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations, url=server.url, max_retries=1, backoff=0.0
+        )
+        with pytest.warns(UserWarning) as caught:
+            distance_matrix.calculate()
+    assert "status 503: Service unavailable." in str(caught[0].message)
+
+    expected = DistanceMatrix(input_data=locations, backend="haversine")
+    expected.calculate()
+    assert np.allclose(distance_matrix.matrix, expected.matrix)
+
+
+def test_tiles_respect_the_element_limit():
+    locations = random_locations(num_fields=10, seed=1)
+    with StubServer(max_elements=30) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations, url=server.url, max_elements=30, fallback=False
+        )
+        distance_matrix.calculate()
+        requests_served = server.requests_served
+
+    expected = DistanceMatrix(input_data=locations, backend="haversine")
+    expected.calculate()
+    assert requests_served == 6
+    assert np.allclose(distance_matrix.matrix, expected.matrix)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_failed_tiles_are_retried(status):
+    locations = random_locations(num_fields=10, seed=1)
+    with StubServer(max_elements=30, failure_rate=0.3, failure_status=status) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations,
+            url=server.url,
+            max_elements=30,
+            max_retries=10,
+            backoff=0.0,
+            fallback=False,
+        )
+        distance_matrix.calculate()
+        requests_served = server.requests_served
+    assert requests_served >= 6
+    assert not np.isnan(distance_matrix.matrix.to_numpy()).any()
+
+
+def test_unrecoverable_failures_are_not_retried():
+    locations = random_locations(num_fields=10, seed=1)
+    with StubServer(max_elements=30) as server:
+        distance_matrix = DistanceMatrix(
+            input_data=locations, url=server.url, max_elements=60, fallback=False
+        )
+        with pytest.raises(requests.HTTPError, match="400: Too many elements."):
+            distance_matrix.calculate()
+        requests_served = server.requests_served
+    assert distance_matrix.matrix is None
+    assert requests_served == 3
+
+
+def test_cache_only_requests_new_pairs(tmp_path):
+    locations = random_locations(num_fields=10, seed=1)
+    path = str(tmp_path / "distance_cache.csv")
+    with StubServer() as server:
+        served = []
+        for rows in (10, 11, 11):
+            distance_matrix = DistanceMatrix(
+                input_data=locations.iloc[:rows],
+                url=server.url,
+                cache=DistanceCache(path=path),
+                fallback=False,
+            )
+            distance_matrix.calculate()
+            served += [server.requests_served]
+
+    expected = DistanceMatrix(input_data=locations, backend="haversine")
+    expected.calculate()
+    assert served[0] == 1 and served[1] == served[2] > served[0]
+    assert np.allclose(distance_matrix.matrix, expected.matrix)
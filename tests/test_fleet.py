@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from helpers import set_partitions
+from src.utils import fleet_bounds
+from src.utils.fleet import first_fit_decreasing, l1_bound, l2_bound
+
+
+def min_trucks(production, capacity):
+    """Finds the fewest trucks that carry every oil field by brute force."""
+    return min(
+        len(partition)
+        for partition in set_partitions(list(range(len(production))))
+        if all(production[group].sum() <= capacity + 1e-9 for group in partition)
+    )
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_bounds_bracket_the_optimal_packing(seed):
+    rng = np.random.default_rng(seed)
+    production = rng.uniform(1, 25, rng.integers(1, 8))
+    capacity = rng.uniform(25, 60)
+
+    optimum = min_trucks(production, capacity)
+    packing = first_fit_decreasing(production, capacity)
+    loads = np.bincount(packing, weights=production)
+    assert l1_bound(production, capacity) <= l2_bound(production, capacity)
+    assert l2_bound(production, capacity) <= optimum <= len(loads)
+    assert np.all(loads <= capacity + 1e-9)
+
+    bounds = fleet_bounds(production, capacity, num_trucks=optimum)
+    assert not bounds.infeasible
+    bounds = fleet_bounds(production, capacity, num_trucks=optimum - 1)
+    assert not bounds.feasible
+
+
+def test_oversized_field_is_infeasible():
+    bounds = fleet_bounds(np.array([10.0, 30.0]), capacity=25.0, num_trucks=5)
+    assert bounds.infeasible and not bounds.feasible
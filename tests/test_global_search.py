@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from helpers import BRUTE_FORCE_CASES, brute_force
+from src.global_search import GlobalSolver
+from src.heuristic_search import HeuristicSolver
+from src.utils import Solution
+
+
+def test_infinite_warm_start_is_ignored(make_solver):
+    solver = make_solver(GlobalSolver, num_fields=6)
+    solver.run(num_trucks=3, truck_capacity=10000)
+    expected = solver.optimal_solution.total_cost
+
+    solver = make_solver(GlobalSolver, num_fields=6)
+    solver.run(
+        num_trucks=3,
+        truck_capacity=10000,
+        warm_start=Solution(trucks=[], total_cost=np.inf),
+    )
+    assert np.isfinite(expected)
+    assert np.isclose(solver.optimal_solution.total_cost, expected)
+
+
+def test_warm_start_does_not_change_optimum(make_solver):
+    heuristic = make_solver(HeuristicSolver, num_fields=6)
+    heuristic.run(num_trucks=3, truck_capacity=10000)
+
+    solver = make_solver(GlobalSolver, num_fields=6)
+    solver.run(num_trucks=3, truck_capacity=10000)
+    expected = solver.optimal_solution.total_cost
+
+    solver = make_solver(GlobalSolver, num_fields=6)
+    solver.run(
+        num_trucks=3, truck_capacity=10000, warm_start=heuristic.optimal_solution
+    )
+    assert np.isclose(solver.optimal_solution.total_cost, expected)
+
+
+def test_parallel_search_matches_serial(make_solver):
+    costs = []
+    for workers in (1, 2):
+        solver = make_solver(GlobalSolver, num_fields=7, workers=workers, split_depth=2)
+        solver.run(num_trucks=3, truck_capacity=8000)
+        costs += [solver.optimal_solution.total_cost]
+    assert np.isfinite(costs[0])
+    assert np.isclose(costs[0], costs[1])
+
+
+@pytest.mark.parametrize(
+    "num_fields, num_trucks, truck_capacity, seed", BRUTE_FORCE_CASES
+)
+def test_matches_brute_force(
+    make_solver, num_fields, num_trucks, truck_capacity, seed
+):
+    solver = make_solver(GlobalSolver, num_fields=num_fields, seed=seed)
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    expected = brute_force(solver, num_trucks, truck_capacity)
+
+    cost = solver.optimal_solution.total_cost
+    assert cost == expected == np.inf or np.isclose(cost, expected)
+    assert solver.gap == 0.0 or cost == np.inf
+
+
+def test_node_limit_reports_a_valid_gap(make_solver):
+    solver = make_solver(GlobalSolver, num_fields=6, seed=3)
+    solver.run(num_trucks=3, truck_capacity=10000, node_limit=50)
+    expected = brute_force(solver, 3, 10000)
+    assert solver.lower_bound <= expected + 1e-9
+    assert solver.optimal_solution.total_cost >= expected - 1e-9
@@ -0,0 +1,17 @@
+import numpy as np
+
+from src.heuristic_search import HeuristicSolver
+
+
+def test_unvisited_fields_make_the_plan_infeasible(make_solver):
+    solver = make_solver(HeuristicSolver, num_fields=12)
+    solver.run(num_trucks=2, truck_capacity=10000)
+    assert solver.optimal_solution.total_cost == np.inf
+    assert solver.optimal_solution.trucks == []
+
+
+def test_every_field_is_visited(make_solver):
+    solver = make_solver(HeuristicSolver, num_fields=12)
+    solver.run(num_trucks=6, truck_capacity=10000)
+    visited = [f.name for t in solver.optimal_solution.trucks for f in t.route]
+    assert sorted(visited) == sorted(f"F{i}" for i in range(12))
@@ -0,0 +1,42 @@
+import json
+
+from helpers import haversine_costs, random_locations
+from src.jobs import DEFAULTS, solve, to_json
+from src.utils import Profile
+
+
+def test_non_finite_counters_are_exported_as_null():
+    profile = Profile(enabled=True)
+    profile.count(lower_bound=float("nan"), gap=float("inf"), nodes=10)
+    assert profile.to_dict()["counters"] == {
+        "lower_bound": None,
+        "gap": None,
+        "nodes": 10,
+    }
+
+
+def test_infeasible_record_is_valid_json():
+    locations = random_locations(num_fields=6, seed=0)
+    dist_matrix, cost_matrix = haversine_costs(locations)
+    instance = {
+        **DEFAULTS,
+        "name": "infeasible",
+        "solver": "global",
+        "num_trucks": 1,
+        "truck_capacity": 6000,
+    }
+    record = solve(
+        instance, locations, dist_matrix, cost_matrix, Profile(enabled=True)
+    )
+
+    assert record["status"] == "infeasible"
+    assert record["counters"]["lower_bound"] is None
+    assert json.loads(to_json(record)) == record
+
+
+def test_profile_dump_is_valid_json(tmp_path):
+    profile = Profile(enabled=True)
+    profile.count(gap=float("inf"))
+    profile.dump(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json", encoding="UTF-8") as f:
+        assert json.load(f) == {"timings": {}, "counters": {"gap": None}}
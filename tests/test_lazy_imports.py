@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import src.utils
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ("pandas", "requests", "dotenv")
+
+
+def imported_after(statement: str) -> list:
+    """Lists the heavy modules loaded by a statement in a fresh interpreter."""
+    check = (
+        f"import json, sys; {statement}; "
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "src.utils",
+        "src.global_search",
+        "src.partition_search",
+        "src.heuristic_search",
+        "src.savings_search",
+        "src.local_search",
+    ],
+)
+def test_solver_core_imports_without_heavy_modules(module):
+    assert imported_after(f"import {module}") == []
+
+
+def test_helpers_are_imported_on_first_use():
+    assert "pandas" in imported_after("from src.utils import MatrixStore")
+    assert "requests" not in imported_after("from src.utils import DistanceMatrix")
+    assert src.utils.DistanceMatrix is src.utils.distance_matrix.DistanceMatrix
+
+
+def test_unknown_attribute_is_an_error():
+    with pytest.raises(AttributeError):
+        src.utils.NotAHelper
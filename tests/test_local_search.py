@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import haversine_costs, random_locations
+from src.local_search import LocalSearch
+from src.savings_search import SavingsSolver
+from src.utils import Solution, build_problem, giant_tour, liter_to_bbl
+
+
+def savings_solution(locations, cost_matrix, num_trucks=6, truck_capacity=10000):
+    solver = SavingsSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    return solver.optimal_solution
+
+
+def test_fields_out_of_the_solution_are_left_alone():
+    locations = random_locations(num_fields=15, seed=0)
+    _, cost_matrix = haversine_costs(locations)
+    solution = savings_solution(locations[locations["Name"] != "F3"], cost_matrix)
+
+    improved = LocalSearch(
+        cost_matrix=cost_matrix, locations_info=locations, neighbors=15
+    ).improve(solution, truck_capacity=10000)
+    names = [f.name for t in improved.trucks for f in t.route]
+    assert "F3" not in names and len(names) == 14
+    assert improved.total_cost <= solution.total_cost + 1e-6
+
+
+def random_solution(problem, num_trucks, truck_capacity, seed):
+    """Splits a random order of the oil fields into routes that fit the trucks."""
+    capacity = liter_to_bbl(volume=truck_capacity)
+    routes, load = [[]], 0.0
+    for f in np.random.default_rng(seed).permutation(problem.fields).tolist():
+        if load + problem.production[f] > capacity:
+            routes, load = routes + [[]], 0.0
+        routes[-1] += [f]
+        load += problem.production[f]
+    routes += [[] for _ in range(num_trucks - len(routes))]
+    return problem.build_solution(*giant_tour(routes), truck_capacity)
+
+
+def route_lists(solution):
+    return [route.tolist() for route in solution.routes]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_improvement_keeps_fields_loads_and_prices(seed):
+    locations = random_locations(num_fields=25, seed=seed)
+    _, cost_matrix = haversine_costs(locations)
+    problem = build_problem(cost_matrix, locations)
+    solution = random_solution(problem, 10, 10000, seed)
+
+    local_search = LocalSearch(cost_matrix=cost_matrix, locations_info=locations)
+    improved = local_search.improve(solution, truck_capacity=10000)
+    routes = route_lists(improved)
+    assert local_search.applied_moves > 0
+    assert improved.total_cost < solution.total_cost
+    assert sorted(f for route in routes for f in route) == problem.fields.tolist()
+    assert len(routes) == 10
+    assert all(t.capacity >= -1e-9 for t in improved.trucks)
+    assert np.isclose(
+        improved.total_cost,
+        sum(problem.fixed_cost + problem.route_cost(r) for r in routes if r),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_no_improving_relocate_or_reversal_is_left(seed):
+    locations = random_locations(num_fields=12, seed=seed)
+    _, cost_matrix = haversine_costs(locations)
+    problem = build_problem(cost_matrix, locations)
+    capacity = liter_to_bbl(volume=10000)
+    improved = LocalSearch(
+        cost_matrix=cost_matrix, locations_info=locations, neighbors=12
+    ).improve(random_solution(problem, 5, 10000, seed), truck_capacity=10000)
+    routes = [route for route in route_lists(improved) if route]
+
+    def cost(route):
+        return problem.fixed_cost + problem.route_cost(route) if route else 0.0
+
+    for a, route in enumerate(routes):
+        # Reversals that keep the first oil field of the route in place
+        for s in range(1, len(route)):
+            for e in range(s + 2, len(route) + 1):
+                reversed_route = route[:s] + route[s:e][::-1] + route[e:]
+                assert cost(reversed_route) >= cost(route) - 1e-6
+        # Relocations into the other routes
+        for k, f in enumerate(route):
+            rest = route[:k] + route[k + 1 :]
+            for b, other in enumerate(routes):
+                if b == a or problem.production[other + [f]].sum() > capacity:
+                    continue
+                for position in range(len(other) + 1):
+                    moved = other[:position] + [f] + other[position:]
+                    delta = cost(rest) + cost(moved) - cost(route) - cost(other)
+                    assert delta >= -1e-6
+
+
+def test_swap_when_no_relocation_fits():
+    locations = pd.DataFrame(
+        {
+            "Name": ["A0", "A1", "B0", "B1", "Depot"],
+            "Latitude": [-18.0, -18.0, -20.0, -20.0, -19.0],
+            "Longitude": [-39.5, -39.49, -39.5, -39.49, -39.5],
+            "Production": [30.0, 30.0, 30.0, 30.0, 0],
+            "Depot": [0, 0, 0, 0, 1],
+        }
+    )
+    _, cost_matrix = haversine_costs(locations)
+    problem = build_problem(cost_matrix, locations)
+    # Each truck carries one field of each group, and has room for no third one
+    solution = problem.build_solution(*giant_tour([[0, 2], [1, 3]]), 10000)
+
+    local_search = LocalSearch(cost_matrix=cost_matrix, locations_info=locations)
+    improved = local_search.improve(solution, truck_capacity=10000)
+    names = [sorted(f.name for f in t.route) for t in improved.trucks]
+    assert sorted(names) == [["A0", "A1"], ["B0", "B1"]]
+    assert improved.total_cost < solution.total_cost
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from helpers import random_locations
+from src.utils import DistanceMatrix, MatrixStore, distance_to_cost
+
+
+def mapped(values: np.ndarray) -> bool:
+    """Checks whether an array is a view of a memory map."""
+    while isinstance(values, np.ndarray):
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_round_trip_maps_the_file(tmp_path):
+    locations = random_locations(num_fields=6, seed=0)
+    distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+    store = MatrixStore(path=str(tmp_path / "distance_matrix.npy"))
+    assert not store.exists()
+    distance_matrix.store_backup(store.path)
+    assert store.exists()
+
+    loaded = store.load()
+    assert list(loaded.index) == list(loaded.columns) == list(locations["Name"])
+    assert np.array_equal(loaded.to_numpy(), distance_matrix.matrix.to_numpy())
+    assert mapped(loaded.to_numpy())
+    with pytest.raises(ValueError):
+        loaded.to_numpy()[0, 1] = 0.0
+
+
+def test_copy_on_write_scaling_leaves_the_file(tmp_path):
+    locations = random_locations(num_fields=6, seed=0)
+    distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+    store = MatrixStore(path=str(tmp_path / "distance_matrix.npy"))
+    distance_matrix.store_backup(store.path)
+
+    cost_matrix = distance_to_cost(6.62, 17.5, store.load(mmap_mode="c"), inplace=True)
+    expected = distance_matrix.matrix.to_numpy() * 6.62 / 17.5
+    assert np.allclose(cost_matrix.to_numpy(), expected)
+    assert np.array_equal(store.load().to_numpy(), distance_matrix.matrix.to_numpy())
+
+
+def test_saving_again_keeps_mapped_readers(tmp_path):
+    locations = random_locations(num_fields=6, seed=0)
+    distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+    store = MatrixStore(path=str(tmp_path / "distance_matrix.npy"))
+    distance_matrix.store_backup(store.path)
+
+    mapped = store.load()
+    before = mapped.to_numpy().copy()
+    store.save(distance_matrix.matrix * 2, locations)
+    assert np.array_equal(mapped.to_numpy(), before)
+    assert np.array_equal(store.load().to_numpy(), before * 2)
+
+
+def test_matches_the_same_locations_in_any_order(tmp_path):
+    locations = random_locations(num_fields=6, seed=0)
+    distance_matrix = DistanceMatrix(input_data=locations, backend="haversine")
+    store = MatrixStore(path=str(tmp_path / "distance_matrix.npy"))
+    assert not store.matches(locations)
+    distance_matrix.store_backup(store.path)
+
+    assert store.matches(locations.iloc[::-1])
+    assert store.matches(locations.set_index("Name").iloc[:3])
+    moved = locations.copy()
+    moved.loc[0, "Latitude"] += 0.01
+    assert not store.matches(moved)
+    assert not store.matches(random_locations(num_fields=7, seed=0))
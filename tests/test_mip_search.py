@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.mip_search import MIPSolver
+from src.partition_search import PartitionSolver
+
+CASES = [(5, 2, 6000, 1), (6, 2, 10000, 3), (7, 3, 10000, 6)]
+ENGINES = {"ortools": "ortools.constraint_solver", "pulp": "pulp"}
+
+
+def test_unknown_backend_is_rejected(make_solver):
+    solver = make_solver(MIPSolver, num_fields=4, backend="gurobi")
+    with pytest.raises(ValueError, match="Unknown MIP backend"):
+        solver.run(num_trucks=2, truck_capacity=10000)
+
+
+def test_gap_is_nan_without_a_bound(make_solver):
+    solver = make_solver(MIPSolver, num_fields=4)
+    assert np.isnan(solver.gap)
+
+
+@pytest.mark.parametrize("num_fields, num_trucks, truck_capacity, seed", CASES)
+def test_pulp_proves_the_partition_optimum(
+    make_solver, num_fields, num_trucks, truck_capacity, seed
+):
+    pytest.importorskip(ENGINES["pulp"])
+    exact = make_solver(PartitionSolver, num_fields=num_fields, seed=seed)
+    exact.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    solver = make_solver(MIPSolver, num_fields=num_fields, seed=seed, backend="pulp")
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity, time_limit=60.0)
+
+    expected = exact.optimal_solution.total_cost
+    assert np.isclose(solver.optimal_solution.total_cost, expected)
+    if solver.status == "optimal":
+        assert np.isclose(solver.lower_bound, expected)
+        assert solver.gap == 0.0
+
+
+@pytest.mark.parametrize("num_fields, num_trucks, truck_capacity, seed", CASES)
+def test_ortools_is_never_below_the_partition_optimum(
+    make_solver, num_fields, num_trucks, truck_capacity, seed
+):
+    pytest.importorskip(ENGINES["ortools"])
+    exact = make_solver(PartitionSolver, num_fields=num_fields, seed=seed)
+    exact.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    solver = make_solver(MIPSolver, num_fields=num_fields, seed=seed)
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity, time_limit=2.0)
+
+    cost = solver.optimal_solution.total_cost
+    visited = [f.name for t in solver.optimal_solution.trucks for f in t.route]
+    assert cost >= exact.optimal_solution.total_cost - 1e-6
+    assert sorted(visited) == sorted(f"F{i}" for i in range(num_fields))
+    assert np.isnan(solver.gap)
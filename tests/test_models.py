@@ -0,0 +1,71 @@
+import numpy as np
+
+from helpers import haversine_costs, random_locations
+from src.utils import Solution, build_problem, giant_tour, liter_to_bbl
+
+ROUTES = [[2, 0], [], [4, 1, 3], [5]]
+
+
+def build(routes, truck_capacity=10000):
+    locations = random_locations(num_fields=6, seed=0)
+    _, cost_matrix = haversine_costs(locations)
+    problem = build_problem(cost_matrix, locations)
+    return problem, problem.build_solution(*giant_tour(routes), truck_capacity)
+
+
+def test_giant_tour_round_trip():
+    tour, offsets = giant_tour(ROUTES)
+    assert tour.tolist() == [2, 0, 4, 1, 3, 5]
+    assert offsets.tolist() == [0, 2, 2, 5, 6]
+
+    _, solution = build(ROUTES)
+    assert [route.tolist() for route in solution.routes] == ROUTES
+    assert solution.num_trucks == len(ROUTES)
+
+
+def test_empty_solution():
+    tour, offsets = giant_tour([])
+    assert len(tour) == 0 and offsets.tolist() == [0]
+    solution = Solution()
+    assert solution.trucks == [] and solution.routes == []
+    assert solution.total_cost == np.inf
+
+
+def test_trucks_are_built_on_first_read():
+    problem, solution = build(ROUTES)
+    assert solution._trucks is None
+
+    trucks = solution.trucks
+    assert solution.trucks is trucks
+    assert [[f.idx for f in t.route] for t in trucks] == ROUTES
+    for truck, route in zip(trucks, ROUTES):
+        load = problem.production[route].sum()
+        assert truck.start.name == truck.end.name == "Depot"
+        assert [f.name for f in truck.route] == [problem.names[f] for f in route]
+        assert np.isclose(truck.var_cost, problem.route_cost(route))
+        assert np.isclose(truck.capacity, liter_to_bbl(volume=10000) - load)
+    assert np.isclose(
+        solution.total_cost,
+        sum(problem.fixed_cost + problem.route_cost(r) for r in ROUTES if r),
+    )
+
+
+def test_solution_from_trucks_matches_its_arrays():
+    _, solution = build(ROUTES)
+    rebuilt = Solution(trucks=solution.trucks, total_cost=solution.total_cost)
+
+    assert [route.tolist() for route in rebuilt.routes] == ROUTES
+    assert np.allclose(rebuilt.loads, solution.loads)
+    assert np.allclose(rebuilt.var_costs, solution.var_costs)
+    assert np.isclose(rebuilt.capacity, solution.capacity)
+    assert rebuilt.fixed_cost == solution.fixed_cost
+
+
+def test_assign_shares_the_arrays():
+    _, solution = build(ROUTES)
+    target = Solution(trucks=[], total_cost=np.inf)
+    target.assign(solution)
+
+    assert target.tour is solution.tour
+    assert target.total_cost == solution.total_cost
+    assert [route.tolist() for route in target.routes] == ROUTES
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from helpers import BRUTE_FORCE_CASES, brute_force
+from src.partition_search import MAX_FIELDS, PartitionSolver
+
+
+@pytest.mark.parametrize(
+    "num_fields, num_trucks, truck_capacity, seed", BRUTE_FORCE_CASES
+)
+def test_matches_brute_force(
+    make_solver, num_fields, num_trucks, truck_capacity, seed
+):
+    solver = make_solver(PartitionSolver, num_fields=num_fields, seed=seed)
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    expected = brute_force(solver, num_trucks, truck_capacity)
+
+    cost = solver.optimal_solution.total_cost
+    assert cost == expected == np.inf or np.isclose(cost, expected)
+
+
+def test_too_many_fields_are_rejected(make_solver):
+    solver = make_solver(PartitionSolver, num_fields=MAX_FIELDS + 1)
+    with pytest.raises(ValueError, match=f"up to {MAX_FIELDS} oil fields"):
+        solver.run(num_trucks=20, truck_capacity=10000)
+
+
+def test_no_fields_cost_nothing(make_solver):
+    solver = make_solver(PartitionSolver, num_fields=0)
+    solver.run(num_trucks=2, truck_capacity=10000)
+    assert solver.optimal_solution.total_cost == 0.0
+    assert len(solver.optimal_solution.trucks) == 2
+    assert not any(t.route for t in solver.optimal_solution.trucks)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from src.heuristic_search import HeuristicSolver
+from src.utils import build_problem
+
+
+def test_neighbor_lists_rank_fields_by_cost(make_solver):
+    solver = make_solver(HeuristicSolver, num_fields=8)
+    problem = build_problem(solver.cost_matrix, solver.locations_info)
+
+    for k, size in [(3, 3), (None, 7), (20, 7)]:
+        neighbors = problem.neighbor_lists(k)
+        for f in problem.fields:
+            assert f not in neighbors[f] and len(neighbors[f]) == size
+            assert np.all(np.diff(problem.costs[f, neighbors[f]]) >= 0)
+    assert sorted(problem.neighbor_lists()[problem.depot]) == problem.fields.tolist()
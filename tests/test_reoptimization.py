@@ -0,0 +1,67 @@
+import numpy as np
+
+from helpers import haversine_costs, random_locations
+from src.reoptimization import Changes, Reoptimizer
+from src.savings_search import SavingsSolver
+from src.utils import Solution
+
+
+def plan(locations, cost_matrix, truck_capacity=10000):
+    solver = SavingsSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+    solver.run(num_trucks=6, truck_capacity=truck_capacity)
+    return solver.optimal_solution
+
+
+def visited(solution):
+    return sorted(f.name for t in solution.trucks for f in t.route)
+
+
+def test_changes_between_two_days():
+    previous = random_locations(num_fields=5, seed=0)
+    current = previous[previous["Name"] != "F1"].copy()
+    current.loc[current["Name"] == "F2", "Production"] = 3.0
+    current.loc[len(previous)] = ["F9", -19.0, -39.2, 4.0, 0]
+
+    changes = Changes.between(previous, current.set_index("Name"))
+    assert changes.production == {"F2": 3.0}
+    assert changes.added == ["F9"]
+    assert changes.removed == ["F1"]
+
+
+def test_no_changes_between_equal_days():
+    locations = random_locations(num_fields=5, seed=0)
+    assert Changes.between(locations, locations.copy()) == Changes()
+
+
+def test_removed_field_in_the_locations_is_not_served():
+    locations = random_locations(num_fields=12, seed=1)
+    _, cost_matrix = haversine_costs(locations)
+    previous = plan(locations, cost_matrix)
+
+    changes = Changes(production={"F0": 1.0}, removed=["F3", "F7"])
+    solution = Reoptimizer(
+        cost_matrix=cost_matrix, locations_info=locations
+    ).reoptimize(previous, changes, truck_capacity=10000)
+
+    expected = sorted(f"F{i}" for i in range(12) if i not in (3, 7))
+    assert visited(solution) == expected
+    assert np.isfinite(solution.total_cost)
+    assert len(solution.trucks) == len(previous.trucks)
+
+
+def test_added_fields_are_inserted():
+    locations = random_locations(num_fields=12, seed=2)
+    _, cost_matrix = haversine_costs(locations)
+    before = locations[~locations["Name"].isin(["F4", "F5"])]
+    previous = plan(before, cost_matrix)
+
+    changes = Changes.between(before, locations)
+    solution = Reoptimizer(
+        cost_matrix=cost_matrix, locations_info=locations
+    ).reoptimize(previous, changes, truck_capacity=10000)
+    assert changes.added == ["F4", "F5"]
+    assert visited(solution) == sorted(f"F{i}" for i in range(12))
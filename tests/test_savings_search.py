@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import BRUTE_FORCE_CASES, brute_force, haversine_costs
+from src.savings_search import SavingsSolver
+from src.utils import Solution, build_problem
+
+
+def pair_solver(production: float) -> SavingsSolver:
+    """Two oil fields next to each other and far from the depot."""
+    locations = pd.DataFrame(
+        {
+            "Name": ["F0", "F1", "Depot"],
+            "Latitude": [-18.0, -18.0, -19.0],
+            "Longitude": [-39.5, -39.49, -39.5],
+            "Production": [production, production, 0],
+            "Depot": [0, 0, 1],
+        }
+    )
+    dist_matrix, cost_matrix = haversine_costs(locations)
+    return SavingsSolver(
+        cost_matrix=cost_matrix,
+        locations_info=locations,
+        dist_matrix=dist_matrix,
+        optimal_solution=Solution(trucks=[], total_cost=np.inf),
+    )
+
+
+def test_fields_that_fit_share_a_truck():
+    solver = pair_solver(production=20.0)
+    solver.run(num_trucks=2, truck_capacity=10000)
+    routes = [[f.name for f in t.route] for t in solver.optimal_solution.trucks]
+    assert sorted(map(sorted, routes)) == [[], ["F0", "F1"]]
+
+
+def test_fields_that_do_not_fit_keep_their_trucks():
+    solver = pair_solver(production=40.0)
+    solver.run(num_trucks=2, truck_capacity=10000)
+    routes = [[f.name for f in t.route] for t in solver.optimal_solution.trucks]
+    assert sorted(routes) == [["F0"], ["F1"]]
+
+    solver.run(num_trucks=1, truck_capacity=10000)
+    assert solver.optimal_solution.total_cost == np.inf
+
+
+def test_oversized_field_has_no_solution():
+    solver = pair_solver(production=70.0)
+    solver.run(num_trucks=2, truck_capacity=10000)
+    assert solver.optimal_solution.total_cost == np.inf
+
+
+@pytest.mark.parametrize(
+    "num_fields, num_trucks, truck_capacity, seed", BRUTE_FORCE_CASES
+)
+def test_solution_is_feasible_and_priced(
+    make_solver, num_fields, num_trucks, truck_capacity, seed
+):
+    solver = make_solver(SavingsSolver, num_fields=num_fields, seed=seed)
+    solver.run(num_trucks=num_trucks, truck_capacity=truck_capacity)
+    solution = solver.optimal_solution
+    if solution.total_cost == np.inf:
+        return
+
+    problem = build_problem(solver.cost_matrix, solver.locations_info)
+    routes = [route.tolist() for route in solution.routes if len(route)]
+    assert sorted(f for route in routes for f in route) == problem.fields.tolist()
+    assert all(t.capacity >= -1e-9 for t in solution.trucks)
+    assert np.isclose(
+        solution.total_cost,
+        sum(problem.fixed_cost + problem.route_cost(route) for route in routes),
+    )
+    assert solution.total_cost >= brute_force(solver, num_trucks, truck_capacity) - 1e-6
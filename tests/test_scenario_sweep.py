@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.heuristic_search import HeuristicSolver
+from src.partition_search import PartitionSolver
+from src.scenario_sweep import Scenario, ScenarioSweep
+
+PRICES = [5.0, 5.5, 6.0, 6.5, 7.0]
+
+
+def sweep_scenarios(make_solver, solver_class, exact):
+    solver = make_solver(solver_class, num_fields=7)
+    sweep = ScenarioSweep(
+        locations_info=solver.locations_info,
+        dist_matrix=solver.dist_matrix,
+        solver=solver_class,
+        exact=exact,
+    )
+    scenarios = [Scenario(price, 17.5, 3, 10000) for price in PRICES]
+    return sweep, scenarios, sweep.run(scenarios)
+
+
+def test_repriced_scenarios_match_solves(make_solver):
+    sweep, scenarios, results = sweep_scenarios(make_solver, PartitionSolver, True)
+    assert sweep.solves < len(scenarios)
+    for s, (solution, _) in zip(scenarios, results):
+        single = ScenarioSweep(
+            locations_info=sweep.locations_info,
+            dist_matrix=sweep.dist_matrix,
+            solver=PartitionSolver,
+        ).run([s])[0][0]
+        assert np.isclose(solution.total_cost, single.total_cost)
+
+
+def test_heuristic_solves_every_scenario(make_solver):
+    sweep, scenarios, results = sweep_scenarios(make_solver, HeuristicSolver, False)
+    assert sweep.solves == len(scenarios)
+    assert all(solved for _, solved in results)
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import service
+from helpers import random_locations
+
+
+def stuck_job(instance, locations, dist_matrix):
+    """Job that ignores its time limit, like a solver stuck in native code."""
+    time.sleep(1.5)
+    return {"name": instance["name"], "status": "ok"}
+
+
+def test_locations_outside_the_data_directory_are_rejected(tmp_path):
+    solve_service = service.SolveService(workers=1, data_dir=str(tmp_path))
+    for path in ("../locations.csv", "/etc/passwd"):
+        with pytest.raises(ValueError, match="data directory"):
+            solve_service.submit({"locations": path, "num_trucks": 1})
+
+
+def test_timed_out_job_keeps_its_slot_until_the_worker_is_free(monkeypatch):
+    monkeypatch.setattr(service, "_run_job", stuck_job)
+    monkeypatch.setattr(service, "BACKSTOP", 0.2)
+    records = random_locations(num_fields=4, seed=0).to_dict("records")
+
+    async def scenario():
+        solve_service = service.SolveService(workers=1, timeout=0.1)
+        solve_service.start()
+        try:
+            payload = {"locations": records, "num_trucks": 2, "backend": "haversine"}
+            first = solve_service.submit(payload)
+            second = solve_service.submit(payload)
+            await asyncio.wait([first.task])
+            statuses = first.status, second.status
+            await asyncio.wait([second.task])
+            return statuses, second.started - first.started
+        finally:
+            solve_service.stop()
+
+    (first, second), delay = asyncio.run(scenario())
+    assert (first, second) == ("timeout", "queued")
+    assert delay >= 1.0
+
+
+def test_infeasible_job_answers_valid_json():
+    records = random_locations(num_fields=6, seed=0).to_dict("records")
+
+    async def scenario():
+        solve_service = service.SolveService(workers=1)
+        solve_service.start()
+        try:
+            job = solve_service.submit(
+                {
+                    "locations": records,
+                    "solver": "global",
+                    "num_trucks": 1,
+                    "truck_capacity": 6000,
+                    "backend": "haversine",
+                }
+            )
+            await asyncio.wait([job.task])
+            return job.to_dict()
+        finally:
+            solve_service.stop()
+
+    answer = json.loads(service.to_json(asyncio.run(scenario())))
+    assert answer["result"]["status"] == "infeasible"
+    assert answer["result"]["counters"]["lower_bound"] is None